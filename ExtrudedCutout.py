@@ -28,7 +28,8 @@ import FreeCAD
 import FreeCADGui as Gui
 import Part
 import SheetMetalTools
-from SheetMetalTools import SMException
+import SheetMetalParallel
+from SheetMetalTools import SMException, SMLogger
 
 # list of properties to be saved as defaults
 smExtrudedCutoutDefaultVars = []
@@ -218,39 +219,34 @@ class ExtrudedCutout:
                 ExtLength1 = -TotalLength
 
             # Step 1: Determine the sheet metal thickness
-            min_distance = float('inf')
-            
             faces = selected_object.Shape.Faces
-            for face in faces:
-                if face is not selected_face:
-                    if normal_vector.isEqual(face.normalAt(0, 0).multiply(-1), 1e-6): # Test to find a face with opposite normal
-                        distance_info = selected_face.distToShape(face)
-                        distance = distance_info[0]
-                        if distance < min_distance: # Test to find the closest opposite face
-                            try:
-                                checkFace = face.makeOffsetShape(-distance, 0)
-                                checkCut = selected_face.cut(checkFace)
-                                if checkCut.Area < 1e-6: # Test to ensure the opposite face is, in fact, the other side of the sheet metal part
-                                    min_distance = distance
-                            except: # Is necessary 'try' and 'except','cause rounded surfaces offset can lead to errors if offset is bigger than it's radius
-                                continue
-        
-            if min_distance == float('inf'):
-                raise SMException("No opposite face found to calculate thickness.")
-            
+            thicknessInfo = SheetMetalTools.smGetThicknessInfo(selected_object.Shape, selected_face)
+            if thicknessInfo.confidence >= 0.5:
+                min_distance = thicknessInfo.thickness
+            else:
+                # same gate as SheetMetalCmd.sheet_thk: low confidence estimates are
+                # checked against the closest face opposite to the selected face
+                SMLogger.log(f"Low confidence thickness measurement: {thicknessInfo}")
+                min_distance = self.find_opposite_face_distance(selected_face, faces, normal_vector)
+                if min_distance is None:
+                    raise SMException("No opposite face found to calculate thickness.")
+
             thickness = round(min_distance,4) # Appear that rounding can help on speed performance of the rest of the code
 
             # Step 2: Find pairs of parallel faces
-            parallel_faces = []
-            for i, face1 in enumerate(faces):
-                for j, face2 in enumerate(faces):
-                    if i >= j:
-                        continue
-                    if face1.normalAt(0, 0).isEqual(face2.normalAt(0, 0).multiply(-1), 1e-6):
-                        distance_info = face1.distToShape(face2)
-                        distance = distance_info[0]
-                        if abs(distance - thickness) < 1e-5: # In the past, this tolerance was 1e-6, it's leads to errors
-                            parallel_faces.extend([face1, face2])
+            # Faces are bucketed by plane / cylinder axis so that only the few faces
+            # lying at the sheet thickness from each other are checked with distToShape
+            faceBuckets = SheetMetalTools.SMFaceBuckets(faces)
+            parallel_idxs = []
+            for i, j in faceBuckets.oppositePairCandidates(thickness, 1e-5):
+                face1 = faces[i]
+                face2 = faces[j]
+                if face1.normalAt(0, 0).isEqual(face2.normalAt(0, 0).multiply(-1), 1e-6):
+                    distance_info = face1.distToShape(face2)
+                    distance = distance_info[0]
+                    if abs(distance - thickness) < 1e-5: # In the past, this tolerance was 1e-6, it's leads to errors
+                        parallel_idxs.extend([i, j])
+            parallel_faces = [faces[i] for i in sorted(set(parallel_idxs))]
 
             if parallel_faces:
                 shell = Part.Shell(parallel_faces)
@@ -264,12 +260,14 @@ class ExtrudedCutout:
 
                 tknOffStep = thickness / fp.ImproveLevel
 
-                improvSurfaces = []
+                improvOffsets = []
                 tknOff = tknOffStep
                 while abs(thickness - tknOff) > 1e-6:
-                    sideOff = smSide1.makeOffsetShape(-tknOff, 0)
-                    improvSurfaces.append(sideOff)
+                    improvOffsets.append(-tknOff)
                     tknOff = tknOff + tknOffStep
+                # The offset surfaces are independent, compute them in worker processes
+                improvSurfaces = SheetMetalParallel.smParallelOffsets(
+                    [smSide1] * len(improvOffsets), improvOffsets)
 
                 improvShell = improvSurfaces
 
@@ -320,29 +318,23 @@ class ExtrudedCutout:
 
             if fp.ImproveCut:
                 connected_improv = self.find_connected_faces(myCommImprov)
-                offset_improv = []
-                for improv in connected_improv: # Offset to one side
-                    improv_shell = Part.Shell(improv)
-                    offset_value = improv_shell.distToShape(smSide1)[0]
-                    off_impr = improv_shell.makeOffsetShape(offset_value, 0, fill=True)
-                    offset_improv.append(off_impr)
-                for improv in connected_improv: # Offset to other side
-                    improv_shell = Part.Shell(improv)
-                    offset_value = thickness - improv_shell.distToShape(smSide1)[0]
-                    off_impr = improv_shell.makeOffsetShape(-offset_value, 0, fill=True)
-                    offset_improv.append(off_impr)
+                improv_shells = [Part.Shell(improv) for improv in connected_improv]
+                improv_dists = [shell.distToShape(smSide1)[0] for shell in improv_shells]
+                # Offset to one side, then to the other side
+                offset_improv = SheetMetalParallel.smParallelOffsets(
+                    improv_shells * 2,
+                    improv_dists + [dist - thickness for dist in improv_dists],
+                    fill=True)
 
             # Step 5: Combine the offsets
+            # All tool solids are collected and combined in a single boolean
+            # operation, instead of fusing them one by one
             if offset_shapes:
-                combined_offset = Part.Solid(offset_shapes[0])
-                for shape in offset_shapes[1:]:
-                    combined_offset = combined_offset.fuse(shape)
+                cutTools = [Part.Solid(offset_shapes[0])] + offset_shapes[1:]
 
                 if fp.ImproveCut:
-                    comb_impr_off = Part.Solid(offset_improv[0])
-                    for impr_shape in offset_improv[1:]:
-                        comb_impr_off = comb_impr_off.fuse(impr_shape)
-                    combined_offset = combined_offset.fuse(comb_impr_off)
+                    cutTools += [Part.Solid(offset_improv[0])] + offset_improv[1:]
+                    combined_offset = SheetMetalTools.smMultiFuse(cutTools)
 
                     # Intersection with sheet metal faces
                     cutOffsets = combined_offset.common(shell)
@@ -353,24 +345,19 @@ class ExtrudedCutout:
                         offsetSolid = offsetFace.makeOffsetShape(-thickness, 0, fill=True)
                         shapeCutOffsets.append(offsetSolid)
 
-                    combined_offset = Part.Solid(shapeCutOffsets[0])
-                    for shape in shapeCutOffsets[1:]:
-                        combined_offset = combined_offset.fuse(shape)
+                    cutTools = [Part.Solid(shapeCutOffsets[0])] + shapeCutOffsets[1:]
 
                 # Step 6: Cut
                 # Check the "CutSide" property to decide how to perform the cut
                 if fp.CutSide == "Inside":
-                    if fp.Refine:
-                        cut_result = selected_object.Shape.cut(combined_offset).removeSplitter()
-                    else:
-                        cut_result = selected_object.Shape.cut(combined_offset)
+                    cut_result = SheetMetalTools.smMultiCut(selected_object.Shape, cutTools)
                 elif fp.CutSide == "Outside":
-                    if fp.Refine:
-                        cut_result = selected_object.Shape.common(combined_offset).removeSplitter()
-                    else:
-                        cut_result = selected_object.Shape.common(combined_offset)
+                    combined_offset = SheetMetalTools.smMultiFuse(cutTools)
+                    cut_result = selected_object.Shape.common(combined_offset)
                 else:
                     raise SMException("Invalid CutSide value.")
+                if fp.Refine:
+                    cut_result = cut_result.removeSplitter()
 
                 fp.Shape = cut_result
             else:
@@ -381,31 +368,26 @@ class ExtrudedCutout:
 
     def find_connected_faces(self, shape):
         '''Find connected faces in a shape'''
-        faces = shape.Faces
-        visited = set()
-        components = []
-        
-        def is_connected(face1, face2):
-            for edge1 in face1.Edges:
-                for edge2 in face2.Edges:
-                    if edge1.isSame(edge2):
-                        return True
-            return False
-
-        def dfs(face, component):
-            visited.add(face)
-            component.append(face)
-            for next_face in faces:
-                if next_face not in visited and is_connected(face, next_face):
-                    dfs(next_face, component)
+        return SheetMetalTools.smFindConnectedFaces(shape)
 
+    def find_opposite_face_distance(self, selected_face, faces, normal_vector):
+        '''Distance to the closest face on the other side of the sheet, or None'''
+        min_distance = None
         for face in faces:
-            if face not in visited:
-                component = []
-                dfs(face, component)
-                components.append(component)
-
-        return components
+            if face.isSame(selected_face):
+                continue
+            if not normal_vector.isEqual(face.normalAt(0, 0).multiply(-1), 1e-6): # Test to find a face with opposite normal
+                continue
+            distance = selected_face.distToShape(face)[0]
+            if min_distance is not None and distance >= min_distance: # Test to find the closest opposite face
+                continue
+            try:
+                checkCut = selected_face.cut(face.makeOffsetShape(-distance, 0))
+                if checkCut.Area < 1e-6: # Test to ensure the opposite face is, in fact, the other side of the sheet metal part
+                    min_distance = distance
+            except Exception: # rounded surfaces offset can lead to errors if offset is bigger than it's radius
+                continue
+        return min_distance
 
 ##########################################################################################################
 # Gui code
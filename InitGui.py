@@ -67,6 +67,7 @@ class SMWorkbench(Workbench):
         import SheetMetalFormingCmd
         import SheetMetalUnfoldCmd
         import SheetMetalBaseShapeCmd
+        import SheetMetalFlatExport
         import os.path
 
         self.list = [
@@ -76,6 +77,7 @@ class SMWorkbench(Workbench):
             "SheetMetal_AddFoldWall",
             "SheetMetal_Unfold",
             "SheetMetal_UnfoldUpdate",
+            "SheetMetal_ExportFlatPatterns",
             "SheetMetal_AddCornerRelief",
             "SheetMetal_AddRelief",
             "SheetMetal_AddJunction",
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# #######################################################################
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# #######################################################################
+
+
+import os
+import shutil
+import tempfile
+import unittest
+import SheetMetalTools
+from SheetMetalBaseShapeCmd import SMBaseShapeCache, _smBuildBaseShape
+
+
+class TestBaseShapeCache(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cache = SMBaseShapeCache(self.path)
+        self.args = ("U-Shape", 1.0, 1.0, 20.0, 30.0, 10.0, 5.0, True, "0,0")
+
+    def tearDown(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def test_hit_returns_copy(self):
+        key = self.cache.makeKey(*self.args)
+        self.assertIsNone(self.cache.get(key))
+        shape = _smBuildBaseShape(*self.args)
+        self.cache.put(key, shape)
+        cached1 = self.cache.get(key)
+        cached2 = self.cache.get(key)
+        self.assertAlmostEqual(cached1.Volume, shape.Volume, places=6)
+        self.assertFalse(cached1.isSame(cached2))
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+
+    def test_disk_cache(self):
+        cache = SMBaseShapeCache(self.path, diskCache=True)
+        key = cache.makeKey(*self.args)
+        shape = _smBuildBaseShape(*self.args)
+        cache.put(key, shape)
+        if SheetMetalTools.smHasElementMap(shape):
+            # element maps would be lost in the BREP file
+            self.assertEqual(os.listdir(self.path), [])
+            return
+        # a new cache on the same folder only has the shape on disk
+        cache = SMBaseShapeCache(self.path, diskCache=True)
+        cached = cache.get(key)
+        self.assertAlmostEqual(cached.Volume, shape.Volume, places=6)
+        self.assertEqual(cache.diskHits, 1)
+
+    def test_disk_cache_size_limit(self):
+        cache = SMBaseShapeCache(self.path, diskCache=True)
+        cache.maxDiskSize = lambda: 1
+        key = cache.makeKey(*self.args)
+        cache.put(key, _smBuildBaseShape(*self.args))
+        # anything above the limit is evicted, leftover temporary files neither
+        self.assertEqual(os.listdir(self.path), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
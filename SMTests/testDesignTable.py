@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# #######################################################################
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# #######################################################################
+
+
+import os
+import tempfile
+import unittest
+import FreeCAD
+import SheetMetalDesignTable
+
+
+class TestDesignTable(unittest.TestCase):
+    def test_read_csv(self):
+        with tempfile.TemporaryDirectory() as path:
+            fileName = os.path.join(path, "table.csv")
+            with open(fileName, "w") as f:
+                f.write("Name,BaseShape.thickness,BaseShape.width\n")
+                f.write("small, 1 mm, 20\n\n")
+                f.write("large, 2 mm, 40\n")
+            columns, rows = SheetMetalDesignTable.smReadDesignTable(fileName)
+        self.assertEqual(columns, ["Name", "BaseShape.thickness", "BaseShape.width"])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1]["BaseShape.thickness"], "2 mm")
+
+    def test_column_names(self):
+        names = [SheetMetalDesignTable._smColumnName(i) for i in (0, 25, 26, 27)]
+        self.assertEqual(names, ["A", "Z", "AA", "AB"])
+
+    def test_blank_cell_keeps_template_value(self):
+        with tempfile.TemporaryDirectory() as path:
+            templatePath = os.path.join(path, "template.FCStd")
+            doc = FreeCAD.newDocument("SMDesignTableTemplate")
+            doc.addObject("Part::Box", "Box")
+            doc.addObject("Spreadsheet::Sheet", "Sheet").set("A1", "=2*3")
+            doc.recompute()
+            doc.saveAs(templatePath)
+            FreeCAD.closeDocument(doc.Name)
+            try:
+                rows = [
+                    {"Name": "first", "Box.Length": "20", "Sheet.A1": "5"},
+                    {"Name": "second", "Box.Length": "", "Sheet.A1": ""},
+                ]
+                records = [
+                    SheetMetalDesignTable.smBuildVariant(templatePath, i, row, path)
+                    for i, row in enumerate(rows)
+                ]
+                # the template has no unfold, both rows fail after setting their values
+                self.assertEqual([r["status"] for r in records], ["failed", "failed"])
+                doc = SheetMetalDesignTable._smTemplateDocs[templatePath]
+                self.assertAlmostEqual(doc.getObject("Box").Length.Value, 10.0)
+                self.assertEqual(doc.getObject("Sheet").getContents("A1"), "=2*3")
+            finally:
+                SheetMetalDesignTable._smCloseTemplates()
+
+
+if __name__ == "__main__":
+    unittest.main()
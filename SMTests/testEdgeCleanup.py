@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# #######################################################################
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# #######################################################################
+
+
+import math
+import unittest
+import Part
+from FreeCAD import Vector
+from SheetMetalNewUnfolder import Edge2DCleanup, Primitives2D, fuzz, np
+
+
+def line(x1, y1, x2, y2):
+    return Part.LineSegment(Vector(x1, y1, 0), Vector(x2, y2, 0)).toShape()
+
+
+def circle(x, y, r):
+    return Part.Circle(Vector(x, y, 0), Vector(0, 0, 1), r).toShape()
+
+
+@unittest.skipIf(np is None, "numpy is not available")
+class TestEdgeCleanup(unittest.TestCase):
+    def assertSameAsDefault(self, edges):
+        """Primitives2D must give the same wires as the default passes"""
+        wires = Primitives2D.from_edges(edges).to_wires(fuzz)
+        expected = Edge2DCleanup.merge_segmented_circles(
+            Edge2DCleanup.fix_coincidence(edges, fuzz)
+        )
+        self.assertEqual(len(wires), len(expected))
+        self.assertEqual(
+            sorted(w.isClosed() for w in wires), sorted(w.isClosed() for w in expected)
+        )
+        self.assertAlmostEqual(
+            sum(w.Length for w in wires), sum(w.Length for w in expected), places=2
+        )
+        return wires
+
+    def test_shared_edges(self):
+        d = 0.3 * fuzz
+        edges = [
+            line(0, 0, 100, d),
+            line(100, 0, 100 - d, 50),
+            line(100, 50 + d, 0, 50),
+            line(d, 50, 0, -d),
+        ]
+        wires = self.assertSameAsDefault(edges)
+        self.assertEqual(len(wires), 1)
+        self.assertTrue(wires[0].isClosed())
+
+    def test_chain_does_not_drift(self):
+        step = 0.6 * fuzz
+        points = np.array([(i * step, 0.0) for i in range(10)])
+        clusters, seeds = Primitives2D._cluster_points(points, fuzz)
+        self.assertGreater(len(seeds), 1)
+        dist = np.linalg.norm(points - seeds[clusters], axis=1)
+        self.assertTrue(np.all(dist < fuzz))
+
+    def test_circle_and_square(self):
+        edges = [
+            line(0, 0, 100, 0),
+            line(100, 0, 100, 50),
+            line(100, 50, 0, 50),
+            line(0, 50, 0, 0),
+            circle(30, 25, 5),
+        ]
+        wires = self.assertSameAsDefault(edges)
+        self.assertTrue(all(w.isClosed() for w in wires))
+
+    def test_circle_seam_is_not_a_vertex(self):
+        # the seam of the circle is at (15, 0), close to the end of the line
+        edges = [circle(10, 0, 5), line(15 + 0.5 * fuzz, 0, 30, 0)]
+        primitives = Primitives2D.from_edges(edges)
+        primitives.to_wires(fuzz)
+        self.assertAlmostEqual(primitives.length[1], 15 - 0.5 * fuzz, places=9)
+        self.assertNotIn(primitives.vertex_ids[0, 0], primitives.vertex_ids[1])
+        self.assertAlmostEqual(primitives.total_length(), 10 * math.pi + 15, places=2)
+
+    def test_branch(self):
+        edges = [line(0, 0, 50, 0), line(50, 0, 100, 0), line(50, 0, 50, 30)]
+        self.assertSameAsDefault(edges)
+
+
+if __name__ == "__main__":
+    unittest.main()
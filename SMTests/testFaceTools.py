@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# #######################################################################
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# #######################################################################
+
+
+import unittest
+import Part
+from FreeCAD import Vector, Placement, Rotation
+import SheetMetalTools
+
+
+class TestFaceTools(unittest.TestCase):
+    def test_connected_faces(self):
+        box1 = Part.makeBox(10, 10, 1)
+        box2 = Part.makeBox(10, 10, 1, Vector(20, 0, 0))
+        groups = SheetMetalTools.smFindConnectedFaces(Part.makeCompound([box1, box2]))
+        self.assertEqual([len(g) for g in groups], [6, 6])
+
+    def test_faces_connected_to_face(self):
+        box = Part.makeBox(10, 10, 1)
+        neighbours = SheetMetalTools.smFacesConnectedToFace(box, box.Faces[0])
+        self.assertEqual(len(neighbours), 4)
+        self.assertFalse(any(f.isSame(box.Faces[0]) for f in neighbours))
+
+    def test_box_overlap_pairs(self):
+        boxes = [Part.makeBox(10, 10, 1, Vector(15 * i, 0, 0)).BoundBox for i in range(4)]
+        self.assertEqual(SheetMetalTools.smBoxOverlapPairs(boxes), set())
+        self.assertEqual(SheetMetalTools.smBoxOverlapPairs(boxes, 3.0), {(0, 1), (1, 2), (2, 3)})
+
+    def test_shape_fingerprint(self):
+        # three legs of different lengths, the part is not mirror symmetric
+        def tripod(zLength):
+            legs = [Part.makeBox(30, 4, 2), Part.makeBox(4, 20, 2), Part.makeBox(4, 4, zLength)]
+            return legs[0].fuse(legs[1:]).removeSplitter()
+
+        part = tripod(12)
+        moved = part.copy()
+        moved.Placement = Placement(Vector(100, -50, 7), Rotation(Vector(1, 2, 3), 33))
+        mirrored = part.mirror(Vector(0, 0, 0), Vector(1, 0, 0))
+        fingerprint = SheetMetalTools.smShapeFingerprint(part)
+        self.assertEqual(SheetMetalTools.smShapeFingerprint(moved), fingerprint)
+        self.assertNotEqual(SheetMetalTools.smShapeFingerprint(mirrored), fingerprint)
+        self.assertNotEqual(SheetMetalTools.smShapeFingerprint(tripod(14)), fingerprint)
+        groups = SheetMetalTools.smGroupByFingerprint([part, moved, mirrored], lambda s: s)
+        self.assertEqual([len(g) for _f, g in groups], [2, 1])
+
+    def test_shape_fingerprint_square_plate(self):
+        # the principal axes of a plate with a fourfold hole pattern are not unique
+        def plate(countersunk):
+            shape = Part.makeBox(100, 100, 2)
+            for angle in (0, 90, 180, 270):
+                center = Vector(50, 50, 0) + Rotation(Vector(0, 0, 1), angle).multVec(
+                    Vector(25, 10, 0)
+                )
+                shape = shape.cut(Part.makeCylinder(4, 2, center))
+                if countersunk:
+                    shape = shape.cut(Part.makeCone(4, 6, 1, center + Vector(0, 0, 1)))
+            return shape
+
+        # a flat plate turned over is its mirror image
+        flat = plate(False)
+        flatMirrored = flat.mirror(Vector(50, 50, 0), Vector(1, 0, 0))
+        self.assertEqual(
+            SheetMetalTools.smShapeFingerprint(flatMirrored),
+            SheetMetalTools.smShapeFingerprint(flat),
+        )
+        # countersinks on one side only make it chiral
+        part = plate(True)
+        moved = part.copy()
+        moved.Placement = Placement(Vector(-20, 30, 5), Rotation(Vector(0, 1, 1), 71))
+        mirrored = part.mirror(Vector(50, 50, 0), Vector(1, 0, 0))
+        fingerprint = SheetMetalTools.smShapeFingerprint(part)
+        self.assertEqual(SheetMetalTools.smShapeFingerprint(moved), fingerprint)
+        self.assertNotEqual(SheetMetalTools.smShapeFingerprint(mirrored), fingerprint)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# #######################################################################
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# #######################################################################
+
+
+import csv
+import os
+import tempfile
+import unittest
+import FreeCAD
+import SheetMetalFlatExport
+import SheetMetalParallel
+import SheetMetalUnfoldCmd
+from SheetMetalBaseShapeCmd import SMBaseShape
+from SheetMetalFlatExport import SMFlatPart, smCollectFlatParts
+
+_realFlatPatternJob = SheetMetalFlatExport._smFlatPatternJob
+
+
+# replacements of SheetMetalFlatExport._smFlatPatternJob, module level functions
+# so the worker processes can import them
+def v2FailsJob(engine, args):
+    if engine == "V2":
+        return "failed", "V2 can't unfold this part", 0.0
+    return _realFlatPatternJob(engine, args)
+
+
+def crashJob(engine, args):
+    os._exit(3)
+
+
+class TestFlatExport(unittest.TestCase):
+    def setUp(self):
+        self.doc = FreeCAD.newDocument("SMFlatExportTest")
+
+    def tearDown(self):
+        FreeCAD.closeDocument(self.doc.Name)
+
+    def addBaseShape(self, name, typeId = "Part::FeaturePython"):
+        obj = self.doc.addObject(typeId, name)
+        SMBaseShape(obj)
+        return obj
+
+    def exportWithJob(self, job, maxWorkers):
+        """Export the document with a replaced unfold job, return the summary rows"""
+        SheetMetalFlatExport._smFlatPatternJob = job
+        try:
+            with tempfile.TemporaryDirectory() as path:
+                SheetMetalFlatExport.smExportFlatPatterns(self.doc, path, maxWorkers)
+                fileName = os.path.join(path, SheetMetalFlatExport.smSummaryFileName)
+                with open(fileName, newline="") as f:
+                    rows = list(csv.DictReader(f))
+                for row in rows:
+                    row["dxfWritten"] = bool(row["dxf"]) and os.path.isfile(row["dxf"])
+                return rows
+        finally:
+            SheetMetalFlatExport._smFlatPatternJob = _realFlatPatternJob
+
+    def test_quantity(self):
+        part = SMFlatPart(None, None)
+        self.assertEqual(part.quantity, 0)
+        part.direct = 2
+        self.assertEqual(part.quantity, 2)
+        # the source of links is counted through its links only
+        part.linked = 5
+        self.assertEqual(part.quantity, 5)
+
+    def test_collect_flat_parts(self):
+        self.addBaseShape("Plate")
+        self.doc.addObject("Part::Box", "Box")
+        # a part inside an App::Part container
+        container = self.doc.addObject("App::Part", "Assembly")
+        container.addObject(self.addBaseShape("Bracket"))
+        # a body ending with a sheet metal feature
+        body = self.doc.addObject("PartDesign::Body", "Body")
+        body.addObject(self.addBaseShape("Cover", "PartDesign::FeaturePython"))
+        # a linked part, once through a link and three times through a link array
+        angle = self.addBaseShape("Angle")
+        link = self.doc.addObject("App::Link", "Link")
+        link.LinkedObject = angle
+        linkArray = self.doc.addObject("App::Link", "LinkArray")
+        linkArray.LinkedObject = angle
+        linkArray.ElementCount = 3
+        self.doc.recompute()
+
+        parts = smCollectFlatParts(self.doc)
+        quantities = {part.obj.Name: part.quantity for part in parts}
+        self.assertEqual(quantities, {"Plate": 1, "Bracket": 1, "Body": 1, "Angle": 4})
+        bodyPart = next(part for part in parts if part.obj.Name == "Body")
+        self.assertEqual(bodyPart.feature.Name, "Cover")
+        # a selection only counts its own parts
+        parts = smCollectFlatParts([container, linkArray])
+        quantities = {part.obj.Name: part.quantity for part in parts}
+        self.assertEqual(quantities, {"Bracket": 1, "Angle": 3})
+
+    @unittest.skipUnless(SheetMetalUnfoldCmd.NewUnfolderAvailable, "V2 unfolder not available")
+    def test_v1_retry_after_v2_failure(self):
+        self.addBaseShape("Angle")
+        self.doc.recompute()
+        rows = self.exportWithJob(v2FailsJob, 1)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["status"], "ok")
+        self.assertEqual(rows[0]["engine"], "V1")
+        self.assertTrue(rows[0]["dxfWritten"])
+
+    @unittest.skipUnless(SheetMetalParallel.smCanUseWorkers(), "FreeCADCmd not found")
+    def test_crashed_job_is_reported(self):
+        self.addBaseShape("Short")
+        self.addBaseShape("Long").length = 60.0
+        self.doc.recompute()
+        rows = self.exportWithJob(crashJob, 2)
+        # the parts are listed as failed, not dropped, and FreeCAD keeps running
+        self.assertEqual(sorted(row["part"] for row in rows), ["Long", "Short"])
+        for row in rows:
+            self.assertEqual(row["status"], "failed")
+            self.assertIn("died", row["error"])
+            self.assertEqual(row["dxf"], "")
+
+
+if __name__ == "__main__":
+    unittest.main()
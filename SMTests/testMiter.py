@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# #######################################################################
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# #######################################################################
+
+
+import math
+import random
+import unittest
+import FreeCAD
+import Part
+from FreeCAD import Vector
+import SheetMetalTools
+import SheetMetalCmd
+
+PLATE_RADIUS = 200.0
+THICKNESS = 2.0
+
+
+def makeRadialWalls(doc, sides):
+    """Walls on all top edges of a regular polygon plate, every wall has to be
+    mitered against its two neighbours"""
+    points = [
+        Vector(PLATE_RADIUS * math.cos(2 * math.pi * i / sides),
+               PLATE_RADIUS * math.sin(2 * math.pi * i / sides), 0)
+        for i in range(sides)
+    ]
+    plate = doc.addObject("Part::Feature", "Plate")
+    plate.Shape = Part.Face(Part.makePolygon(points + [points[0]])).extrude(
+        Vector(0, 0, THICKNESS)
+    )
+    topEdges = [
+        f"Edge{i + 1}" for i, edge in enumerate(plate.Shape.Edges)
+        if edge.BoundBox.ZMin > THICKNESS / 2
+        and abs(edge.BoundBox.ZLength) < SheetMetalTools.smEpsilon
+    ]
+    wall = doc.addObject("Part::FeaturePython", "Wall")
+    SheetMetalCmd.SMBendWall(wall, plate, topEdges)
+    wall.AutoMiter = True
+    return wall
+
+
+def allPairs(boxes, tolerance = 0.0):
+    return {(i, j) for i in range(len(boxes)) for j in range(i + 1, len(boxes))}
+
+
+def bruteForcePairs(boxes, tolerance = 0.0):
+    pairs = set()
+    for i in range(len(boxes)):
+        for j in range(i + 1, len(boxes)):
+            a = FreeCAD.BoundBox(boxes[i])
+            a.enlarge(tolerance)
+            b = FreeCAD.BoundBox(boxes[j])
+            b.enlarge(tolerance)
+            if a.intersect(b):
+                pairs.add((i, j))
+    return pairs
+
+
+class TestMiter(unittest.TestCase):
+    def test_box_overlap_pairs_match_brute_force(self):
+        rng = random.Random(4)
+        boxes = []
+        for _i in range(60):
+            x, y, z = (rng.uniform(0, 100) for _c in range(3))
+            dx, dy, dz = (rng.uniform(0, 15) for _c in range(3))
+            boxes.append(FreeCAD.BoundBox(x, y, z, x + dx, y + dy, z + dz))
+        for tolerance in (0.0, 2.5):
+            self.assertEqual(
+                SheetMetalTools.smBoxOverlapPairs(boxes, tolerance),
+                bruteForcePairs(boxes, tolerance),
+            )
+
+    def test_auto_miter_same_as_all_pairs(self):
+        # the broad phase must not drop any pair mitered by the full loop
+        broadPhase = SheetMetalTools.smBoxOverlapPairs
+        shapes = []
+        for pairsFunc in (broadPhase, allPairs):
+            doc = FreeCAD.newDocument("SMMiterTest")
+            SheetMetalTools.smBoxOverlapPairs = pairsFunc
+            try:
+                wall = makeRadialWalls(doc, 12)
+                doc.recompute()
+                shapes.append(wall.Shape.copy())
+            finally:
+                SheetMetalTools.smBoxOverlapPairs = broadPhase
+                FreeCAD.closeDocument(doc.Name)
+        withBroadPhase, withAllPairs = shapes
+        self.assertTrue(withBroadPhase.isValid())
+        self.assertEqual(len(withBroadPhase.Faces), len(withAllPairs.Faces))
+        self.assertAlmostEqual(withBroadPhase.Volume, withAllPairs.Volume, places=6)
+
+
+if __name__ == "__main__":
+    unittest.main()
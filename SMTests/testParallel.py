@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# #######################################################################
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# #######################################################################
+
+
+import os
+import time
+import unittest
+import Part
+import SheetMetalParallel
+
+
+# worker jobs, they must be module level functions of an importable module
+def processIdJob(value):
+    return value, os.getpid()
+
+
+def crashJob():
+    os._exit(3)
+
+
+def sleepJob(seconds, value):
+    time.sleep(seconds)
+    return value
+
+
+def failJob():
+    raise ValueError("no valid result")
+
+
+@unittest.skipUnless(SheetMetalParallel.smCanUseWorkers(), "FreeCADCmd not found")
+class TestParallel(unittest.TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        SheetMetalParallel.smShutdownWorkers()
+
+    def test_jobs_run_in_workers(self):
+        results = SheetMetalParallel.smRunJobs(processIdJob, [(i,) for i in range(6)], 2)
+        self.assertEqual([value for value, _pid in results], list(range(6)))
+        self.assertNotIn(os.getpid(), [pid for _value, pid in results])
+
+    def test_offsets_match_serial(self):
+        box = Part.makeBox(10, 20, 2)
+        offsets = [0.5, 1.0, 1.5, 2.0, -0.25]
+        shapes = [box] * len(offsets)
+        serial = SheetMetalParallel.smParallelOffsets(shapes, offsets, maxWorkers=1)
+        parallel = SheetMetalParallel.smParallelOffsets(shapes, offsets, maxWorkers=2)
+        self.assertEqual(len(parallel), len(serial))
+        for expected, shape in zip(serial, parallel):
+            self.assertTrue(shape.isValid())
+            self.assertAlmostEqual(shape.Volume, expected.Volume, places=6)
+            self.assertAlmostEqual(shape.BoundBox.XLength, expected.BoundBox.XLength, places=6)
+
+    def test_crashed_job(self):
+        argsList = [(1,), (2,)]
+        with self.assertRaises(SheetMetalParallel.SMWorkerError):
+            SheetMetalParallel.smRunJobs(crashJob, [(), ()], 2)
+        results = SheetMetalParallel.smRunJobs(
+            crashJob, [(), ()], 2, errorResult=lambda msg: ("crashed", msg)
+        )
+        self.assertEqual([status for status, _msg in results], ["crashed", "crashed"])
+        # the pool recovers from the crashes
+        results = SheetMetalParallel.smRunJobs(processIdJob, argsList, 2)
+        self.assertEqual([value for value, _pid in results], [1, 2])
+
+    def test_race_preferred_within_grace(self):
+        jobs = {"fast": (sleepJob, (0.0, "fast")), "slow": (sleepJob, (0.5, "slow"))}
+        winner, result, timings = SheetMetalParallel.smRaceJobs(jobs, 60.0, "slow", 5.0)
+        self.assertEqual((winner, result), ("slow", "slow"))
+        self.assertEqual(timings["fast"][0], "ok")
+
+    def test_race_loser_killed_after_grace(self):
+        jobs = {"fast": (sleepJob, (0.0, "fast")), "slow": (sleepJob, (60.0, "slow"))}
+        startTime = time.perf_counter()
+        winner, result, timings = SheetMetalParallel.smRaceJobs(jobs, 120.0, "slow", 0.5)
+        self.assertEqual((winner, result), ("fast", "fast"))
+        self.assertEqual(timings["slow"][0], "killed")
+        self.assertLess(time.perf_counter() - startTime, 30.0)
+
+    def test_race_crashed_or_failed_job(self):
+        for loser, status in ((crashJob, "crashed"), (failJob, "failed")):
+            jobs = {"broken": (loser, ()), "other": (sleepJob, (0.2, "other"))}
+            winner, result, timings = SheetMetalParallel.smRaceJobs(jobs, 60.0, "broken", 5.0)
+            self.assertEqual((winner, result), ("other", "other"))
+            self.assertEqual(timings["broken"][0], status)
+
+    def test_race_timeout(self):
+        jobs = {"slow": (sleepJob, (60.0, "slow"))}
+        winner, result, timings = SheetMetalParallel.smRaceJobs(jobs, 0.5, "slow")
+        self.assertIsNone(winner)
+        self.assertIsNone(result)
+        self.assertEqual(timings["slow"][0], "timeout")
+
+
+if __name__ == "__main__":
+    unittest.main()
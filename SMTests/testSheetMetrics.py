@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# #######################################################################
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# #######################################################################
+
+
+import math
+import unittest
+import Part
+from FreeCAD import Vector
+from SheetMetalNewUnfolder import compute_sheet_metrics
+
+
+class TestSheetMetrics(unittest.TestCase):
+    def test_flat_plate_with_hole(self):
+        plate = Part.makeBox(100, 50, 2).cut(
+            Part.makeCylinder(5, 2, Vector(30, 25, 0))
+        )
+        metrics = compute_sheet_metrics(plate)
+        self.assertAlmostEqual(metrics.thickness, 2.0, places=6)
+        self.assertEqual(metrics.bend_count, 0)
+        self.assertAlmostEqual(metrics.blank_length, 100.0, places=3)
+        self.assertAlmostEqual(metrics.blank_width, 50.0, places=3)
+        self.assertAlmostEqual(metrics.cut_length, 300.0 + 10 * math.pi, places=2)
+        self.assertEqual(metrics.pierce_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# #######################################################################
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# #######################################################################
+
+
+import unittest
+import Part
+from FreeCAD import Vector
+from SheetMetalUnfolder import SMSketchConstraints
+
+
+def line(x1, y1, x2, y2):
+    return Part.LineSegment(Vector(x1, y1, 0), Vector(x2, y2, 0))
+
+
+class TestSketchConstraints(unittest.TestCase):
+    def test_closed_outline(self):
+        geoList = [line(0, 0, 10, 0), line(10, 0, 10, 5), line(10, 5, 0, 5), line(0, 5, 0, 0)]
+        constraints = SMSketchConstraints(geoList, "full")
+        kinds = sorted(c.Type for c in constraints)
+        self.assertEqual(kinds, ["Coincident"] * 4 + ["Horizontal"] * 2 + ["Vertical"] * 2)
+
+    def test_chain_is_not_merged(self):
+        # three end points, each within tol of the next one, but the outer two
+        # are further apart than tol
+        tol = 1e-5
+        geoList = [
+            line(0, 0, 10, 0),
+            line(10 + 0.6 * tol, 0, 10, 10),
+            line(10 + 1.2 * tol, 0, 20, 10),
+        ]
+        constraints = SMSketchConstraints(geoList, "coincident", tol)
+        self.assertEqual(len(constraints), 1)
+        self.assertEqual((constraints[0].First, constraints[0].Second), (0, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# #######################################################################
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# #######################################################################
+
+import unittest
+import FreeCAD
+import Part
+import SheetMetalTools
+
+
+class TestThickness(unittest.TestCase):
+    def setUp(self):
+        SheetMetalTools.smClearThicknessCache()
+
+    def test_box_thickness(self):
+        box = Part.makeBox(100, 50, 2)
+        top_face = [f for f in box.Faces if f.normalAt(0, 0).z > 0.5][0]
+        info = SheetMetalTools.smGetThicknessInfo(box, top_face)
+        self.assertAlmostEqual(info.thickness, 2.0, places=6)
+        self.assertEqual(info.method, "ray")
+        self.assertAlmostEqual(info.confidence, 1.0)
+
+    def test_plate_with_hole_confidence(self):
+        # the sample in the middle of the face falls into the hole
+        hole = Part.makeCylinder(10, 10, FreeCAD.Vector(50, 25, -5))
+        plate = Part.makeBox(100, 50, 2).cut(hole)
+        top_face = [f for f in plate.Faces
+                    if f.Surface.TypeId == "Part::GeomPlane" and f.normalAt(0, 0).z > 0.5][0]
+        info = SheetMetalTools.smGetThicknessInfo(plate, top_face)
+        self.assertAlmostEqual(info.thickness, 2.0, places=6)
+        self.assertAlmostEqual(info.confidence, 1.0)
+
+    def test_thickness_is_memoised(self):
+        box = Part.makeBox(100, 50, 3)
+        top_face = [f for f in box.Faces if f.normalAt(0, 0).z > 0.5][0]
+        info1 = SheetMetalTools.smGetThicknessInfo(box, top_face)
+        # a copy of the shape must hit the same cache entry
+        box_copy = box.copy()
+        top_face_copy = [f for f in box_copy.Faces if f.normalAt(0, 0).z > 0.5][0]
+        info2 = SheetMetalTools.smGetThicknessInfo(box_copy, top_face_copy)
+        self.assertIs(info1, info2)
+        self.assertEqual(len(SheetMetalTools.smThicknessCache), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -23,7 +23,8 @@
 #
 ###################################################################################
 
-import FreeCAD, Part, os, SheetMetalTools
+import FreeCAD, Part, os, sys, hashlib, SheetMetalTools
+import SheetMetalCmd
 from SheetMetalCmd import smBend
 
 icons_path = SheetMetalTools.icons_path
@@ -51,7 +52,7 @@ def GetOriginShift(dimension, type, bendCompensation):
         return -dimension / 2.0
     return bendCompensation
 
-def smCreateBaseShape(type, thickness, radius, width, length, height, flangeWidth, fillGaps, origin):
+def _smBuildBaseShape(type, thickness, radius, width, length, height, flangeWidth, fillGaps, origin):
     bendCompensation = thickness + radius
     height -= bendCompensation
     compx = 0
@@ -114,6 +115,137 @@ def smCreateBaseShape(type, thickness, radius, width, length, height, flangeWidt
     return shape
 
 
+
+class SMBaseShapeCache:
+    ''' Cache of base shapes, keyed by all the template parameters.
+        Recently used shapes are kept in memory (least recently used ones are
+        dropped first). Optionally, shapes are also stored as BREP files on disk,
+        so identical templates are not rebuilt in later sessions either. Disk
+        entries are keyed by the source of the modules building the shapes as
+        well, and the least recently used ones are removed above a size limit.
+        Shapes with element maps are not stored on disk, as BREP files lose them.
+        Shapes are always handed out as copies. '''
+    maxMemoryItems = 64
+    suffix = ".brep"
+
+    def __init__(self, path=None, diskCache=None):
+        self.path = path
+        self.diskCache = diskCache
+        self.sourceDigest = None
+        self.shapes = {}
+        self.hits = 0
+        self.diskHits = 0
+        self.misses = 0
+
+    def cachePath(self):
+        if self.path is None:
+            if hasattr(FreeCAD, "getUserCachePath"):
+                cachePath = FreeCAD.getUserCachePath()
+            else:
+                cachePath = FreeCAD.getUserAppDataDir()
+            self.path = os.path.join(cachePath, "SheetMetal", "BaseShapes")
+        os.makedirs(self.path, exist_ok=True)
+        return self.path
+
+    def isEnabled(self):
+        return SheetMetalTools.params.GetBool("UseBaseShapeCache", True)
+
+    def useDisk(self):
+        if self.diskCache is not None:
+            return self.diskCache
+        return SheetMetalTools.params.GetBool("UseBaseShapeDiskCache", False)
+
+    def maxDiskSize(self):
+        return SheetMetalTools.params.GetInt("BaseShapeCacheSizeMB", 50) * 1024 * 1024
+
+    def makeKey(self, type, thickness, radius, width, length, height, flangeWidth,
+                fillGaps, origin):
+        return (smElementMapVersion, type, round(thickness, 6), round(radius, 6),
+                round(width, 6), round(length, 6), round(height, 6),
+                round(flangeWidth, 6), bool(fillGaps), origin)
+
+    def fileName(self, key):
+        # shapes cached by another version of the code must not be used
+        if self.sourceDigest is None:
+            self.sourceDigest = SheetMetalTools.smSourceDigest(
+                SheetMetalCmd, sys.modules[__name__]
+            )
+        return hashlib.sha1(repr((self.sourceDigest, key)).encode()).hexdigest() + self.suffix
+
+    def remember(self, key, shape):
+        self.shapes.pop(key, None)
+        if len(self.shapes) >= self.maxMemoryItems:
+            del self.shapes[next(iter(self.shapes))]
+        self.shapes[key] = shape
+
+    def readShape(self, key):
+        filePath = os.path.join(self.cachePath(), self.fileName(key))
+        if not os.path.exists(filePath):
+            return None
+        shape = Part.Shape()
+        shape.read(filePath)
+        # the modification time tells which entries were used last
+        os.utime(filePath)
+        return shape
+
+    def writeShape(self, key, shape):
+        SheetMetalTools.smWriteCacheFile(
+            os.path.join(self.cachePath(), self.fileName(key)), shape
+        )
+        SheetMetalTools.smEvictCacheFiles(self.cachePath(), self.suffix, self.maxDiskSize())
+
+    def get(self, key):
+        ''' Returns a copy of the cached shape, or None if not cached '''
+        shape = self.shapes.get(key)
+        if shape is not None:
+            self.hits += 1
+            self.remember(key, shape)
+            return shape.copy()
+        if self.useDisk():
+            try:
+                shape = self.readShape(key)
+            except (OSError, Part.OCCError) as e:
+                SheetMetalTools.SMLogger.log(f"Could not read cached base shape: {e}")
+                shape = None
+            if shape is not None and not shape.isNull():
+                self.diskHits += 1
+                self.remember(key, shape)
+                return shape.copy()
+        self.misses += 1
+        return None
+
+    def put(self, key, shape):
+        self.remember(key, shape.copy())
+        if self.useDisk() and not SheetMetalTools.smHasElementMap(shape):
+            try:
+                self.writeShape(key, shape)
+            except (OSError, Part.OCCError) as e:
+                SheetMetalTools.SMLogger.log(f"Could not store base shape in cache: {e}")
+
+    def clear(self):
+        self.shapes.clear()
+        self.hits = self.diskHits = self.misses = 0
+
+    def stats(self):
+        return {"hits": self.hits, "diskHits": self.diskHits, "misses": self.misses,
+                "items": len(self.shapes)}
+
+
+smBaseShapeCache = SMBaseShapeCache()
+
+
+def smCreateBaseShape(type, thickness, radius, width, length, height, flangeWidth, fillGaps, origin):
+    args = (type, thickness, radius, width, length, height, flangeWidth, fillGaps, origin)
+    if not smBaseShapeCache.isEnabled():
+        return _smBuildBaseShape(*args)
+    key = smBaseShapeCache.makeKey(*args)
+    shape = smBaseShapeCache.get(key)
+    if shape is None:
+        shape = _smBuildBaseShape(*args)
+        smBaseShapeCache.put(key, shape)
+    return shape
+
+
 class SMBaseShape:
     def __init__(self, obj):
         '''"Add a base sheetmetal shape" '''
@@ -83,38 +83,9 @@ def GetSMComparisonFace (smObj, smSelItemName): # Calculations for Angle and Off
                     faces_with_edge.append(face)
         return faces_with_edge
 
-    def facesConnectedToFace(obj, smThkFace):
-        """
-        Finds all faces in the given object that are connected to the given face.
-        
-        Parameters:
-            obj: The FreeCAD object to analyze.
-            smThkFace: The specific face to find connected faces to.
-            
-        Returns:
-            FacesConnectedToface(list)
-        """
-        smFaces = obj.Faces
-        faces_connected_to = []
-
-        for edge1 in smThkFace.Edges:
-            for face in smFaces:
-                # Ensure the face is not the same as the selected face by comparing geometry
-                if face.isSame(smThkFace):
-                    continue
-                
-                # Check if the face shares the same edge
-                for edge2 in face.Edges:
-                    if edge1.isSame(edge2):
-                        if face not in faces_connected_to:
-                            faces_connected_to.append(face)
-                        break  # Stop checking other edges of this face since it's already added
-
-        return faces_connected_to
-
     # Get relevant faces on the object:
     if type(smSelItem) == Part.Face: # Use a face as reference since it's was possible on past version
-        faces = facesConnectedToFace(smObj, smSelItem)
+        faces = SheetMetalTools.smFacesConnectedToFace(smObj, smSelItem)
         thkFace = smSelItem
     else:
         faces = faces_with_edge(smObj, smSelItem)
@@ -490,34 +461,31 @@ def smMakePerforationFace(
         pivotL = extLen - pivotL
         swingL = extLen - swingL
 
-    # Initial perf, near
-    p1 = edge.valueAt(edge.FirstParameter + gap1) + dir.normalize() * pivotL
-    p2 = edge.valueAt(edge.FirstParameter + gap1 + lenIPerf1) + dir.normalize() * pivotL
-    p3 = edge.valueAt(edge.FirstParameter + gap1 + lenIPerf1) + dir.normalize() * swingL
-    p4 = edge.valueAt(edge.FirstParameter + gap1) + dir.normalize() * swingL
-    w = Part.makePolygon([p1, p2, p3, p4, p1])
-    face = Part.Face(w)
-    totalFace = face
-
-    # Initial perf, far
-    p1 = edge.valueAt(edge.LastParameter - gap2 - lenIPerf2) + dir.normalize() * pivotL
-    p2 = edge.valueAt(edge.LastParameter - gap2) + dir.normalize() * pivotL
-    p3 = edge.valueAt(edge.LastParameter - gap2) + dir.normalize() * swingL
-    p4 = edge.valueAt(edge.LastParameter - gap2 - lenIPerf2) + dir.normalize() * swingL
-    w = Part.makePolygon([p1, p2, p3, p4, p1])
-    face = Part.Face(w)
-    totalFace = totalFace.fuse(face)
-
-    # Perforations, inner
+    # Parameter ranges along the edge of all perforations: initial near,
+    # initial far and the inner ones
+    ranges = [
+        (edge.FirstParameter + gap1, edge.FirstParameter + gap1 + lenIPerf1),
+        (edge.LastParameter - gap2 - lenIPerf2, edge.LastParameter - gap2),
+    ]
+    start = edge.FirstParameter + gap1 + lenIPerf1
     for i in range(P):
-        x = (edge.FirstParameter + gap1 + lenIPerf1) + (Ln * F * (i+1)) + (Lp * F * i)
-        p1 = edge.valueAt(x) + dir.normalize() * pivotL
-        p2 = edge.valueAt(x + Lp*F) + dir.normalize() * pivotL
-        p3 = edge.valueAt(x + Lp*F) + dir.normalize() * swingL
-        p4 = edge.valueAt(x) + dir.normalize() * swingL
-        w = Part.makePolygon([p1, p2, p3, p4, p1])
-        face = Part.Face(w)
-        totalFace = totalFace.fuse(face)
+        x = start + (Ln * F * (i+1)) + (Lp * F * i)
+        ranges.append((x, x + Lp*F))
+
+    dirN = dir.normalize()
+    pivotOffset = dirN * pivotL
+    swingOffset = dirN * swingL
+    faces = []
+    for x1, x2 in ranges:
+        v1 = edge.valueAt(x1)
+        v2 = edge.valueAt(x2)
+        p1 = v1 + pivotOffset
+        w = Part.makePolygon([p1, v2 + pivotOffset, v2 + swingOffset,
+                              v1 + swingOffset, p1])
+        faces.append(Part.Face(w))
+
+    # The perforations never overlap, so there is no need to fuse them
+    totalFace = Part.makeCompound(faces)
 
     if hasattr(totalFace, "mapShapes"):
         totalFace.mapShapes([(edge, totalFace)], None, op)
@@ -766,6 +734,32 @@ def check_parallel(edge1, edge2):
 def sheet_thk(MainObject, selFaceName):
     selItem = MainObject.getElement(SheetMetalTools.getElementFromTNP(selFaceName))
     selFace = SheetMetalTools.smGetFaceByEdge(selItem, MainObject)
+    # the direction across the sheet comes from the edges of the side face
+    thk, thkDir = _side_face_thk(selItem, selFace)
+    # the thickness itself is measured by the shared thickness service, under
+    # the sheet face next to the selected edge or side face
+    sheetFace = _sheet_face(MainObject, selItem, selFace)
+    if sheetFace is not None:
+        info = SheetMetalTools.smGetThicknessInfo(MainObject, sheetFace)
+        if info.confidence >= 0.5:
+            thk = info.thickness
+    return thk, thkDir
+
+def _sheet_face(MainObject, selItem, selFace):
+    # the largest face bordering the side face is one of the sheet faces
+    if type(selItem) == Part.Edge:
+        edges = [selItem]
+    else:
+        edges = selFace.Edges
+    faces = [
+        face for edge in edges for face in MainObject.ancestorsOfType(edge, Part.Face)
+        if not face.isSame(selFace)
+    ]
+    if not faces:
+        return None
+    return max(faces, key=lambda face: face.Area)
+
+def _side_face_thk(selItem, selFace):
     # find the narrow edge
     thk = 999999.0
     thkDir = None
@@ -1027,9 +1021,23 @@ def smMiter(
             tranedgelist.append(edge_len)
             # Part.show(edge_len,'edge_len')
 
+        # broad phase: only walls with overlapping envelopes can touch. The
+        # envelope of a wall covers both sides of the wall extended by
+        # maxExtendGap, so no pair getGap() could match gets dropped
+        envelopes = []
+        for extface, exttranface in zip(extfacelist, exttranfacelist):
+            envelope = extface.BoundBox
+            envelope.add(exttranface.BoundBox)
+            envelopes.append(envelope)
+        candidates = SheetMetalTools.smBoxOverlapPairs(
+            envelopes, maxExtendGap + mingap + smEpsilon
+        )
+
         # check faces intersect each other
         for i, face in enumerate(facelist):
             for j, lenedge in enumerate(lenedgelist):
+                if i != j and (min(i, j), max(i, j)) not in candidates:
+                    continue
                 if (
                     i != j
                     and face.isCoplanar(facelist[j])
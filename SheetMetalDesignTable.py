@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+###################################################################################
+#
+#  SheetMetalDesignTable.py
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+###################################################################################
+
+# Build a family of part variants from a design table.
+#
+# The design table is a CSV file or a FreeCAD spreadsheet. The first row holds
+# the column names, every following row is one variant. Columns are named
+# "Object.Property", where Object is the name or label of an object in the
+# template document (for spreadsheets, Property is a cell or alias name).
+# An optional "Name" column gives the variant names.
+#
+# For every row the values are applied to the template, the document is
+# recomputed and the flat patterns of all SMUnfold objects are exported to one
+# DXF file. A metrics record is returned for each row, and all records are
+# written to a CSV summary in the output folder.
+#
+# Rows are split in chunks and built by headless FreeCADCmd worker processes.
+# Each worker opens the template once and keeps it (along with the parsed
+# material definition sheets and the thickness cache) for all rows of its chunk.
+#
+# Usage (from the FreeCAD python console or a macro):
+#   import SheetMetalDesignTable
+#   SheetMetalDesignTable.smGenerateVariants("box.FCStd", "box.csv", "out")
+
+import csv
+import json
+import math
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import FreeCAD
+import importDXF
+import SheetMetalParallel
+import SheetMetalTools
+import SheetMetalUnfoldCmd
+from SheetMetalTools import SMLogger
+
+# rows handed to a worker at once: large enough to amortise the start up of a
+# FreeCADCmd process, small enough to balance the load between the workers
+smRowsPerChunk = 16
+
+smMetricsFields = [
+    "row", "name", "status", "error", "dxf", "flatLength", "flatWidth",
+    "flatHeight", "volume", "blankArea", "buildTime",
+]
+
+_smTemplateDocs = {}
+# template values of the columns set by the rows, per template document
+_smTemplateValues = {}
+
+
+def smReadDesignTable(table):
+    """Return (columns, rows) of a design table: the column names and a list of
+    {column: value} dicts. table is a CSV file name or a spreadsheet object"""
+    if isinstance(table, str):
+        with open(table, newline="") as f:
+            reader = csv.reader(f)
+            lines = [line for line in reader if any(cell.strip() for cell in line)]
+        if not lines:
+            return [], []
+        columns = [c.strip() for c in lines[0]]
+        rows = [dict(zip(columns, (cell.strip() for cell in line))) for line in lines[1:]]
+        return columns, rows
+    return _smReadSpreadsheet(table)
+
+
+def _smColumnName(index):
+    name = ""
+    index += 1
+    while index > 0:
+        index, rem = divmod(index - 1, 26)
+        name = chr(ord("A") + rem) + name
+    return name
+
+
+def _smReadSpreadsheet(sheet):
+    columns = []
+    while sheet.getContents(_smColumnName(len(columns)) + "1"):
+        columns.append(str(sheet.get(_smColumnName(len(columns)) + "1")).strip())
+    rows = []
+    rowNum = 2
+    while sheet.getContents("A" + str(rowNum)):
+        row = {}
+        for i, column in enumerate(columns):
+            cell = _smColumnName(i) + str(rowNum)
+            row[column] = str(sheet.get(cell)) if sheet.getContents(cell) else ""
+        rows.append(row)
+        rowNum += 1
+    return columns, rows
+
+
+def _smIsNumber(value):
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _smDesignTarget(doc, column):
+    objName, _sep, propName = column.partition(".")
+    obj = doc.getObject(objName)
+    if obj is None:
+        objs = doc.getObjectsByLabel(objName)
+        obj = objs[0] if objs else None
+    if obj is None or not propName:
+        raise ValueError(f"Design table column '{column}' does not match any object")
+    if not obj.isDerivedFrom("Spreadsheet::Sheet") and propName not in obj.PropertiesList:
+        raise ValueError(f"Object '{obj.Label}' has no property '{propName}'")
+    return obj, propName
+
+
+def smGetDesignValue(doc, column):
+    """Current value of the 'Object.Property' of column, as accepted by
+    smRestoreDesignValue. Spreadsheet cells give their contents (formulas)"""
+    obj, propName = _smDesignTarget(doc, column)
+    if obj.isDerivedFrom("Spreadsheet::Sheet"):
+        return obj.getContents(propName)
+    return getattr(obj, propName)
+
+
+def smRestoreDesignValue(doc, column, value):
+    """Set back a value returned by smGetDesignValue. Returns the modified object"""
+    obj, propName = _smDesignTarget(doc, column)
+    if obj.isDerivedFrom("Spreadsheet::Sheet"):
+        obj.set(propName, value)
+    else:
+        setattr(obj, propName, value)
+    return obj
+
+
+def smSetDesignValue(doc, column, value):
+    """Apply a design table value to the 'Object.Property' of column.
+    Returns the modified object"""
+    obj, propName = _smDesignTarget(doc, column)
+    if obj.isDerivedFrom("Spreadsheet::Sheet"):
+        obj.set(propName, str(value))
+        return obj
+    current = getattr(obj, propName)
+    if isinstance(current, bool):
+        value = str(value).strip().lower() in ("1", "true", "yes", "on")
+    elif isinstance(current, int):
+        value = int(float(value))
+    elif isinstance(current, float):
+        value = float(value)
+    elif isinstance(current, FreeCAD.Units.Quantity) and not _smIsNumber(value):
+        value = FreeCAD.Units.Quantity(str(value))
+    elif isinstance(current, FreeCAD.Units.Quantity):
+        value = float(value)
+    setattr(obj, propName, value)
+    return obj
+
+
+def _smUnfoldObjects(doc):
+    return [
+        obj for obj in doc.Objects
+        if isinstance(getattr(obj, "Proxy", None), SheetMetalUnfoldCmd.SMUnfold)
+    ]
+
+
+def _smSafeName(name):
+    return re.sub(r"[^A-Za-z0-9_.\-]+", "_", name) or "variant"
+
+
+def _smOpenTemplate(templatePath):
+    doc = _smTemplateDocs.get(templatePath)
+    if doc is None:
+        doc = FreeCAD.openDocument(templatePath)
+        _smTemplateDocs[templatePath] = doc
+        # parsed material sheets can be reused by all rows using this template
+        SheetMetalUnfoldCmd.smUseMaterialTableCache(True)
+    FreeCAD.setActiveDocument(doc.Name)
+    return doc
+
+
+def _smResetTemplate(templatePath, doc):
+    """Set back the template values changed by the previous rows, so a row
+    gives the same result whichever rows were built before it in this document"""
+    saved = _smTemplateValues.setdefault(templatePath, {})
+    for column, value in saved.items():
+        obj = smRestoreDesignValue(doc, column, value)
+        if obj.isDerivedFrom("Spreadsheet::Sheet"):
+            SheetMetalUnfoldCmd.smUseMaterialTableCache(True)
+    return saved
+
+
+def _smCloseTemplates():
+    for doc in _smTemplateDocs.values():
+        FreeCAD.closeDocument(doc.Name)
+    _smTemplateDocs.clear()
+    _smTemplateValues.clear()
+    SheetMetalUnfoldCmd.smUseMaterialTableCache(False)
+
+
+def smBuildVariant(templatePath, index, values, outputDir):
+    """Build one variant in the running FreeCAD and return its metrics record.
+    Blank cells keep the value of the template"""
+    name = values.get("Name") or f"row{index + 1}"
+    record = dict.fromkeys(smMetricsFields, "")
+    record.update(row=index + 1, name=name, status="ok")
+    start = time.perf_counter()
+    try:
+        doc = _smOpenTemplate(templatePath)
+        saved = _smResetTemplate(templatePath, doc)
+        for column, value in values.items():
+            if column == "Name" or value == "":
+                continue
+            if column not in saved:
+                saved[column] = smGetDesignValue(doc, column)
+            obj = smSetDesignValue(doc, column, value)
+            if obj.isDerivedFrom("Spreadsheet::Sheet"):
+                # the row may change a material definition sheet
+                SheetMetalUnfoldCmd.smUseMaterialTableCache(True)
+        unfolds = _smUnfoldObjects(doc)
+        if not unfolds:
+            raise ValueError("Template has no unfold object")
+        for unfold in unfolds:
+            unfold.GenerateSketch = True
+            unfold.ManualRecompute = False
+            unfold.touch()
+        doc.recompute()
+        failed = [obj.Label for obj in doc.Objects if not obj.isValid()]
+        if failed:
+            raise ValueError("Recompute failed: " + ", ".join(failed))
+
+        sketches = []
+        for unfold in unfolds:
+            sketches += [doc.getObject(n) for n in unfold.UnfoldSketches if doc.getObject(n)]
+        dxfFile = os.path.join(outputDir, f"{index + 1:04d}-{_smSafeName(name)}.dxf")
+        importDXF.export(sketches, dxfFile)
+        record["dxf"] = dxfFile
+
+        shape = unfolds[0].Shape
+        dims = sorted(
+            (shape.BoundBox.XLength, shape.BoundBox.YLength, shape.BoundBox.ZLength),
+            reverse=True,
+        )
+        record.update(
+            flatLength=round(dims[0], 6),
+            flatWidth=round(dims[1], 6),
+            flatHeight=round(dims[2], 6),
+            volume=round(shape.Volume, 6),
+            blankArea=round(shape.Volume / dims[2], 6) if dims[2] > 0 else 0.0,
+        )
+    except Exception as e:
+        record.update(status="failed", error=str(e))
+    record["buildTime"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def smBuildVariants(templatePath, rows, outputDir):
+    """Build a list of (index, values) rows serially, in the running FreeCAD"""
+    try:
+        return [smBuildVariant(templatePath, index, values, outputDir)
+                for index, values in rows]
+    finally:
+        _smCloseTemplates()
+
+
+def smRunWorker(jobFile):
+    """Entry point of the FreeCADCmd worker processes"""
+    with open(jobFile) as f:
+        job = json.load(f)
+    records = smBuildVariants(job["template"], job["rows"], job["outputDir"])
+    with open(job["resultFile"], "w") as f:
+        json.dump(records, f)
+
+
+def _smRunChunk(freecadCmd, templatePath, chunk, outputDir, workDir, chunkIdx):
+    jobFile = os.path.join(workDir, f"job{chunkIdx}.json")
+    resultFile = os.path.join(workDir, f"result{chunkIdx}.json")
+    with open(jobFile, "w") as f:
+        json.dump({"template": templatePath, "rows": chunk, "outputDir": outputDir,
+                   "resultFile": resultFile}, f)
+    moduleDir = os.path.dirname(os.path.abspath(__file__))
+    code = (f"import sys; sys.path.insert(0, {moduleDir!r}); "
+            f"import SheetMetalDesignTable; SheetMetalDesignTable.smRunWorker({jobFile!r})")
+    proc = subprocess.run([freecadCmd, "-c", code], capture_output=True, text=True)
+    try:
+        with open(resultFile) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        error = (proc.stderr or proc.stdout or "worker failed").strip().splitlines()
+        error = error[-1] if error else "worker failed"
+        records = []
+        for index, values in chunk:
+            record = dict.fromkeys(smMetricsFields, "")
+            record.update(row=index + 1, name=values.get("Name") or f"row{index + 1}",
+                          status="failed", error=error)
+            records.append(record)
+        return records
+
+
+def smWriteMetrics(records, fileName):
+    with open(fileName, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=smMetricsFields)
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def smGenerateVariants(templatePath, table, outputDir, maxWorkers=None):
+    """Build and unfold all variants of a design table. templatePath is a
+    saved FreeCAD document containing the SheetMetal features, table a CSV file
+    name or a spreadsheet object. Returns the metrics records, one per row"""
+    templatePath = os.path.abspath(templatePath)
+    outputDir = os.path.abspath(outputDir)
+    os.makedirs(outputDir, exist_ok=True)
+    _columns, rows = smReadDesignTable(table)
+    rows = list(enumerate(rows))
+    if maxWorkers is None:
+        maxWorkers = SheetMetalParallel.smMaxWorkers()
+    freecadCmd = SheetMetalParallel.smFreeCADCmdPath()
+
+    workDir = tempfile.mkdtemp(prefix="smvariants")
+    try:
+        if maxWorkers <= 1 or len(rows) < 2 or freecadCmd is None:
+            if freecadCmd is None and maxWorkers > 1:
+                SMLogger.log("FreeCADCmd not found, building variants in this process")
+            # work on a copy, the template may be open in this session
+            templateCopy = os.path.join(workDir, os.path.basename(templatePath))
+            shutil.copyfile(templatePath, templateCopy)
+            records = smBuildVariants(templateCopy, rows, outputDir)
+        else:
+            chunkSize = max(1, min(smRowsPerChunk, math.ceil(len(rows) / maxWorkers)))
+            chunks = [rows[i:i + chunkSize] for i in range(0, len(rows), chunkSize)]
+            with ThreadPoolExecutor(min(maxWorkers, len(chunks))) as pool:
+                results = pool.map(
+                    lambda args: _smRunChunk(freecadCmd, templatePath, args[1],
+                                             outputDir, workDir, args[0]),
+                    enumerate(chunks),
+                )
+                records = [record for chunkRecords in results for record in chunkRecords]
+    finally:
+        shutil.rmtree(workDir, ignore_errors=True)
+
+    smWriteMetrics(records, os.path.join(outputDir, "metrics.csv"))
+    failed = [r for r in records if r["status"] != "ok"]
+    if failed:
+        SMLogger.warning(f"{len(failed)} of {len(records)} variants failed, "
+                         f"see {os.path.join(outputDir, 'metrics.csv')}")
+    return records
+
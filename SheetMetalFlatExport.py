@@ -0,0 +1,446 @@
+# -*- coding: utf-8 -*-
+###################################################################################
+#
+#  SheetMetalFlatExport.py
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+###################################################################################
+
+# Export the flat patterns of all sheet metal parts of a document or assembly.
+#
+# Sheet metal parts are PartDesign bodies built with SheetMetal features and
+# free standing SheetMetal features that are not the base of another one. They
+# are collected from the given objects, going into App::Part containers,
+# groups and App::Link objects (link arrays count once per element). A part
+# that is the target of links is counted through its links only, as the link
+# source is usually hidden.
+#
+# Identical parts (see SheetMetalTools.smShapeFingerprint) are unfolded once,
+# the unique parts are unfolded in parallel worker processes. The unfold
+# reference face and the K-factors are taken from an existing unfold object of
+# the part, the largest planar face and K = 0.4 (ansi) are used otherwise.
+#
+# One DXF file is written per unique part, and a CSV summary with quantities,
+# blank sizes, thickness, material and unfold times.
+#
+# Usage (from the FreeCAD python console or a macro):
+#   import SheetMetalFlatExport
+#   SheetMetalFlatExport.smExportFlatPatterns(App.ActiveDocument, "out")
+
+import csv
+import os
+import re
+import time
+
+import FreeCAD
+import Part
+import importDXF
+import SheetMetalParallel
+import SheetMetalTools
+import SheetMetalUnfoldCmd
+import SheetMetalUnfolder
+from SheetMetalTools import SMLogger
+
+if SheetMetalUnfoldCmd.NewUnfolderAvailable:
+    import SheetMetalNewUnfolder
+
+translate = FreeCAD.Qt.translate
+
+# modules of the features producing a folded sheet metal solid
+smFeatureModules = {
+    "SheetMetalCmd",
+    "SheetMetalBaseCmd",
+    "SheetMetalFoldCmd",
+    "SheetMetalBend",
+    "SheetMetalJunction",
+    "SheetMetalRelief",
+    "SheetMetalCornerReliefCmd",
+    "SheetMetalExtendCmd",
+    "ExtrudedCutout",
+    "SketchOnSheetMetalCmd",
+    "SheetMetalFormingCmd",
+    "SheetMetalBaseShapeCmd",
+}
+
+smSummaryFields = [
+    "part", "quantity", "instances", "dxf", "blankLength", "blankWidth",
+    "thickness", "material", "engine", "unfoldTime", "status", "error",
+]
+
+smSummaryFileName = "flat_patterns.csv"
+
+
+class SMFlatPart:
+    ''' A sheet metal part to be exported, and the number of its instances '''
+    def __init__(self, obj, feature):
+        self.obj = obj          # the counted object: a body or a free feature
+        self.feature = feature  # the feature holding the folded shape
+        self.direct = 0
+        self.linked = 0
+
+    @property
+    def quantity(self):
+        return self.linked if self.linked > 0 else self.direct
+
+
+def smIsSheetMetalFeature(obj):
+    proxy = getattr(obj, "Proxy", None)
+    return proxy is not None and type(proxy).__module__ in smFeatureModules
+
+
+def _smIsUnfold(obj):
+    return isinstance(getattr(obj, "Proxy", None), SheetMetalUnfoldCmd.SMUnfold)
+
+
+def smGetFlatPartFeature(obj):
+    ''' The feature holding the folded shape if obj is a sheet metal part, else None '''
+    if obj.TypeId == "PartDesign::Body":
+        if not any(smIsSheetMetalFeature(feature) for feature in obj.Group):
+            return None
+        tip = obj.Tip
+        # an unfold may have been added at the end of the body
+        while tip is not None and _smIsUnfold(tip):
+            tip = tip.baseObject[0]
+        return tip
+    if not smIsSheetMetalFeature(obj) or SheetMetalTools.smIsPartDesign(obj):
+        return None
+    # features used as base by another feature are intermediate steps
+    if any(smIsSheetMetalFeature(user) for user in obj.InList):
+        return None
+    return obj
+
+
+def _smCollect(obj, count, linked, parts):
+    if obj.TypeId == "App::LinkElement":
+        return  # counted by their link array
+    if obj.isDerivedFrom("App::Link"):
+        target = obj.getLinkedObject(True)
+        if target is not None and target is not obj:
+            elements = max(1, getattr(obj, "ElementCount", 0))
+            _smCollect(target, count * elements, True, parts)
+        return
+    feature = smGetFlatPartFeature(obj)
+    if feature is not None:
+        key = (obj.Document.Name, obj.Name)
+        if key not in parts:
+            parts[key] = SMFlatPart(obj, feature)
+        if linked:
+            parts[key].linked += count
+        else:
+            parts[key].direct += count
+        return
+    if obj.TypeId != "PartDesign::Body" and hasattr(obj, "Group"):
+        for child in obj.Group:
+            _smCollect(child, count, linked, parts)
+
+
+def smCollectFlatParts(objects):
+    ''' Sheet metal parts of a document or of a list of objects, as a list of
+        SMFlatPart. For a document, all objects outside of groups are searched '''
+    if isinstance(objects, FreeCAD.Document):
+        objects = [
+            obj for obj in objects.Objects
+            if obj.getParentGroup() is None and obj.getParentGeoFeatureGroup() is None
+        ]
+    parts = {}
+    for obj in objects:
+        _smCollect(obj, 1, False, parts)
+    return [part for part in parts.values() if part.quantity > 0]
+
+
+def _smFindUnfold(part):
+    for obj in part.feature.InList:
+        if _smIsUnfold(obj) and obj.baseObject[0] in (part.feature, part.obj):
+            return obj
+    return None
+
+
+def _smLargestPlanarFace(shape):
+    planarFaces = [
+        (face.Area, i) for i, face in enumerate(shape.Faces)
+        if face.Surface.TypeId == "Part::GeomPlane"
+    ]
+    if not planarFaces:
+        raise ValueError("Part has no planar face to unfold from")
+    return f"Face{max(planarFaces)[1] + 1}"
+
+
+class _SMUnfoldSettings:
+    ''' Reference face, K-factors and material name used to unfold a part '''
+    def __init__(self, part, shape):
+        unfold = _smFindUnfold(part)
+        self.kFactorTable = {1: SheetMetalUnfoldCmd.KFACTOR}
+        self.kFactorStandard = "ansi"
+        self.bac = None
+        self.material = ""
+        if unfold is None:
+            self.baseFace = _smLargestPlanarFace(shape)
+            if SheetMetalUnfoldCmd.NewUnfolderAvailable:
+                self.bac = SheetMetalNewUnfolder.BendAllowanceCalculator.from_single_value(
+                    SheetMetalUnfoldCmd.KFACTOR, "ansi"
+                )
+            return
+        _baseObj, self.baseFace = SheetMetalTools.smGetSubElementName(unfold.baseObject[1][0])
+        self.kFactorStandard = unfold.KFactorStandard
+        # material sheets are looked up in the active document
+        FreeCAD.setActiveDocument(unfold.Document.Name)
+        self.kFactorTable = unfold.Proxy.getKFactorTable(unfold)
+        if SheetMetalUnfoldCmd.NewUnfolderAvailable:
+            self.bac = unfold.Proxy.getBendAllowanceCalculator(unfold)
+        sheet = unfold.Document.getObject(unfold.MaterialSheet)
+        if sheet is not None:
+            self.material = sheet.Label
+        else:
+            self.material = f"K={unfold.KFactor:g} ({unfold.KFactorStandard})"
+
+
+def _smFlatPatternJob(engine, args):
+    ''' Worker job unfolding one part. Errors are returned, not raised, so the
+        other jobs of the pool are not lost. Crashed workers give the same
+        "failed" result, see _smCrashedJob '''
+    startTime = time.perf_counter()
+    try:
+        if engine == "V1":
+            result = SheetMetalUnfoldCmd.smUnfoldV1Job(*args)
+        else:
+            result = SheetMetalUnfoldCmd.smUnfoldV2Job(*args)
+        return "ok", result, time.perf_counter() - startTime
+    except Exception as e:
+        return "failed", str(e) or type(e).__name__, time.perf_counter() - startTime
+
+
+def _smJobArgs(engine, brep, settings, part):
+    refine = getattr(part.feature, "Refine", None)
+    if engine == "V1":
+        return (brep, settings.baseFace, settings.kFactorTable, settings.kFactorStandard,
+                part.feature.Name, part.feature.Label, refine)
+    return (brep, settings.baseFace, settings.bac, part.feature.Name, part.feature.Label,
+            refine)
+
+
+def _smCrashedJob(message):
+    return "failed", message, 0.0
+
+
+def _smMakeLayers(engine, result):
+    ''' Solver free sketch objects of the flat pattern in the active document '''
+    if engine == "V1":
+        shape, foldComp, norm = result
+        return SheetMetalUnfolder.getUnfoldSketches(
+            SheetMetalParallel.shapeFromBrep(shape),
+            SheetMetalParallel.shapeFromBrep(foldComp).Edges,
+            FreeCAD.Vector(*norm),
+            [],
+            True,
+            SheetMetalUnfoldCmd.GENSKETCHCOLOR,
+            bendSketchColor=SheetMetalUnfoldCmd.OUTLINESKETCHCOLOR,
+            internalSketchColor=SheetMetalUnfoldCmd.BENDLINESKETCHCOLOR,
+            asShapes=True,
+        )
+    selFace, unfoldedShape, bendLines, rootNormal = result
+    return SheetMetalNewUnfolder.getUnfoldSketches(
+        SheetMetalParallel.shapeFromBrep(selFace).Faces[0],
+        SheetMetalParallel.shapeFromBrep(unfoldedShape),
+        SheetMetalParallel.shapeFromBrep(bendLines),
+        FreeCAD.Vector(*rootNormal),
+        [],
+        True,
+        SheetMetalUnfoldCmd.GENSKETCHCOLOR,
+        SheetMetalUnfoldCmd.OUTLINESKETCHCOLOR,
+        SheetMetalUnfoldCmd.BENDLINESKETCHCOLOR,
+        as_shapes=True,
+    )
+
+
+def _smSafeName(name):
+    return re.sub(r"[^A-Za-z0-9_.\-]+", "_", name) or "part"
+
+
+def smWriteSummary(records, fileName):
+    with open(fileName, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=smSummaryFields)
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def smExportFlatPatterns(objects, outputDir, maxWorkers=None):
+    ''' Export one DXF flat pattern per unique sheet metal part of objects (a
+        document or a list of objects) to outputDir, along with a CSV summary.
+        Returns the summary records, one per unique part '''
+    startTime = time.perf_counter()
+    outputDir = os.path.abspath(outputDir)
+    os.makedirs(outputDir, exist_ok=True)
+    parts = smCollectFlatParts(objects)
+    groups = SheetMetalTools.smGroupByFingerprint(
+        parts, lambda part: Part.getShape(part.feature)
+    )
+    preferred = "V1"
+    if SheetMetalUnfoldCmd.NewUnfolderAvailable and not SheetMetalTools.use_old_unfolder():
+        preferred = "V2"
+
+    activeDoc = FreeCAD.ActiveDocument
+    records = []
+    jobs = []  # (record, part, shape, settings, brep)
+    try:
+        for index, (_fingerprint, group) in enumerate(groups):
+            part = group[0]
+            record = dict.fromkeys(smSummaryFields, "")
+            record.update(
+                part=part.obj.Label,
+                quantity=sum(p.quantity for p in group),
+                instances=" ".join(p.obj.Label for p in group),
+                dxf=os.path.join(outputDir, f"{index + 1:03d}-{_smSafeName(part.obj.Label)}.dxf"),
+                engine=preferred,
+                status="ok",
+            )
+            records.append(record)
+            try:
+                shape = Part.getShape(part.feature)
+                settings = _SMUnfoldSettings(part, shape)
+                record["material"] = settings.material
+                jobs.append((record, part, settings, SheetMetalParallel.shapeToBrep(shape)))
+            except Exception as e:
+                record.update(dxf="", status="failed", error=str(e))
+                continue
+            # the part may still unfold if its thickness can't be measured
+            try:
+                record["thickness"] = round(
+                    SheetMetalTools.smGetThicknessInfo(
+                        shape, shape.getElement(settings.baseFace)
+                    ).thickness,
+                    6,
+                )
+            except Exception as e:
+                SMLogger.warning(
+                    translate("Logger", "Thickness of {} not found: {}").format(
+                        part.obj.Label, e
+                    )
+                )
+
+        results = SheetMetalParallel.smRunJobs(
+            _smFlatPatternJob,
+            [(preferred, _smJobArgs(preferred, brep, settings, part))
+             for _record, part, settings, brep in jobs],
+            maxWorkers,
+            _smCrashedJob,
+        )
+        # parts the V2 unfolder can't handle get a second chance with V1
+        retry = [i for i, (status, _r, _t) in enumerate(results) if status != "ok"]
+        if preferred == "V2" and retry:
+            retryResults = SheetMetalParallel.smRunJobs(
+                _smFlatPatternJob,
+                [("V1", _smJobArgs("V1", jobs[i][3], jobs[i][2], jobs[i][1])) for i in retry],
+                maxWorkers,
+                _smCrashedJob,
+            )
+            for i, (status, result, seconds) in zip(retry, retryResults):
+                if status == "ok":
+                    jobs[i][0]["engine"] = "V1"
+                    results[i] = (status, result, seconds + results[i][2])
+
+        tempDoc = FreeCAD.newDocument("SMFlatExport", hidden=True, temp=True)
+        try:
+            FreeCAD.setActiveDocument(tempDoc.Name)
+            for (record, _part, _settings, _brep), (status, result, seconds) in zip(
+                jobs, results
+            ):
+                record["unfoldTime"] = round(seconds, 3)
+                if status != "ok":
+                    record.update(dxf="", status="failed", error=result)
+                    continue
+                try:
+                    layers = _smMakeLayers(record["engine"], result)
+                    outline = layers[0].Shape.BoundBox
+                    record["blankLength"] = round(max(outline.XLength, outline.YLength), 6)
+                    record["blankWidth"] = round(min(outline.XLength, outline.YLength), 6)
+                    importDXF.export(layers, record["dxf"])
+                except Exception as e:
+                    record.update(dxf="", status="failed", error=str(e))
+                for obj in tempDoc.Objects:
+                    tempDoc.removeObject(obj.Name)
+        finally:
+            FreeCAD.closeDocument(tempDoc.Name)
+    finally:
+        if activeDoc is not None:
+            FreeCAD.setActiveDocument(activeDoc.Name)
+
+    summaryFile = os.path.join(outputDir, smSummaryFileName)
+    smWriteSummary(records, summaryFile)
+    failed = [r for r in records if r["status"] != "ok"]
+    SMLogger.message(
+        translate("Logger", "{} flat patterns of {} parts exported in {:.2f} s, see {}").format(
+            len(records) - len(failed),
+            sum(r["quantity"] for r in records),
+            time.perf_counter() - startTime,
+            summaryFile,
+        )
+    )
+    if failed:
+        SMLogger.warning(
+            translate("Logger", "Flat pattern export failed for: {}").format(
+                ", ".join(r["part"] for r in failed)
+            )
+        )
+    return records
+
+
+##########################################################################################################
+# Gui code
+##########################################################################################################
+
+if SheetMetalTools.isGuiLoaded():
+    from FreeCAD import Gui
+    from PySide import QtCore, QtGui
+
+    class SMExportFlatPatternsCommandClass:
+        """Export the flat patterns of all sheet metal parts"""
+
+        def GetResources(self):
+            return {
+                "Pixmap": os.path.join(SheetMetalTools.icons_path, "SheetMetal_UnfoldExport.svg"),
+                "MenuText": translate("SheetMetal", "Export Flat Patterns"),
+                "ToolTip": translate(
+                    "SheetMetal",
+                    "Export a DXF flat pattern of every sheet metal part\n"
+                    "of the selected objects (or of the whole document if nothing\n"
+                    "is selected), including linked parts. Identical parts are\n"
+                    "exported once, a CSV summary lists their quantities.",
+                ),
+            }
+
+        def Activated(self):
+            doc = FreeCAD.ActiveDocument
+            objects = Gui.Selection.getSelection() or doc
+            startDir = os.path.dirname(doc.FileName) if doc.FileName else ""
+            outputDir = QtGui.QFileDialog.getExistingDirectory(
+                Gui.getMainWindow(),
+                translate("SheetMetal", "Flat pattern export folder"),
+                startDir,
+            )
+            if not outputDir:
+                return
+            QtGui.QApplication.setOverrideCursor(QtGui.QCursor(QtCore.Qt.WaitCursor))
+            try:
+                smExportFlatPatterns(objects, outputDir)
+            finally:
+                QtGui.QApplication.restoreOverrideCursor()
+
+        def IsActive(self):
+            return FreeCAD.ActiveDocument is not None
+
+    Gui.addCommand("SheetMetal_ExportFlatPatterns", SMExportFlatPatternsCommandClass())
@@ -25,6 +25,7 @@
 
 import FreeCAD
 import Part
+import hashlib
 import math
 import os
 import SheetMetalTools
@@ -83,17 +84,7 @@ def makeforming(tool, base, base_face, thk, tool_faces=None, point=FreeCAD.Vecto
         cutSolid, base_face, tool_faces[0], point, angle)
     base = base.copy()
     try:
-        faces = []
-        for face in tool.Faces:
-            use_tool = True
-            for selface in tool_faces:
-                if face.isSame(selface):
-                    use_tool = False
-                    break
-            if use_tool:
-                faces.append(face)
-        tool_shell = Part.makeShell(faces)
-
+        tool_shell = make_tool_shell(tool, tool_faces)
         offsetshell = tool_shell.makeOffsetShape(
             thk, 0.0, inter=False, self_inter=False, offsetMode=0, join=2, fill=True)
         offsetshell_tran = transform_tool(
@@ -111,6 +102,180 @@ def makeforming(tool, base, base_face, thk, tool_faces=None, point=FreeCAD.Vecto
     return base
 
 
+def make_tool_shell(tool, tool_faces):
+    # create a shell from all faces but the selected ones
+    faces = []
+    for face in tool.Faces:
+        use_tool = True
+        for selface in tool_faces:
+            if face.isSame(selface):
+                use_tool = False
+                break
+        if use_tool:
+            faces.append(face)
+    return Part.makeShell(faces)
+
+
+def make_forming_tool(tool, thk, tool_faces):
+    # offset the tool by the sheet thickness, same as makeforming does
+    try:
+        offsetshell = make_tool_shell(tool, tool_faces).makeOffsetShape(
+            thk, 0.0, inter=False, self_inter=False, offsetMode=0, join=2, fill=True)
+        if offsetshell.isValid():
+            return offsetshell
+    except Exception:
+        pass
+    return tool.makeThickness(tool_faces, thk, 0.0001, False, False, 0, 0)
+
+
+class SMFormingToolCache:
+    ''' Opt-in on disk library of thickened forming tools and cutters.
+        Every entry is a single BREP file holding both shapes, named after a key
+        made of the tool geometry, the selected tool faces and the sheet
+        thickness. Files are written under a unique temporary name and moved in
+        place, so several FreeCAD processes can share the library. The least
+        recently used entries are removed when the library grows over its size
+        limit. Tools carrying element maps are not cached, as the maps are lost
+        in BREP files '''
+    # change when make_forming_tool produces different shapes
+    version = 2
+    suffix = ".brep"
+
+    def __init__(self, path=None):
+        self.path = path
+
+    def libraryPath(self):
+        if self.path is None:
+            path = SheetMetalTools.params.GetString("FormingToolLibrary", "")
+            if not path:
+                if hasattr(FreeCAD, "getUserCachePath"):
+                    cachePath = FreeCAD.getUserCachePath()
+                else:
+                    cachePath = FreeCAD.getUserAppDataDir()
+                path = os.path.join(cachePath, "SheetMetal", "FormingTools")
+            self.path = path
+        os.makedirs(self.path, exist_ok=True)
+        return self.path
+
+    def isEnabled(self):
+        return SheetMetalTools.params.GetBool("UseFormingToolCache", False)
+
+    def maxSize(self):
+        return SheetMetalTools.params.GetInt("FormingToolCacheSizeMB", 100) * 1024 * 1024
+
+    def makeKey(self, tool, thk, tool_faces):
+        # made of the geometry only: the BREP text of equal tools may differ,
+        # e.g. by a triangulation stored along with the shape
+        faceIdxs = sorted(
+            i for i, face in enumerate(tool.Faces)
+            if any(face.isSame(selface) for selface in tool_faces)
+        )
+        data = (
+            self.version,
+            SheetMetalTools.smShapeFingerprint(tool),
+            SheetMetalTools.smShapeKey(tool),
+            faceIdxs,
+            round(thk, 6),
+        )
+        return hashlib.sha1(repr(data).encode()).hexdigest()
+
+    def filePath(self, key):
+        return os.path.join(self.libraryPath(), key + self.suffix)
+
+    def get(self, key):
+        ''' Returns (formTool, cutTool) or None if not in the library '''
+        filePath = self.filePath(key)
+        if not os.path.isfile(filePath):
+            return None
+        try:
+            tools = Part.read(filePath).childShapes()
+            # the modification time tells which entries were used last
+            os.utime(filePath)
+        except Exception:
+            return None  # unreadable, or just removed by another process
+        if len(tools) != 2:
+            return None
+        return tools[0], tools[1]
+
+    def put(self, key, formTool, cutTool):
+        SheetMetalTools.smWriteCacheFile(
+            self.filePath(key), Part.makeCompound([formTool, cutTool])
+        )
+        SheetMetalTools.smEvictCacheFiles(self.libraryPath(), self.suffix, self.maxSize())
+
+    def getTools(self, tool, thk, tool_faces):
+        ''' Returns the thickened forming tool and the cutter for a tool,
+            from the library if available, otherwise they are computed
+            and stored in the library '''
+        if not self.isEnabled() or SheetMetalTools.smHasElementMap(tool):
+            return make_forming_tool(tool, thk, tool_faces), tool.copy()
+        key = self.makeKey(tool, thk, tool_faces)
+        try:
+            tools = self.get(key)
+            if tools is not None:
+                return tools
+        except OSError as e:
+            SMLogger.log(f"Forming tool library not available: {e}")
+            return make_forming_tool(tool, thk, tool_faces), tool.copy()
+        formTool = make_forming_tool(tool, thk, tool_faces)
+        cutTool = tool.copy()
+        try:
+            self.put(key, formTool, cutTool)
+        except (OSError, Part.OCCError) as e:
+            SMLogger.log(f"Could not store forming tool in library: {e}")
+        return formTool, cutTool
+
+
+smFormingToolCache = SMFormingToolCache()
+
+
+def boxes_overlap(shapes):
+    # sweep over the bounding boxes sorted by XMin to find overlapping pairs
+    boxes = sorted((s.BoundBox for s in shapes), key=lambda bb: bb.XMin)
+    active = []
+    for bb in boxes:
+        active = [other for other in active if other.XMax >= bb.XMin]
+        if any(other.intersect(bb) for other in active):
+            return True
+        active.append(bb)
+    return False
+
+
+def makeforming_pattern(tool, base, base_face, thk, tool_faces, points, angle=0.0):
+    # Build the offset tool once, place a copy at every point and combine all
+    # instances with the base in single boolean operations.
+    # Overlapping instances need the sequential path to give the same result.
+    if not points:
+        return base
+    formTool, cutTool = smFormingToolCache.getTools(tool, thk, tool_faces)
+    # transform_tool ends with a translation by 'point', so tools placed at the
+    # origin can simply be translated to each point
+    origin = FreeCAD.Vector(0, 0, 0)
+    cutTool = transform_tool(cutTool, base_face, tool_faces[0], origin, angle)
+    formTool = transform_tool(formTool, base_face, tool_faces[0], origin, angle)
+    formTools = [formTool.translated(point) for point in points]
+    cutTools = [cutTool.translated(point) for point in points]
+    if len(points) == 1:
+        try:
+            return combine_solids(base, cutTools[0], formTools[0])
+        except Part.OCCError:
+            return makeforming(tool, base, base_face, thk, tool_faces, points[0], angle)
+    if not boxes_overlap(formTools):
+        try:
+            formParts = Part.makeCompound(formTools).cut(base)
+            result = base.cut(cutTools)
+            if formParts.Solids:
+                result = result.multiFuse(formParts.Solids)
+            if result.isValid():
+                return result
+        except Part.OCCError:
+            pass
+        SMLogger.log("Forming pattern boolean failed, placing tools one by one")
+    for point in points:
+        base = makeforming(tool, base, base_face, thk, tool_faces, point, angle)
+    return base
+
+
 class SMBendWall:
     def __init__(self, obj, selobj, selobj_items, seltool, seltool_items):
         '''"Add Forming Wall" '''
@@ -202,12 +367,8 @@ class SMBendWall:
             offsetlist.append(FreeCAD.Vector(fp.OffsetX, fp.OffsetY, 0))
 
         if not (fp.SuppressFeature):
-            for offset in offsetlist:
-                a = makeforming(tool, base, base_face, thk,
-                                tool_faces, offset, fp.angle.Value)
-                # Part.show(a)
-                base = a
-                
+            a = makeforming_pattern(tool, base, base_face, thk,
+                                    tool_faces, offsetlist, fp.angle.Value)
         else:
             a = base
         fp.Shape = a
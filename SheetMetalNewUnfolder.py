@@ -25,7 +25,7 @@
 from enum import Enum, auto
 from functools import reduce
 from itertools import combinations
-from math import degrees, log10, pi, radians, sin, tan
+from math import atan2, cos, degrees, hypot, log10, pi, radians, sin, tan
 from operator import mul as multiply_operator
 from statistics import StatisticsError, mode
 
@@ -44,6 +44,12 @@ except ImportError:
         "or reinstalling the SheetMetal workbench using the addon manager\n"
     )
 
+# numpy is optional, the 2D cleanup passes fall back to working on OCC edges
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 # we need to VERY CAREFULLY choose multiple different 'epsilon' values for
 # different types of numerical comparisons
@@ -161,8 +167,28 @@ class EstimateThickness:
             )
         )
 
+    @staticmethod
+    def from_rays(shape: Part.Shape, selected_face: int) -> float:
+        """Cast rays from the selected face into the material, using the shared
+        thickness service. Only trust the result if most of the rays agree."""
+        info = SheetMetalTools.smGetThicknessInfo(shape, shape.Faces[selected_face])
+        return info.thickness if info.method == "ray" and info.confidence >= 0.5 else 0.0
+
     @staticmethod
     def using_best_method(shape: Part.Shape, selected_face: int) -> float:
+        # the shared thickness service (memoised) is used first, the other
+        # estimates are fallbacks for faces the rays can't measure reliably
+        thickness = EstimateThickness.from_rays(shape, selected_face)
+        if not thickness:
+            thickness = SheetMetalTools.smMemoThickness(
+                shape,
+                ("estimate", selected_face),
+                lambda: EstimateThickness._using_fallback_methods(shape, selected_face),
+            )
+        return thickness
+
+    @staticmethod
+    def _using_fallback_methods(shape: Part.Shape, selected_face: int) -> float:
         thickness = EstimateThickness.from_normal_edges(shape, selected_face)
         if not thickness:
             thickness = EstimateThickness.from_face(shape, selected_face)
@@ -507,13 +533,12 @@ class SketchExtraction:
         cleaned_up_edges = edges  # Edge2DCleanup.cleanup_sketch(edges, spline2arc_tol)
         # See if there is an existing sketch with the same name,
         # use it instead of creating a new one.
-        if existing_sketches is None:
-            existing_sketch_name = ""
-        else:
-            existing_sketch_name = next(
-                (item for item in existing_sketches if item.startswith(object_name)), ""
-            )
-        sketch = FreeCAD.ActiveDocument.getObject(existing_sketch_name)
+        sketch = SheetMetalTools.smGetReusableObject(
+            FreeCAD.ActiveDocument,
+            existing_sketches,
+            object_name,
+            "Sketcher::SketchObject",
+        )
         if sketch is not None:
             sketch.deleteAllGeometry()
         else:
@@ -803,6 +828,23 @@ class Edge2DCleanup:
         max_err = Edge2DCleanup.check_err(curve, arc)
         return arc, max_err
 
+    @staticmethod
+    def ellipse_to_arc(edge: Part.Edge) -> Part.Edge:
+        ellipse = edge.Curve
+        if edge.isClosed():
+            radius = (ellipse.MajorRadius + ellipse.MinorRadius) / 2
+            return Part.makeCircle(radius, ellipse.Center, ellipse.Axis)
+        pmin, pmax = edge.ParameterRange
+        return (
+            Part.Arc(
+                edge.firstVertex().Point,
+                edge.valueAt((pmin + pmax) / 2),
+                edge.lastVertex().Point,
+            )
+            .toShape()
+            .Edges[0]
+        )
+
     @staticmethod
     def eliminate_bsplines(
         sketch: list[Part.Edge], tolerance: float
@@ -812,6 +854,13 @@ class Edge2DCleanup:
         for edge in sketch:
             if edge.Curve.TypeId in ["Part::GeomLine", "Part::GeomCircle"]:
                 new_edge_list.append(edge)
+            elif (
+                edge.Curve.TypeId == "Part::GeomEllipse"
+                and edge.Curve.MajorRadius - edge.Curve.MinorRadius < tolerance
+            ):
+                # nearly circular ellipses (i.e. holes flattened from bends)
+                # are replaced by a circle or an arc directly
+                new_edge_list.append(Edge2DCleanup.ellipse_to_arc(edge))
             else:
                 if isinstance(edge.Curve, Part.BSplineCurve):
                     bspline = edge
@@ -989,11 +1038,275 @@ class Edge2DCleanup:
     def clean_and_structure_geometry(edges: list[Part.Edge]) -> list[Part.Wire]:
         """Run all available clean up passes"""
         intermediate_result1 = Edge2DCleanup.eliminate_bsplines(edges, spline2arc_tol)
+        if np is not None and SheetMetalTools.params.GetBool("UseArrayEdgeCleanup", False):
+            # array based alternative to the passes below, opt-in
+            return Primitives2D.from_edges(intermediate_result1).to_wires(fuzz)
         intermediate_result2 = Edge2DCleanup.fix_coincidence(intermediate_result1, fuzz)
         result = Edge2DCleanup.merge_segmented_circles(intermediate_result2)
         return result
 
 
+class Primitives2D:
+    """Array representation of the lines, arcs and circles of a flat pattern
+    in the XY-plane. Endpoint snapping, circle merging, hole detection and
+    bounding box computations are done on the arrays, OCC edges are only
+    built once, by to_wires(). Requires numpy."""
+
+    LINE = 0
+    ARC = 1
+    CIRCLE = 2
+    # flags
+    DROPPED = 1  # tiny edge, collapsed into a single vertex
+
+    def __init__(self, kind, start, end, mid, center, radius, length) -> None:
+        self.kind = kind  # (n,) int8
+        self.start = start  # (n, 2)
+        self.end = end  # (n, 2)
+        self.mid = mid  # (n, 2) a point in the middle of arcs
+        self.center = center  # (n, 2) arcs and circles
+        self.radius = radius  # (n,) arcs and circles
+        self.length = length  # (n,)
+        self.flags = np.zeros(len(kind), dtype=np.int8)
+        self.vertex_ids = None  # (n, 2) vertex index of start and end points
+        self._loops = None
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    @classmethod
+    def from_edges(cls, edges: list[Part.Edge]):
+        """Read lines and circular edges. Other curve types must have been
+        converted before (see Edge2DCleanup.eliminate_bsplines)."""
+        n = len(edges)
+        kind = np.zeros(n, dtype=np.int8)
+        points = np.zeros((n, 4, 2))  # start, end, mid, center
+        radius = np.zeros(n)
+        length = np.zeros(n)
+        for i, e in enumerate(edges):
+            p1 = e.firstVertex().Point
+            p2 = e.lastVertex().Point
+            length[i] = e.Length
+            type_id = e.Curve.TypeId
+            if type_id == "Part::GeomLine":
+                points[i, :2] = (p1.x, p1.y), (p2.x, p2.y)
+                continue
+            if type_id != "Part::GeomCircle":
+                errmsg = f"Can't process edge with curve type = {type_id}"
+                raise RuntimeError(errmsg)
+            pmin, pmax = e.ParameterRange
+            pm = e.valueAt((pmin + pmax) / 2)
+            center = e.Curve.Center
+            kind[i] = cls.CIRCLE if e.isClosed() else cls.ARC
+            points[i] = (p1.x, p1.y), (p2.x, p2.y), (pm.x, pm.y), (center.x, center.y)
+            radius[i] = e.Curve.Radius
+        return cls(
+            kind,
+            points[:, 0].copy(),
+            points[:, 1].copy(),
+            points[:, 2].copy(),
+            points[:, 3].copy(),
+            radius,
+            length,
+        )
+
+    @staticmethod
+    def _cluster_points(points, tolerance: float):
+        """Cluster id of every point, and the seed point of every cluster.
+        Each point joins the cluster with the nearest seed closer than
+        'tolerance', or becomes the seed of a new cluster. The clustering is
+        not transitive: every point stays within 'tolerance' of its seed, so
+        chains of close points don't merge into one drifting cluster. Seeds
+        are binned in a grid of 'tolerance' sized cells, only seeds of the
+        neighbouring cells are compared."""
+        cells = np.floor(points / tolerance).astype(np.int64).tolist()
+        grid = {}
+        seeds = []
+        clusters = np.empty(len(points), dtype=np.int64)
+        for i, ((cx, cy), (x, y)) in enumerate(zip(cells, points.tolist())):
+            nearest, nearest_dist = None, tolerance
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for seed in grid.get((cx + dx, cy + dy), ()):
+                        sx, sy = seeds[seed]
+                        dist = hypot(x - sx, y - sy)
+                        if dist < nearest_dist:
+                            nearest, nearest_dist = seed, dist
+            if nearest is None:
+                nearest = len(seeds)
+                seeds.append((x, y))
+                grid.setdefault((cx, cy), []).append(nearest)
+            clusters[i] = nearest
+        return clusters, np.array(seeds, dtype=float).reshape(-1, 2)
+
+    def snap(self, tolerance: float) -> None:
+        """Make nearly coincident endpoints exactly coincident. Edges shorter
+        than 'tolerance' are dropped and their endpoints merged. The seam
+        points of full circles are not vertices, they are left alone."""
+        n = len(self)
+        closed = self.kind == self.CIRCLE
+        open_edges = np.nonzero(~closed)[0]
+        m = len(open_edges)
+        points = np.concatenate([self.start[open_edges], self.end[open_edges]])
+        clusters, seeds = self._cluster_points(points, tolerance)
+        # collapse tiny edges by merging the clusters of both their ends
+        tiny = (self.length < tolerance) & ~closed
+        if tiny[open_edges].any():
+            parent = list(range(len(seeds)))
+
+            def find(i):
+                while parent[i] != i:
+                    parent[i] = parent[parent[i]]
+                    i = parent[i]
+                return i
+
+            for k in np.nonzero(tiny[open_edges])[0].tolist():
+                parent[find(int(clusters[k + m]))] = find(int(clusters[k]))
+            clusters = np.array([find(c) for c in clusters.tolist()], dtype=np.int64)
+        self.flags[tiny] |= self.DROPPED
+        # every vertex is placed at its seed point
+        used_seeds, cluster_ids = np.unique(clusters, return_inverse=True)
+        cluster_ids = cluster_ids.reshape(-1)
+        vertices = seeds[used_seeds]
+        self.vertex_ids = np.empty((n, 2), dtype=np.int64)
+        self.vertex_ids[open_edges, 0] = cluster_ids[:m]
+        self.vertex_ids[open_edges, 1] = cluster_ids[m:]
+        # full circles get a vertex of their own, not shared with any edge
+        circle_ids = np.arange(len(vertices), len(vertices) + int(closed.sum()))
+        self.vertex_ids[closed, 0] = circle_ids
+        self.vertex_ids[closed, 1] = circle_ids
+        self.start[open_edges] = vertices[self.vertex_ids[open_edges, 0]]
+        self.end[open_edges] = vertices[self.vertex_ids[open_edges, 1]]
+        lines = self.kind == self.LINE
+        self.length[lines] = np.linalg.norm(self.end[lines] - self.start[lines], axis=1)
+        self._loops = None
+
+    def loops(self) -> list[list[tuple[int, bool]]]:
+        """Chains of connected edges as lists of (edge index, reversed).
+        Open chains are listed first, circles are single edge loops."""
+        if self._loops is not None:
+            return self._loops
+        active = np.nonzero((self.flags & self.DROPPED) == 0)[0]
+        incident = {}
+        for i in active[self.kind[active] != self.CIRCLE].tolist():
+            v1, v2 = self.vertex_ids[i].tolist()
+            incident.setdefault(v1, []).append(i)
+            incident.setdefault(v2, []).append(i)
+        used = set()
+        loops = []
+
+        def walk(edge, vertex):
+            chain = []
+            while edge is not None:
+                used.add(edge)
+                v1, v2 = self.vertex_ids[edge].tolist()
+                chain.append((edge, v1 != vertex))
+                vertex = v2 if v1 == vertex else v1
+                edge = next((e for e in incident[vertex] if e not in used), None)
+            return chain
+
+        # start open chains from their free ends
+        for vertex, edges in incident.items():
+            if len(edges) == 1 and edges[0] not in used:
+                loops.append(walk(edges[0], vertex))
+        for vertex, edges in incident.items():
+            for edge in edges:
+                if edge not in used:
+                    loops.append(walk(edge, int(self.vertex_ids[edge, 0])))
+        for i in active[self.kind[active] == self.CIRCLE].tolist():
+            loops.append([(i, False)])
+        self._loops = loops
+        return loops
+
+    def loop_is_closed(self, loop: list[tuple[int, bool]]) -> bool:
+        if len(loop) == 1:
+            return bool(self.kind[loop[0][0]] == self.CIRCLE) or bool(
+                self.vertex_ids[loop[0][0], 0] == self.vertex_ids[loop[0][0], 1]
+            )
+        first, first_reversed = loop[0]
+        last, last_reversed = loop[-1]
+        return bool(
+            self.vertex_ids[first, int(first_reversed)]
+            == self.vertex_ids[last, int(not last_reversed)]
+        )
+
+    def loop_is_circle(self, loop: list[tuple[int, bool]]) -> bool:
+        """True if the loop is a full circle, possibly split into several arcs"""
+        idx = np.array([i for i, _ in loop])
+        if len(idx) == 1:
+            return bool(self.kind[idx[0]] == self.CIRCLE)
+        return bool(
+            np.all(self.kind[idx] == self.ARC)
+            and np.ptp(self.center[idx], axis=0).max() < eps
+            and np.ptp(self.radius[idx]) < eps
+            and self.loop_is_closed(loop)
+        )
+
+    def holes(self) -> list[int]:
+        """Indexes (in loops()) of the loops that are circular holes"""
+        return [i for i, loop in enumerate(self.loops()) if self.loop_is_circle(loop)]
+
+    def total_length(self) -> float:
+        return float(self.length[(self.flags & self.DROPPED) == 0].sum())
+
+    def bound_box(self) -> tuple[float, float, float, float]:
+        """(xmin, ymin, xmax, ymax) of all primitives"""
+        active = (self.flags & self.DROPPED) == 0
+        points = [self.start[active], self.end[active]]
+        # extreme points of circles, and of arcs where they lie on the arc
+        curved = active & (self.kind != self.LINE)
+        center = self.center[curved]
+        radius = self.radius[curved][:, None]
+        chord = self.end[curved] - self.start[curved]
+        mid_side = np.sign(self._cross(chord, self.mid[curved] - self.start[curved]))
+        is_circle = self.kind[curved] == self.CIRCLE
+        for direction in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            extreme = center + radius * np.array(direction)
+            side = np.sign(self._cross(chord, extreme - self.start[curved]))
+            points.append(extreme[is_circle | (side == mid_side)])
+        points = np.concatenate(points)
+        if len(points) == 0:
+            return (0.0, 0.0, 0.0, 0.0)
+        xmin, ymin = points.min(axis=0)
+        xmax, ymax = points.max(axis=0)
+        return (float(xmin), float(ymin), float(xmax), float(ymax))
+
+    @staticmethod
+    def _cross(a, b):
+        return a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]
+
+    @staticmethod
+    def _vec(p) -> Vector:
+        return Vector(float(p[0]), float(p[1]), 0.0)
+
+    def _make_edge(self, i: int, reverse: bool) -> Part.Edge:
+        start, end = (self.end[i], self.start[i]) if reverse else (self.start[i], self.end[i])
+        if self.kind[i] == self.LINE:
+            return Part.LineSegment(self._vec(start), self._vec(end)).toShape()
+        return (
+            Part.Arc(self._vec(start), self._vec(self.mid[i]), self._vec(end))
+            .toShape()
+            .Edges[0]
+        )
+
+    def _make_circle(self, i: int) -> Part.Edge:
+        return Part.Circle(
+            self._vec(self.center[i]), Vector(0.0, 0.0, 1.0), float(self.radius[i])
+        ).toShape()
+
+    def to_wires(self, tolerance: float = fuzz) -> list[Part.Wire]:
+        """Snap the endpoints and build one wire per chain of edges. Circles
+        split into several arcs are merged into a single circle."""
+        if self.vertex_ids is None:
+            self.snap(tolerance)
+        wires = []
+        for loop in self.loops():
+            if self.loop_is_circle(loop):
+                wires.append(Part.Wire([self._make_circle(loop[0][0])]))
+            else:
+                wires.append(Part.Wire([self._make_edge(i, rev) for i, rev in loop]))
+        return wires
+
+
 def build_graph_of_tangent_faces(shp: Part.Shape, root: int) -> nx.Graph:
     # created a simple undirected graph object
     graph_of_shape_faces = nx.Graph()
@@ -1030,6 +1343,48 @@ def build_graph_of_tangent_faces(shp: Part.Shape, root: int) -> nx.Graph:
     return single_face_graph
 
 
+def flatten_conic_pcurve(
+    curve,
+    param_min: float,
+    param_max: float,
+    umin: float,
+    vmin: float,
+    y_scale_factor: float,
+) -> Part.Edge:
+    """Exact flattened version of a circular or elliptical pcurve.
+    Flattening maps uv-space to the xy-plane with the affine transform
+    x = v - vmin, y = (u - umin) * y_scale_factor, which maps the conic
+    C + cos(t) * A + sin(t) * B to another ellipse (or circle)."""
+    if isinstance(curve, (Part.Geom2d.Circle2d, Part.Geom2d.ArcOfCircle2d)):
+        radius_x = radius_y = curve.Radius
+    else:
+        radius_x, radius_y = curve.MajorRadius, curve.MinorRadius
+
+    def to_xy(u, v):
+        return Vector(v, u * y_scale_factor, 0.0)
+
+    loc, x_axis, y_axis = curve.Location, curve.XAxis, curve.YAxis
+    center = to_xy(loc.x - umin, loc.y - vmin)
+    # conjugate semi-diameters of the flattened curve
+    a = to_xy(x_axis.x * radius_x, x_axis.y * radius_x)
+    b = to_xy(y_axis.x * radius_y, y_axis.y * radius_y)
+    # rotate the parameter to get the principal axes
+    t0 = 0.5 * atan2(2 * a.dot(b), a.dot(a) - b.dot(b))
+    major = a * cos(t0) + b * sin(t0)
+    minor = b * cos(t0) - a * sin(t0)
+    if major.Length < minor.Length:
+        t0 += pi / 2
+        major, minor = minor, major.negative()
+    normal = major.cross(minor)
+    if major.Length - minor.Length < eps:
+        conic = Part.Circle(center, normal, major.Length)
+        conic.XAxis = major
+    else:
+        # points are C + cos(p) * major + sin(p) * minor, with p = t - t0
+        conic = Part.Ellipse(center + major, center + minor, center)
+    return conic.toShape(param_min - t0, param_max - t0)
+
+
 def unroll_cylinder(
     cylindrical_face: Part.Face,
     refpos: UVRef,
@@ -1063,6 +1418,26 @@ def unroll_cylinder(
                 Vector(x1, y1 * y_scale_factor), Vector(x2, y2 * y_scale_factor)
             )
             flattened_edges.append(line)
+        elif isinstance(
+            edge_on_surface,
+            (
+                Part.Geom2d.Circle2d,
+                Part.Geom2d.ArcOfCircle2d,
+                Part.Geom2d.Ellipse2d,
+                Part.Geom2d.ArcOfEllipse2d,
+            ),
+        ):
+            # circles and ellipses stay exact, no spline round trip needed
+            flattened_edges.append(
+                flatten_conic_pcurve(
+                    edge_on_surface,
+                    e_param_min,
+                    e_param_max,
+                    umin,
+                    vmin,
+                    y_scale_factor,
+                )
+            )
         elif isinstance(edge_on_surface, Part.Geom2d.BSplineCurve2d):
             poles_and_weights = edge_on_surface.getPolesAndWeights()
             poles = [
@@ -1216,12 +1591,17 @@ def compute_unbend_transform(
 
 
 def unfold(
-    shape: Part.Shape, root_face_index: int, bac: BendAllowanceCalculator
+    shape: Part.Shape,
+    root_face_index: int,
+    bac: BendAllowanceCalculator,
+    graph_of_sheet_faces: nx.Graph = None,
 ) -> tuple[list[Part.Edge], list[Part.Edge]]:
     """Given a solid body of a sheet metal part and a reference face, computes
     a solid representation of the unbent object, as well as a compound object
-    containing straight edges for each bend centerline."""
-    graph_of_sheet_faces = build_graph_of_tangent_faces(shape, root_face_index)
+    containing straight edges for each bend centerline.
+    An already built graph of tangent faces may be passed in to be reused."""
+    if graph_of_sheet_faces is None:
+        graph_of_sheet_faces = build_graph_of_tangent_faces(shape, root_face_index)
     thickness = EstimateThickness.using_best_method(shape, root_face_index)
     # also build a list of all seam edges, to be filtered out from the unfolded shape
     seam_edges_list = []
@@ -1334,6 +1714,104 @@ def unfold(
     return list_of_sketch_lines, list_of_bend_lines
 
 
+def _point_in_polygon(point: Vector, polygon: list[Vector]) -> bool:
+    """Even-odd ray casting test in the XY-plane"""
+    x, y = point.x, point.y
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        xi, yi = polygon[i].x, polygon[i].y
+        xj, yj = polygon[j].x, polygon[j].y
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def nest_wires(wires: list[Part.Wire]) -> list[tuple[Part.Wire, list[Part.Wire]]]:
+    """Sort closed, non-intersecting wires in the XY-plane into faces.
+    Returns a list of (outer wire, hole wires). Wires nested inside a hole
+    start a new face, like FaceMakerBullseye does.
+    Containers are found with a grid index of the wire bounding boxes and
+    confirmed with one point in polygon test per candidate."""
+    if not wires:
+        return []
+    boxes = [w.BoundBox for w in wires]
+    # large wires first, a wire can only be contained in a larger one
+    order = sorted(range(len(wires)), key=lambda i: -boxes[i].XLength * boxes[i].YLength)
+    overall = FreeCAD.BoundBox()
+    for bb in boxes:
+        overall.add(bb)
+    cell_size = max(
+        (overall.XLength * overall.YLength / len(wires)) ** 0.5,
+        overall.XLength / 1000,
+        overall.YLength / 1000,
+        eps,
+    )
+
+    def cell_range(bb):
+        return (
+            range(int((bb.XMin - overall.XMin) // cell_size),
+                  int((bb.XMax - overall.XMin) // cell_size) + 1),
+            range(int((bb.YMin - overall.YMin) // cell_size),
+                  int((bb.YMax - overall.YMin) // cell_size) + 1),
+        )
+
+    grid = {}
+    polygons = {}
+    parent = {}
+    depth = {}
+    for i in order:
+        bb = boxes[i]
+        center = bb.Center
+        cell = (
+            int((center.x - overall.XMin) // cell_size),
+            int((center.y - overall.YMin) // cell_size),
+        )
+        test_point = wires[i].Vertexes[0].Point
+        # the smallest container is the parent, larger ones were added first
+        for j in reversed(grid.get(cell, [])):
+            other = boxes[j]
+            if not (
+                other.XMin - eps <= bb.XMin and bb.XMax <= other.XMax + eps
+                and other.YMin - eps <= bb.YMin and bb.YMax <= other.YMax + eps
+            ):
+                continue
+            if j not in polygons:
+                polygons[j] = wires[j].discretize(Deflection=spline2arc_tol / 10)
+            if _point_in_polygon(test_point, polygons[j]):
+                parent[i] = j
+                break
+        depth[i] = depth[parent[i]] + 1 if i in parent else 0
+        x_range, y_range = cell_range(bb)
+        for cx in x_range:
+            for cy in y_range:
+                grid.setdefault((cx, cy), []).append(i)
+    faces = {i: (wires[i], []) for i in order if depth[i] % 2 == 0}
+    for i in order:
+        if depth[i] % 2 == 1:
+            faces[parent[i]][1].append(wires[i])
+    return list(faces.values())
+
+
+def make_nested_face(wires: list[Part.Wire]) -> Part.Shape:
+    """Face (or compound of faces) bounded by a list of planar wires, with
+    the wire nesting computed by nest_wires()."""
+    try:
+        faces = []
+        for outer, holes in nest_wires(wires):
+            face = Part.Face(outer)
+            if holes:
+                face.cutHoles(holes)
+            faces.append(face)
+        shape = faces[0] if len(faces) == 1 else Part.makeCompound(faces)
+        if shape.isValid():
+            return shape
+    except (Part.OCCError, IndexError, AttributeError) as e:
+        FreeCAD.Console.PrintLog(f"Nested face making failed: {e}\n")
+    return Part.makeFace(wires, "Part::FaceMakerBullseye")
+
+
 def getUnfold(
     bac: BendAllowanceCalculator, solid: Part.Feature, facename: str
 ) -> tuple[Part.Face, Part.Shape, Part.Compound, Vector]:
@@ -1359,7 +1837,7 @@ def getUnfold(
     bend_lines = [e.transformed(sketch_align_transform) for e in bend_lines]
     sketch_wirelist = Edge2DCleanup.clean_and_structure_geometry(sketch_lines)
     root_normal = shp.Faces[root_face_index].normalAt(0, 0)
-    face = Part.makeFace(sketch_wirelist, "Part::FaceMakerBullseye")
+    face = make_nested_face(sketch_wirelist)
     unbent_solid = face.extrude(Vector(0.0, 0.0, -1 * thickness))
     inplace_unbend = face.transformed(sketch_align_transform.inverse()).extrude(
         root_normal.normalize() * -1 * thickness
@@ -1381,7 +1859,23 @@ def getUnfoldSketches(
     sketch_color: str = "#000080",
     bend_sketch_color: str = "#c00000",
     internal_sketch_color: str = "#ff5733",
+    as_shapes: bool = False,
 ) -> list[Part.Feature]:
+    """Make the unfold sketches. With as_shapes, lightweight Part::Feature
+    objects holding the planar edges are made instead of sketch objects."""
+
+    def make_sketch(edges, object_name, color, draw_style=None):
+        if as_shapes:
+            return SheetMetalTools.smMakeShapeSketch(
+                edges, object_name, color, existing_sketches, draw_style
+            )
+        sketch = SketchExtraction.edges_to_sketch_object(
+            edges, object_name, existing_sketches, color
+        )
+        if draw_style is not None and FreeCAD.GuiUp:
+            sketch.ViewObject.DrawStyle = draw_style
+        return sketch
+
     sketch_profile, inner_wires, hole_wires = SketchExtraction.extract_manually(
         unfolded_shape, root_normal
     )
@@ -1399,38 +1893,211 @@ def getUnfoldSketches(
         bend_lines = None
     sketch_profile = sketch_profile.transformed(sketch_align_transform)
     # organize the unfold sketch layers in a group
-    sketch_doc_obj = SketchExtraction.edges_to_sketch_object(
-        sketch_profile.Edges, "Unfold_Sketch", existing_sketches, sketch_color
-    )
+    sketch_doc_obj = make_sketch(sketch_profile.Edges, "Unfold_Sketch", sketch_color)
     sketch_objects_list = [sketch_doc_obj]
     # bend lines are sometimes not present
     if bend_lines and bend_lines.Edges:
         bend_lines = bend_lines.transformed(sketch_align_transform)
-        bend_lines_doc_obj = SketchExtraction.edges_to_sketch_object(
-            bend_lines.Edges,
-            "Unfold_Sketch_Bends",
-            existing_sketches,
-            bend_sketch_color,
+        bend_lines_doc_obj = make_sketch(
+            bend_lines.Edges, "Unfold_Sketch_Bends", bend_sketch_color, "Dashdot"
         )
-        bend_lines_doc_obj.ViewObject.DrawStyle = "Dashdot"
         sketch_objects_list.append(bend_lines_doc_obj)
     # inner lines are sometimes not present
     if inner_wires:
         inner_lines = Part.makeCompound(inner_wires).transformed(sketch_align_transform)
-        inner_lines_doc_obj = SketchExtraction.edges_to_sketch_object(
-            inner_lines.Edges,
-            "Unfold_Sketch_Internal",
-            existing_sketches,
-            internal_sketch_color,
+        inner_lines_doc_obj = make_sketch(
+            inner_lines.Edges, "Unfold_Sketch_Internal", internal_sketch_color
         )
         sketch_objects_list.append(inner_lines_doc_obj)
     if hole_wires:
         hole_lines = Part.makeCompound(hole_wires).transformed(sketch_align_transform)
-        hole_lines_doc_obj = SketchExtraction.edges_to_sketch_object(
-            hole_lines.Edges,
-            "Unfold_Sketch_Holes",
-            existing_sketches,
-            internal_sketch_color,
+        hole_lines_doc_obj = make_sketch(
+            hole_lines.Edges, "Unfold_Sketch_Holes", internal_sketch_color
         )
         sketch_objects_list.append(hole_lines_doc_obj)
     return sketch_objects_list
+
+
+class BendInfo:
+    """Manufacturing data of a single bend, derived from the parameters of
+    its cylindrical face."""
+
+    def __init__(
+        self,
+        face_index: int,
+        angle: float,
+        inner_radius: float,
+        direction: BendDirection,
+        length: float,
+        k_factor: float,
+        bend_allowance: float,
+    ) -> None:
+        self.face_index = face_index
+        self.angle = angle  # degrees
+        self.inner_radius = inner_radius
+        self.direction = direction
+        self.length = length
+        self.k_factor = k_factor
+        self.bend_allowance = bend_allowance
+
+    def as_dict(self) -> dict:
+        return {
+            "face": f"Face{self.face_index + 1}",
+            "angle": self.angle,
+            "inner_radius": self.inner_radius,
+            "direction": self.direction.name,
+            "length": self.length,
+            "k_factor": self.k_factor,
+            "bend_allowance": self.bend_allowance,
+        }
+
+
+class SheetMetrics:
+    """Quoting data of a sheet metal part: bends, blank size, cut length and
+    pierce count (one pierce per closed contour of the flat pattern)."""
+
+    def __init__(self) -> None:
+        self.thickness = 0.0
+        self.bends = []
+        self.blank_length = 0.0
+        self.blank_width = 0.0
+        self.cut_length = 0.0
+        self.pierce_count = 0
+
+    @property
+    def bend_count(self) -> int:
+        return len(self.bends)
+
+    def as_dict(self) -> dict:
+        return {
+            "thickness": self.thickness,
+            "bend_count": self.bend_count,
+            "bends": [b.as_dict() for b in self.bends],
+            "blank_length": self.blank_length,
+            "blank_width": self.blank_width,
+            "cut_length": self.cut_length,
+            "pierce_count": self.pierce_count,
+        }
+
+
+def find_root_face(shape: Part.Shape) -> int:
+    """Index of the largest planar face, a good default unfold reference."""
+    planar_faces = [
+        (f.Area, i)
+        for i, f in enumerate(shape.Faces)
+        if f.Surface.TypeId == "Part::GeomPlane"
+    ]
+    if not planar_faces:
+        errmsg = "Shape has no planar face to use as unfold reference"
+        raise RuntimeError(errmsg)
+    return max(planar_faces)[1]
+
+
+def compute_bends(
+    shape: Part.Shape,
+    graph_of_sheet_faces: nx.Graph,
+    bac: BendAllowanceCalculator,
+    thickness: float,
+) -> list[BendInfo]:
+    """Bend data read directly from the cylindrical faces of the face graph.
+    No geometry is created."""
+    bends = []
+    for face_index in sorted(graph_of_sheet_faces.nodes):
+        face = shape.Faces[face_index]
+        if face.Surface.TypeId != "Part::GeomCylinder":
+            continue
+        umin, umax, vmin, vmax = face.ParameterRange
+        bend_angle = umax - umin
+        radius = face.Surface.Radius
+        direction = BendDirection.from_face(face)
+        # for downward bends the face of the graph is the outer side of the bend
+        inner_radius = radius if direction == BendDirection.UP else radius - thickness
+        bends.append(
+            BendInfo(
+                face_index,
+                degrees(bend_angle),
+                inner_radius,
+                direction,
+                abs(vmax - vmin),
+                bac.get_k_factor(radius, thickness),
+                bac.get_bend_allowance(direction, radius, thickness, bend_angle),
+            )
+        )
+    return bends
+
+
+def compute_sheet_metrics(
+    shape: Part.Shape,
+    root_face_index: int = None,
+    bac: BendAllowanceCalculator = None,
+) -> SheetMetrics:
+    """Computes quoting metrics of a sheet metal solid. Bends come from the
+    face graph, blank size, cut length and pierce count from the 2D edges of
+    the flat pattern. No faces, solids or sketches are built."""
+    if root_face_index is None:
+        root_face_index = find_root_face(shape)
+    if bac is None:
+        bac = BendAllowanceCalculator.from_single_value(0.4, "ansi")
+    metrics = SheetMetrics()
+    graph_of_sheet_faces = build_graph_of_tangent_faces(shape, root_face_index)
+    metrics.thickness = EstimateThickness.using_best_method(shape, root_face_index)
+    metrics.bends = compute_bends(shape, graph_of_sheet_faces, bac, metrics.thickness)
+    sketch_lines, _bend_lines = unfold(
+        shape, root_face_index, bac, graph_of_sheet_faces
+    )
+    sketch_align_transform = SketchExtraction.move_to_origin(
+        Part.makeCompound(sketch_lines), shape.Faces[root_face_index]
+    )
+    sketch_lines = [e.transformed(sketch_align_transform) for e in sketch_lines]
+    if np is not None:
+        # work on the arrays only, no wires are needed
+        primitives = Primitives2D.from_edges(
+            Edge2DCleanup.eliminate_bsplines(sketch_lines, spline2arc_tol)
+        )
+        primitives.snap(fuzz)
+        xmin, ymin, xmax, ymax = primitives.bound_box()
+        size_x, size_y = xmax - xmin, ymax - ymin
+        metrics.cut_length = primitives.total_length()
+        metrics.pierce_count = sum(
+            1 for loop in primitives.loops() if primitives.loop_is_closed(loop)
+        )
+    else:
+        wires = Edge2DCleanup.clean_and_structure_geometry(sketch_lines)
+        blank_box = FreeCAD.BoundBox()
+        for w in wires:
+            blank_box.add(w.BoundBox)
+        size_x, size_y = blank_box.XLength, blank_box.YLength
+        metrics.cut_length = sum(w.Length for w in wires)
+        metrics.pierce_count = sum(1 for w in wires if w.isClosed())
+    metrics.blank_length = max(size_x, size_y)
+    metrics.blank_width = min(size_x, size_y)
+    return metrics
+
+
+def getSheetMetrics(
+    bac: BendAllowanceCalculator, solid: Part.Feature, facename: str = None
+) -> SheetMetrics:
+    """compute_sheet_metrics for a document object. Without a face name the
+    largest planar face is used as reference."""
+    shp = solid.Shape.transformed(solid.Placement.toMatrix().inverse())
+    root_face_index = None
+    if facename:
+        if hasattr(shp, "findSubShape"):
+            root_face_index = shp.findSubShape(shp.getElement(facename))[1] - 1
+        else:
+            root_face_index = int(facename[4:]) - 1
+    return compute_sheet_metrics(shp, root_face_index, bac)
+
+
+def getSheetMetricsForObjects(
+    bac: BendAllowanceCalculator, objects: list[Part.Feature]
+) -> dict:
+    """Metrics of many parts in one pass, keyed by object name. Parts that
+    fail to evaluate are reported with an 'error' entry instead."""
+    results = {}
+    for obj in objects:
+        try:
+            results[obj.Name] = getSheetMetrics(bac, obj).as_dict()
+        except Exception as e:
+            results[obj.Name] = {"error": str(e)}
+    return results
@@ -0,0 +1,439 @@
+# -*- coding: utf-8 -*-
+###################################################################################
+#
+#  SheetMetalParallel.py
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+###################################################################################
+
+# Helpers to run independent shape operations in worker processes.
+# Shapes are passed to and from the workers as BREP strings. The workers are
+# headless FreeCADCmd processes: forking the GUI application is not safe, as
+# Qt and OCC threads are running in it. Workers are started on first use,
+# connect back to this process and are kept running for the next jobs.
+# Where FreeCADCmd can't be found, or only one worker is allowed, the jobs are
+# run serially.
+
+import atexit
+import importlib
+import multiprocessing
+import multiprocessing.connection
+import os
+import queue
+import secrets
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import FreeCAD
+import Part
+import SheetMetalTools
+from SheetMetalTools import SMLogger
+
+# upper limit of automatically selected worker processes
+smMaxAutoWorkers = 8
+# seconds a new worker process may take to start and connect
+smWorkerStartTimeout = 60.0
+# starting the workers takes a moment, it does not pay off for fewer offsets
+smMinParallelOffsets = 4
+
+_smFreeCADCmd = None
+
+
+class SMWorkerError(RuntimeError):
+    """A worker process could not be started, or died while running a job"""
+
+
+def smMaxWorkers():
+    """Number of worker processes allowed by the preferences:
+    0 = automatic, 1 = serial only, N = at most N workers"""
+    maxWorkers = SheetMetalTools.params.GetInt("MaxWorkerProcesses", 0)
+    if maxWorkers <= 0:
+        maxWorkers = min(smMaxAutoWorkers, max(1, (os.cpu_count() or 1) - 1))
+    return maxWorkers
+
+
+def smFreeCADCmdPath():
+    """Path of the FreeCADCmd executable, or None if it can't be found"""
+    global _smFreeCADCmd
+    if _smFreeCADCmd is not None:
+        return _smFreeCADCmd or None
+    names = ["FreeCADCmd", "freecadcmd", "FreeCADCmd.exe", "freecadcmd.exe"]
+    binDir = os.path.join(FreeCAD.getHomePath(), "bin")
+    paths = [os.path.join(binDir, name) for name in names]
+    paths += [shutil.which(name) for name in names]
+    _smFreeCADCmd = next((p for p in paths if p and os.path.isfile(p)), "")
+    return _smFreeCADCmd or None
+
+
+def smCanUseWorkers():
+    return smFreeCADCmdPath() is not None
+
+
+def shapeToBrep(shape):
+    return shape.exportBrepToString()
+
+
+def shapeFromBrep(brep):
+    shape = Part.Shape()
+    shape.importBrepFromString(brep)
+    return shape
+
+
+def smWorkerMain(address, authkey, workerId):
+    """Entry point of the FreeCADCmd worker processes: run the jobs sent by
+    the parent process until it disconnects"""
+    conn = multiprocessing.connection.Client(address, authkey=bytes.fromhex(authkey))
+    conn.send(workerId)
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        moduleName, funcName, args = message
+        try:
+            func = getattr(importlib.import_module(moduleName), funcName)
+            reply = ("ok", func(*args))
+        except Exception as e:
+            reply = ("error", e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # the result or the exception can't be pickled
+            conn.send(("error", RuntimeError(f"{type(e).__name__}: {e}")))
+    conn.close()
+
+
+class _SMWorker:
+    """A FreeCADCmd worker process and its connection"""
+
+    def __init__(self, proc):
+        self.proc = proc
+        self.conn = None
+        self.connected = threading.Event()
+
+    def isAlive(self):
+        return self.proc.poll() is None
+
+    def waitConnected(self, timeout):
+        deadline = time.monotonic() + timeout
+        while not self.connected.wait(0.2):
+            if not self.isAlive() or time.monotonic() > deadline:
+                self.kill()
+                raise SMWorkerError("Worker process could not be started")
+
+    def submit(self, func, args):
+        self.conn.send((func.__module__, func.__qualname__, args))
+
+    def receive(self):
+        """(status, result) of the submitted job, status is "ok" or "error".
+        Raises SMWorkerError if the worker died"""
+        try:
+            return self.conn.recv()
+        except (EOFError, OSError):
+            self.kill()
+            raise SMWorkerError("Worker process died while running a job")
+
+    def run(self, func, args):
+        self.submit(func, args)
+        status, result = self.receive()
+        if status != "ok":
+            raise result
+        return result
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+            self.conn.close()
+        except (OSError, AttributeError):
+            pass
+
+    def kill(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        if self.isAlive():
+            self.proc.kill()
+            self.proc.wait()
+
+
+class _SMWorkerPool:
+    """Idle worker processes, kept for the next jobs"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.listener = None
+        self.authkey = None
+        self.idle = []
+        self.starting = {}
+        self.nextId = 0
+
+    def _acceptLoop(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+                workerId = conn.recv()
+            except multiprocessing.AuthenticationError:
+                continue
+            except (EOFError, OSError):
+                return
+            with self.lock:
+                worker = self.starting.pop(workerId, None)
+            if worker is None:
+                conn.close()
+                continue
+            worker.conn = conn
+            worker.connected.set()
+
+    def _start(self, freecadCmd):
+        if self.listener is None:
+            self.authkey = secrets.token_bytes(32)
+            self.listener = multiprocessing.connection.Listener(
+                ("127.0.0.1", 0), authkey=self.authkey
+            )
+            threading.Thread(target=self._acceptLoop, daemon=True).start()
+        workerId = self.nextId
+        self.nextId += 1
+        moduleDir = os.path.dirname(os.path.abspath(__file__))
+        code = (f"import sys; sys.path.insert(0, {moduleDir!r}); "
+                f"import SheetMetalParallel; SheetMetalParallel.smWorkerMain("
+                f"{self.listener.address!r}, {self.authkey.hex()!r}, {workerId})")
+        proc = subprocess.Popen(
+            [freecadCmd, "-c", code],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        worker = _SMWorker(proc)
+        self.starting[workerId] = worker
+        return worker
+
+    def acquire(self, freecadCmd, count=1):
+        """Return (workers, errors): up to count idle or newly started workers,
+        and the errors of the ones that could not be started"""
+        workers = []
+        with self.lock:
+            while self.idle and len(workers) < count:
+                worker = self.idle.pop()
+                if worker.isAlive():
+                    workers.append(worker)
+            newWorkers = [self._start(freecadCmd) for _i in range(count - len(workers))]
+        errors = []
+        for worker in newWorkers:
+            try:
+                worker.waitConnected(smWorkerStartTimeout)
+                workers.append(worker)
+            except SMWorkerError as e:
+                errors.append(e)
+        return workers, errors
+
+    def release(self, worker):
+        if worker.conn is not None and worker.isAlive():
+            with self.lock:
+                self.idle.append(worker)
+        else:
+            worker.kill()
+
+    def shutdown(self):
+        with self.lock:
+            workers, self.idle = self.idle, []
+        for worker in workers:
+            worker.stop()
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+
+
+_smWorkerPool = _SMWorkerPool()
+atexit.register(_smWorkerPool.shutdown)
+
+
+def smShutdownWorkers():
+    """Stop the idle worker processes, new ones are started when needed"""
+    _smWorkerPool.shutdown()
+
+
+def smRunJobs(func, argsList, maxWorkers=None, errorResult=None):
+    """Run func(*args) for every args tuple of argsList, and return the results
+    in the same order. func must be a module level function of an importable
+    module, and arguments and results must be picklable (use BREP strings for
+    shapes). Exceptions raised by func are raised again here.
+    Jobs run in FreeCADCmd worker processes if more than one worker is allowed,
+    otherwise, or if no worker can be started, they are run serially.
+    A job is never run again in this process after its worker died, as it would
+    most likely bring FreeCAD down too: SMWorkerError is raised, or, if given,
+    errorResult(message) is used as the result of the job."""
+    if maxWorkers is None:
+        maxWorkers = smMaxWorkers()
+    numWorkers = min(maxWorkers, len(argsList))
+    freecadCmd = smFreeCADCmdPath() if numWorkers > 1 else None
+    if freecadCmd is None:
+        return [func(*args) for args in argsList]
+
+    pending = queue.SimpleQueue()
+    for index in range(len(argsList)):
+        pending.put(index)
+    outcomes = [None] * len(argsList)
+    startErrors = []
+
+    def runJobs():
+        # no FreeCAD calls in here, this runs in a helper thread
+        worker = None
+        try:
+            while True:
+                try:
+                    index = pending.get_nowait()
+                except queue.Empty:
+                    return
+                if worker is None:
+                    workers, errors = _smWorkerPool.acquire(freecadCmd)
+                    if not workers:
+                        startErrors.extend(errors)
+                        pending.put(index)
+                        return
+                    worker = workers[0]
+                try:
+                    outcomes[index] = ("ok", worker.run(func, argsList[index]))
+                except SMWorkerError as e:
+                    outcomes[index] = ("crashed", e)
+                    worker = None
+                except Exception as e:
+                    outcomes[index] = ("error", e)
+        finally:
+            if worker is not None:
+                _smWorkerPool.release(worker)
+
+    with ThreadPoolExecutor(numWorkers) as pool:
+        for _i in range(numWorkers):
+            pool.submit(runJobs)
+
+    leftOver = []
+    while not pending.empty():
+        leftOver.append(pending.get())
+    if leftOver:
+        SMLogger.log(f"Worker processes failed to start ({startErrors[0]}), "
+                     f"running {len(leftOver)} jobs serially")
+        for index in sorted(leftOver):
+            outcomes[index] = ("ok", func(*argsList[index]))
+
+    results = []
+    for status, result in outcomes:
+        if status == "ok":
+            results.append(result)
+        elif status == "crashed" and errorResult is not None:
+            results.append(errorResult(str(result)))
+        else:
+            raise result
+    return results
+
+
+def _offsetShapeJob(brep, offset, fill):
+    shape = shapeFromBrep(brep)
+    return shapeToBrep(shape.makeOffsetShape(offset, 0, fill=fill))
+
+
+def smParallelOffsets(shapes, offsets, fill=False, maxWorkers=None):
+    """Compute shape.makeOffsetShape(offset, 0, fill) for each pair of
+    shapes and offsets, in parallel worker processes when possible"""
+    if maxWorkers is None:
+        maxWorkers = smMaxWorkers()
+    if maxWorkers <= 1 or len(offsets) < smMinParallelOffsets or not smCanUseWorkers():
+        return [
+            shape.makeOffsetShape(offset, 0, fill=fill)
+            for shape, offset in zip(shapes, offsets)
+        ]
+    brepCache = {}
+    argsList = []
+    for shape, offset in zip(shapes, offsets):
+        # the same shape is often offset several times, serialize it only once
+        if id(shape) not in brepCache:
+            brepCache[id(shape)] = shapeToBrep(shape)
+        argsList.append((brepCache[id(shape)], offset, fill))
+    return [shapeFromBrep(b) for b in smRunJobs(_offsetShapeJob, argsList, maxWorkers)]
+
+
+def smRaceJobs(jobs, timeout, preferred=None, grace=0.0):
+    """Run competing jobs, each in its own worker process, and return the
+    result of the first job that finishes successfully.
+    jobs is a dict of name: (func, args). func is called as func(*args) in the
+    worker, it must raise if it can't produce a valid result, and its result
+    must be picklable. If the preferred job finishes within grace seconds after
+    the first successful one, the preferred result is taken instead.
+    Workers still running when a result is taken, or after timeout seconds,
+    are killed.
+    Returns (name, result, timings): name and result are None if no job
+    succeeded, timings is a dict of name: (status, seconds)."""
+    startTime = time.perf_counter()
+    timings = {}
+    freecadCmd = smFreeCADCmdPath()
+    if freecadCmd is None:
+        raise SMWorkerError("FreeCADCmd not found, jobs can't be raced")
+    started, errors = _smWorkerPool.acquire(freecadCmd, len(jobs))
+    workers = {}
+    for (name, (func, args)), worker in zip(jobs.items(), started):
+        worker.submit(func, args)
+        workers[worker.conn] = (name, worker)
+    for name in list(jobs)[len(started):]:
+        timings[name] = ("failed", time.perf_counter() - startTime)
+    if errors:
+        SMLogger.log(f"Race workers failed to start: {errors[0]}")
+
+    results = {}
+    deadline = startTime + timeout
+    winner = None
+    while workers and winner is None:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0.0:
+            break
+        for conn in multiprocessing.connection.wait(list(workers), remaining):
+            name, worker = workers.pop(conn)
+            try:
+                status, result = worker.receive()
+                if status == "error":
+                    status, result = "failed", str(result)
+                _smWorkerPool.release(worker)
+            except SMWorkerError:
+                status, result = "crashed", None
+            timings[name] = (status, time.perf_counter() - startTime)
+            if status == "ok":
+                results[name] = result
+            else:
+                SMLogger.log(f"Race job {name} {status}: {result}")
+        if preferred in results or (results and preferred not in jobs):
+            winner = preferred if preferred in results else next(iter(results))
+        elif results:
+            if all(name != preferred for name, _worker in workers.values()):
+                winner = next(iter(results))
+            else:
+                # give the preferred job a little more time
+                firstDone = min(timings[name][1] for name in results)
+                deadline = min(deadline, startTime + firstDone + grace)
+
+    # a running job can't be cancelled, its worker is replaced by a new one
+    for name, worker in workers.values():
+        worker.kill()
+        status = "killed" if results else "timeout"
+        timings[name] = (status, time.perf_counter() - startTime)
+    if winner is None and results:
+        winner = next(iter(results))
+    return winner, results.get(winner), timings
@@ -23,10 +23,12 @@
 #
 ##############################################################################
 
+import hashlib
 import math
 import os
 import re
 import importlib
+import tempfile
 import FreeCAD
 import importDXF
 import importSVG
@@ -557,10 +559,7 @@ if isGuiLoaded():
         else:
             filePath = fileName
         if filePath:
-            if fileType == "dxf":
-                importDXF.export(sketches, filePath)
-            else:
-                importSVG.export(sketches, filePath)
+            smExportSketches(sketches, fileType, filePath)
     
     def smAddNewObject(baseObj, newObj, activeBody, taskPanel = None):
         if activeBody is not None:
@@ -704,6 +703,44 @@ def smBelongToBody(item, body):
 def smIsSketchObject(obj):
     return obj.TypeId.startswith("Sketcher::")
 
+def smExportSketches(sketches, fileType, fileName):
+    if fileType == "dxf":
+        importDXF.export(sketches, fileName)
+    else:
+        importSVG.export(sketches, fileName)
+
+def smGetReusableObject(doc, existingNames, name, typeId):
+    ''' Find the object in existingNames, whose name starts with name, to reuse it for
+        an object of type typeId. An object of another type is removed. '''
+    if existingNames is None:
+        return None
+    existingName = next((item for item in existingNames if item.startswith(name)), "")
+    obj = doc.getObject(existingName)
+    if obj is not None and obj.TypeId != typeId:
+        doc.removeObject(obj.Name)
+        obj = None
+    return obj
+
+def smMakeShapeSketch(edges, name, color, existingNames = None, drawStyle = None):
+    ''' Lightweight, solver free alternative to an unfold sketch: a Part::Feature
+        with a compound of the planar edges '''
+    doc = FreeCAD.ActiveDocument
+    obj = smGetReusableObject(doc, existingNames, name, "Part::Feature")
+    if obj is None:
+        obj = doc.addObject("Part::Feature", name)
+        obj.Label = name
+    obj.Shape = Part.makeCompound(edges)
+    if FreeCAD.GuiUp:
+        rgb_color = tuple(int(color[i : i + 2], 16) for i in (1, 3, 5))
+        v = FreeCAD.Version()
+        if v[0] == '0' and int(v[1]) < 21:
+            rgb_color = tuple(i / 255 for i in rgb_color)
+        obj.ViewObject.LineColor = rgb_color
+        obj.ViewObject.PointColor = rgb_color
+        if drawStyle is not None:
+            obj.ViewObject.DrawStyle = drawStyle
+    return obj
+
 def smGetParentBody(obj):
     if hasattr(obj, "getParent"):
         return obj.getParent()
@@ -872,8 +909,301 @@ def smGetBodyOfItem(obj):
         return parent
     return None
 
+#************************************************************************************
+#* Placement invariant shape fingerprints
+#************************************************************************************
+
+# Repeated parts (copies, App::Link instances) get the same fingerprint wherever
+# they are placed, so they can be unfolded and exported once with a quantity.
+# Values are rounded to smFingerprintDigits significant digits.
+smFingerprintDigits = 8
+
+def _smRound(value, digits = smFingerprintDigits):
+    if abs(value) < 10.0 ** -digits:
+        return 0.0
+    return float(f"{value:.{digits}g}")
+
+def _smSurfaceSignature(face):
+    surface = face.Surface
+    values = [_smRound(face.Area)]
+    for attr in ("Radius", "MajorRadius", "MinorRadius", "SemiAngle"):
+        if hasattr(surface, attr):
+            values.append(_smRound(getattr(surface, attr)))
+    return (surface.TypeId, tuple(values))
+
+def _smChirality(solid, principal):
+    ''' +1 or -1 for a part and its mirror image, 0 if undecidable (symmetric part) '''
+    moments = sorted(principal["Moments"])
+    scale = max(abs(m) for m in moments)
+    if scale == 0.0 or min(moments[1] - moments[0], moments[2] - moments[1]) < 1e-6 * scale:
+        return 0 # principal axes are not unique
+    center = solid.CenterOfMass
+    points = [v.Point - center for v in solid.Vertexes]
+    size = max((p.Length for p in points), default=0.0)
+    axes = []
+    # orient the principal axes by the skewness of the vertex distribution
+    for name in ("FirstAxisOfInertia", "SecondAxisOfInertia", "ThirdAxisOfInertia"):
+        axis = principal[name]
+        skew = sum(p.dot(axis) ** 3 for p in points)
+        if abs(skew) < 1e-6 * len(points) * size ** 3:
+            return 0
+        axes.append(axis if skew > 0.0 else -axis)
+    return 1 if axes[0].cross(axes[1]).dot(axes[2]) > 0.0 else -1
+
+# harmonic orders tried by _smAxialChirality, enough for the usual two-, three-,
+# four-, six- and eightfold hole patterns
+smChiralityOrders = 8
+
+def _smAxialChirality(solid, principal):
+    ''' +1 or -1 for a part and its mirror image, 0 if it is mirror symmetric.
+        Used when _smChirality can't orient the principal axes, e.g. for square
+        plates. The face centers of mass p are taken around the most distinct
+        principal axis, with their height h and angle t about it. For each order n
+        the sign of Im(conj(sum(A * exp(i*n*t))) * sum(A * h * exp(i*n*t))), A being
+        the face area, doesn't depend on the placement, nor on the (unknown) sign of
+        the axis, and changes for the mirror image. Runs in O(faces * orders) '''
+    moments = principal["Moments"]
+    scale = max(abs(m) for m in moments)
+    gaps = [min(abs(moments[i] - moments[j]) for j in range(3) if j != i) for i in range(3)]
+    index = max(range(3), key = lambda i: gaps[i])
+    if scale == 0.0 or gaps[index] < 1e-6 * scale:
+        return 0 # no distinct principal axis
+    axis = principal[("FirstAxisOfInertia", "SecondAxisOfInertia", "ThirdAxisOfInertia")[index]]
+    # any direction normal to the axis will do as angle reference
+    uAxis = axis.cross(FreeCAD.Vector(1, 0, 0))
+    if uAxis.Length < 0.5:
+        uAxis = axis.cross(FreeCAD.Vector(0, 1, 0))
+    uAxis.normalize()
+    vAxis = axis.cross(uAxis)
+    center = solid.CenterOfMass
+    size = solid.BoundBox.DiagonalLength
+    samples = []
+    for face in solid.Faces:
+        p = face.CenterOfMass - center
+        z = complex(p.dot(uAxis), p.dot(vAxis))
+        if abs(z) > 1e-9 * size: # no angle on the axis
+            samples.append((face.Area, p.dot(axis), z / abs(z)))
+    sumArea = sum(a for a, _h, _z in samples)
+    sumMoment = sum(a * abs(h) for a, h, _z in samples)
+    for order in range(1, smChiralityOrders + 1):
+        areaSum = heightSum = 0j
+        for a, h, z in samples:
+            zn = z ** order
+            areaSum += a * zn
+            heightSum += a * h * zn
+        value = (areaSum.conjugate() * heightSum).imag
+        if abs(value) > 1e-6 * sumArea * sumMoment:
+            return 1 if value > 0.0 else -1
+    return 0
+
+def _smSolidSignature(solid):
+    principal = solid.PrincipalProperties
+    return (
+        _smRound(solid.Volume),
+        tuple(sorted(_smRound(m) for m in principal["Moments"])),
+        _smChirality(solid, principal) or _smAxialChirality(solid, principal),
+    )
+
+def smShapeFingerprint(shape):
+    ''' Hex digest of the canonicalised topology and geometry of a shape, independent
+        of its placement: surface types and radii, face areas, sorted edge lengths,
+        volume and principal moments of inertia of the solids. Mirrored parts get
+        different fingerprints, unless they are symmetric. '''
+    data = (
+        shape.ShapeType,
+        len(shape.Solids), len(shape.Faces), len(shape.Edges), len(shape.Vertexes),
+        tuple(sorted(_smSurfaceSignature(f) for f in shape.Faces)),
+        tuple(sorted(_smRound(e.Length) for e in shape.Edges)),
+        tuple(sorted(_smSolidSignature(s) for s in shape.Solids)),
+        _smRound(shape.Area),
+    )
+    return hashlib.sha1(repr(data).encode()).hexdigest()
+
+def smGroupByFingerprint(items, shapeFunc = None):
+    ''' Group items (document objects by default) with identical shapes.
+        Returns a list of (fingerprint, [items]) in the order of first appearance.
+        shapeFunc(item) returns the shape of an item, default is Part.getShape(item),
+        which works for App::Link objects too '''
+    groups = {}
+    for item in items:
+        shape = Part.getShape(item) if shapeFunc is None else shapeFunc(item)
+        groups.setdefault(smShapeFingerprint(shape), []).append(item)
+    return list(groups.items())
+
+def smHasElementMap(shape):
+    ''' True if the shape carries topological element names (FreeCAD 1.0 and up).
+        Shapes read back from BREP lose them, so they can't be cached on disk '''
+    return getattr(shape, "ElementMapSize", 0) > 0
+
+def smSourceDigest(*modules):
+    ''' Digest of the source files of modules and of the FreeCAD version, to key
+        disk caches of shapes built by these modules '''
+    hasher = hashlib.sha1(repr(FreeCAD.Version()[:3]).encode())
+    for module in modules:
+        with open(module.__file__, "rb") as f:
+            hasher.update(f.read())
+    return hasher.hexdigest()
+
+def smWriteCacheFile(filePath, shape):
+    ''' Write a shape to a BREP file of a disk cache shared by several processes:
+        it is written under a unique temporary name and moved in place '''
+    fd, tmpFile = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(filePath))
+    os.close(fd)
+    try:
+        shape.exportBrep(tmpFile)
+        os.replace(tmpFile, filePath)
+    finally:
+        if os.path.exists(tmpFile):
+            os.remove(tmpFile)
+
+def smEvictCacheFiles(path, suffix, maxSize):
+    ''' Remove the least recently modified files ending with suffix from a disk
+        cache folder, until their total size is at most maxSize bytes '''
+    entries = []
+    for entry in os.scandir(path):
+        if entry.name.endswith(suffix):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    totalSize = sum(size for _mtime, size, _path in entries)
+    for _mtime, size, filePath in sorted(entries):
+        if totalSize <= maxSize:
+            break
+        try:
+            os.remove(filePath)
+        except OSError:
+            continue  # in use by another process
+        totalSize -= size
+
+#************************************************************************************
+#* Sheet thickness service
+#************************************************************************************
+
+# Thickness measurements are memoised by shape key and face key, so long feature
+# chains do not have to measure the same sheet again at every step
+smThicknessCache = {}
+smThicknessCacheSize = 512
+# uv positions (relative to the face parameter range) used as ray origins
+smThicknessSamples = ((0.5, 0.5), (0.25, 0.25), (0.75, 0.75), (0.25, 0.75), (0.75, 0.25))
+
+class SMThicknessInfo:
+    ''' Result of a sheet thickness measurement '''
+    def __init__(self, thickness = 0.0, confidence = 0.0, method = "none"):
+        self.thickness = thickness
+        self.confidence = confidence # 0.0 = no agreement, 1.0 = all samples agree
+        self.method = method
+
+    def __bool__(self):
+        return self.thickness > smEpsilon
+
+    def __repr__(self):
+        return (f"SMThicknessInfo(thickness={self.thickness}, "
+                f"confidence={self.confidence:.2f}, method='{self.method}')")
+
+def _smRoundedPoints(shape, p=6):
+    return tuple(round(c, p) for v in shape.Vertexes for c in v.Point)
+
+def _smFaceSignature(face, p=6):
+    # surface type and area tell apart faces bounded by the same vertices
+    # (a flat face and a curved one, or a face with and without a hole)
+    center = face.CenterOfMass
+    return (face.Surface.TypeId, round(face.Area, p),
+            round(center.x, p), round(center.y, p), round(center.z, p))
+
+def smShapeKey(shape):
+    ''' Hashable key of a shape's geometry and position (not placement invariant),
+        stable between copies of the same shape. Besides the vertex positions it
+        holds the volume and the signature of every face, so shapes sharing their
+        vertices but differing in their faces get different keys '''
+    return (shape.ShapeType, len(shape.Faces), len(shape.Edges),
+            round(shape.Volume, 6),
+            hash(_smRoundedPoints(shape)),
+            hash(tuple(_smFaceSignature(f) for f in shape.Faces)))
+
+def smFaceKey(face):
+    ''' Hashable key of a face, stable between copies of the same shape '''
+    return (_smFaceSignature(face), hash(_smRoundedPoints(face)))
+
+def smMemoThickness(shape, key, computeFunc):
+    ''' Return the memoised thickness value of 'shape' stored under 'key',
+        calling computeFunc() to get it on a cache miss '''
+    cacheKey = (smShapeKey(shape), key)
+    if cacheKey in smThicknessCache:
+        # refresh the entry so the least recently used one is evicted first
+        value = smThicknessCache.pop(cacheKey)
+        smThicknessCache[cacheKey] = value
+        return value
+    value = computeFunc()
+    if len(smThicknessCache) >= smThicknessCacheSize:
+        del smThicknessCache[next(iter(smThicknessCache))]
+    smThicknessCache[cacheKey] = value
+    return value
+
+def smClearThicknessCache():
+    smThicknessCache.clear()
+
+def _smRayThickness(shape, face, point):
+    ''' Cast a ray from a point on the face into the material and return the
+        distance to the nearest face it hits, or None if nothing was hit '''
+    u, v = face.Surface.parameter(point)
+    direction = face.normalAt(u, v).negative()
+    ray = Part.Line(point, point + direction)
+    nearest = None
+    for other in shape.Faces:
+        if other.isSame(face):
+            continue
+        bbox = other.BoundBox
+        bbox.enlarge(smEpsilon)
+        if not bbox.intersect(point, direction):
+            continue
+        try:
+            hits = other.Surface.intersectCS(ray)[0]
+        except Exception:
+            continue
+        for hit in hits:
+            hitPoint = FreeCAD.Vector(hit.X, hit.Y, hit.Z)
+            dist = (hitPoint - point).dot(direction)
+            if dist < smEpsilon or (nearest is not None and dist >= nearest):
+                continue
+            if other.isInside(hitPoint, smEpsilon, True):
+                nearest = dist
+    return nearest
+
+def _smLineThickness(shape, face):
+    ''' Legacy measurement: common of the solid with a line normal to the face '''
+    normal = face.normalAt(0, 0)
+    estimated_thk = shape.Volume / face.Area
+    p1 = face.Vertexes[0].Point
+    p2 = p1 + estimated_thk * -1.5 * normal
+    return shape.common(Part.makeLine(p1, p2)).Length
+
+def _smMeasureThickness(shape, face):
+    umin, umax, vmin, vmax = face.ParameterRange
+    values = []
+    for su, sv in smThicknessSamples:
+        point = face.valueAt(umin + su * (umax - umin), vmin + sv * (vmax - vmin))
+        if not face.isInside(point, smEpsilon, True):
+            continue
+        dist = _smRayThickness(shape, face, point)
+        if dist is not None:
+            values.append(round(dist, 6))
+    if values:
+        thk = max(set(values), key=values.count)
+        agreeing = len([val for val in values if abs(val - thk) < smEpsilon])
+        # samples falling into holes of the face are not counted against it
+        return SMThicknessInfo(thk, agreeing / len(values), "ray")
+    try:
+        thk = _smLineThickness(shape, face)
+    except Exception:
+        thk = 0.0
+    return SMThicknessInfo(thk, 0.25 if thk > smEpsilon else 0.0, "line")
+
+def smGetThicknessInfo(shape, face) -> SMThicknessInfo:
+    '''Measure the sheet thickness of a shape under a face, using ray/face
+       intersections from a few points of the face. Results are memoised.'''
+    return smMemoThickness(shape, ("ray", smFaceKey(face)),
+                           lambda: _smMeasureThickness(shape, face))
+
 def smGetThickness(obj, foldface):
-    normal = foldface.normalAt(0, 0)
     theVol = obj.Volume
     if theVol < 0.0001:
         SMLogger.error(
@@ -882,16 +1212,10 @@ def smGetThickness(obj, foldface):
             )
         )
         return 0
-
-    # Make a first estimate of the thickness
-    estimated_thk = theVol / (foldface.Area)
-    #  p1 = foldface.CenterOfMass
-    p1 = foldface.Vertexes[0].Point
-    p2 = p1 + estimated_thk * -1.5 * normal
-    e1 = Part.makeLine(p1, p2)
-    thkedge = obj.common(e1)
-    thk = thkedge.Length
-    return thk
+    info = smGetThicknessInfo(obj, foldface)
+    if info.confidence < 0.5:
+        SMLogger.log(f"Low confidence thickness measurement: {info}")
+    return info.thickness
 
 def smGetFaceByEdge(selItem, obj):
     selFace = None
@@ -972,6 +1296,208 @@ def smConvertPlaneToFace(planeShape):
     return datumFace
 
 
+def smMultiFuse(shapes):
+    ''' Fuse a list of shapes in a single boolean operation. Falls back to
+        fusing them one by one if the multi-operand fuse fails '''
+    if len(shapes) == 1:
+        return shapes[0]
+    try:
+        result = shapes[0].multiFuse(shapes[1:])
+        if result.isValid():
+            return result
+    except Part.OCCError:
+        pass
+    SMLogger.log("multiFuse failed, fusing shapes one by one")
+    result = shapes[0]
+    for shape in shapes[1:]:
+        result = result.fuse(shape)
+    return result
+
+def smMultiCut(base, tools):
+    ''' Cut a list of tool shapes from base in a single boolean operation.
+        Falls back to cutting with the fused tools if that fails '''
+    try:
+        result = base.cut(tools)
+        if result.isValid() and len(result.Solids) > 0:
+            return result
+    except Part.OCCError:
+        pass
+    SMLogger.log("multi tool cut failed, cutting with fused tools")
+    return base.cut(smMultiFuse(tools))
+
+def smEdgeFaceMap(faces):
+    ''' Map each edge hash to the list of (faceIdx, edge) of the faces using it '''
+    edgeMap = {}
+    for i, face in enumerate(faces):
+        for edge in face.Edges:
+            edgeMap.setdefault(edge.hashCode(), []).append((i, edge))
+    return edgeMap
+
+def _smSharedEdgePairs(edgeMap):
+    ''' Yield pairs of face indexes sharing an edge. Hash codes may collide,
+        so shared edges are confirmed with isSame() '''
+    for users in edgeMap.values():
+        for k, (i, edge1) in enumerate(users):
+            for j, edge2 in users[k + 1:]:
+                if i != j and edge1.isSame(edge2):
+                    yield i, j
+
+def smFindConnectedFaces(faces):
+    ''' Group faces into lists of faces connected by shared edges.
+        Uses an edge keyed map and union-find, so it runs in about linear time.
+        Groups are ordered by their first face, faces keep their original order '''
+    if hasattr(faces, "Faces"):
+        faces = faces.Faces
+    parent = list(range(len(faces)))
+
+    def find(i):
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:  # path compression
+            parent[i], i = root, parent[i]
+        return root
+
+    for i, j in _smSharedEdgePairs(smEdgeFaceMap(faces)):
+        rootI, rootJ = find(i), find(j)
+        if rootI != rootJ:
+            parent[max(rootI, rootJ)] = min(rootI, rootJ)
+    groups = {}
+    for i, face in enumerate(faces):
+        groups.setdefault(find(i), []).append(face)
+    return list(groups.values())
+
+def smFacesConnectedToFace(faces, face):
+    ''' List the faces sharing at least one edge with 'face' '''
+    if hasattr(faces, "Faces"):
+        faces = faces.Faces
+    edgeMap = smEdgeFaceMap(faces)
+    result = []
+    resultIdxs = set()
+    for edge in face.Edges:
+        for i, otherEdge in edgeMap.get(edge.hashCode(), []):
+            if (i not in resultIdxs and not faces[i].isSame(face)
+                    and otherEdge.isSame(edge)):
+                resultIdxs.add(i)
+                result.append(faces[i])
+    return result
+
+def smBoxOverlapPairs(boxes, tolerance = 0.0):
+    ''' Set of (i, j) index pairs, i < j, of bounding boxes overlapping each
+        other after being enlarged by 'tolerance'.
+        Sweep and prune: boxes are sorted along X and only boxes whose X
+        ranges overlap are tested on all axes '''
+    order = sorted(range(len(boxes)), key=lambda i: boxes[i].XMin)
+    pairs = set()
+    active = []
+    for i in order:
+        bb = boxes[i]
+        active = [j for j in active if boxes[j].XMax + 2 * tolerance >= bb.XMin]
+        for j in active:
+            other = boxes[j]
+            if (other.YMin - tolerance <= bb.YMax + tolerance
+                    and bb.YMin - tolerance <= other.YMax + tolerance
+                    and other.ZMin - tolerance <= bb.ZMax + tolerance
+                    and bb.ZMin - tolerance <= other.ZMax + tolerance):
+                pairs.add((min(i, j), max(i, j)))
+        active.append(i)
+    return pairs
+
+
+class SMFaceBuckets:
+    ''' Spatial hash of the planar and cylindrical faces of a shape, used to find
+        faces lying opposite to each other across the sheet without comparing
+        every pair of faces.
+        Planar faces are bucketed by normal direction and plane offset,
+        cylindrical faces by axis line. Other faces are kept in a plain list. '''
+    def __init__(self, faces, binSize = 1e-3):
+        self.faces = faces
+        self.binSize = binSize
+        self.directions = []  # representative unit directions
+        self.axisLines = []   # representative (dirIdx, point) of cylinder axis lines
+        self.planes = {}      # (dirIdx, offsetBin) -> [(faceIdx, normalSign, offset)]
+        self.planeInfo = {}   # faceIdx -> (dirIdx, normalSign, offset)
+        self.cylinders = {}   # axisLineIdx -> [(faceIdx, radius)]
+        self.others = []
+        for i, face in enumerate(faces):
+            surfType = face.Surface.TypeId
+            if surfType == "Part::GeomPlane":
+                self._addPlane(i, face)
+            elif surfType == "Part::GeomCylinder":
+                self._addCylinder(i, face)
+            else:
+                self.others.append(i)
+
+    def _directionIndex(self, vec):
+        ''' Index of the representative direction parallel to vec, and the sign
+            of vec relative to it '''
+        vec = FreeCAD.Vector(vec).normalize()
+        for i, dirVec in enumerate(self.directions):
+            dot = dirVec.dot(vec)
+            if abs(abs(dot) - 1.0) < smEpsilon:
+                return i, 1 if dot > 0 else -1
+        self.directions.append(vec)
+        return len(self.directions) - 1, 1
+
+    def _offsetBin(self, offset):
+        return int(math.floor(offset / self.binSize))
+
+    def _addPlane(self, i, face):
+        dirIdx, sign = self._directionIndex(face.normalAt(0, 0))
+        offset = self.directions[dirIdx].dot(face.Surface.Position)
+        key = (dirIdx, self._offsetBin(offset))
+        self.planes.setdefault(key, []).append((i, sign, offset))
+        self.planeInfo[i] = (dirIdx, sign, offset)
+
+    def _addCylinder(self, i, face):
+        surface = face.Surface
+        dirIdx, _sign = self._directionIndex(surface.Axis)
+        center = surface.Center
+        for lineIdx, (lineDirIdx, point) in enumerate(self.axisLines):
+            if lineDirIdx == dirIdx and center.distanceToLine(
+                    point, self.directions[dirIdx]) < smEpsilon:
+                break
+        else:
+            self.axisLines.append((dirIdx, center))
+            lineIdx = len(self.axisLines) - 1
+        self.cylinders.setdefault(lineIdx, []).append((i, surface.Radius))
+
+    def oppositePlanes(self, faceIdx, distance, tolerance = smEpsilon):
+        ''' Indexes of the planar faces with an opposite normal, lying at
+            'distance' from the planar face 'faceIdx' '''
+        if faceIdx not in self.planeInfo:
+            return []
+        dirIdx, sign, offset = self.planeInfo[faceIdx]
+        result = []
+        for target in (offset - distance, offset + distance):
+            targetBin = self._offsetBin(target)
+            for offsetBin in (targetBin - 1, targetBin, targetBin + 1):
+                for j, otherSign, otherOffset in self.planes.get((dirIdx, offsetBin), []):
+                    if (otherSign != sign and j != faceIdx
+                            and abs(otherOffset - target) < tolerance):
+                        result.append(j)
+        return result
+
+    def oppositePairCandidates(self, distance, tolerance = smEpsilon):
+        ''' Yield (i, j) index pairs, i < j, of faces that may lie opposite to
+            each other at 'distance'. Faces other than planes and cylinders are
+            paired with every other face. '''
+        for i in self.planeInfo:
+            for j in self.oppositePlanes(i, distance, tolerance):
+                if i < j:
+                    yield i, j
+        for cylinders in self.cylinders.values():
+            for i, radius1 in cylinders:
+                for j, radius2 in cylinders:
+                    if i < j and abs(abs(radius1 - radius2) - distance) < tolerance:
+                        yield i, j
+        others = set(self.others)
+        for i in self.others:
+            for j in range(len(self.faces)):
+                if j != i and not (j in others and j < i):
+                    yield min(i, j), max(i, j)
+
+
 class SMLogger:
     @classmethod
     def error(cls, *args):
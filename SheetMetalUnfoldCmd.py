@@ -26,9 +26,11 @@
 
 import os
 import sys
+import time
 import Part
 import FreeCAD
 import SheetMetalKfactor
+import SheetMetalParallel
 import SheetMetalTools
 import SheetMetalUnfolder
 
@@ -68,6 +70,7 @@ smUnfoldDefaultVars = [
     "KFactorStandard", 
     "GenerateSketch",
     "SeparateSketchLayers",
+    "SketchType",
 ]
 smUnfoldNonSavedDefaultVars = [
     "UnfoldTransparency",
@@ -87,6 +90,80 @@ KFACTOR = 0.40
 ##########################################################################################################
 # Helper functions
 ##########################################################################################################
+
+# Parsed material definition sheets. Only used during batch runs (see
+# SheetMetalDesignTable.py), where the sheets are not edited between recomputes
+smMaterialTableCache = None
+
+def smUseMaterialTableCache(enable = True):
+    ''' Enable (and empty) or disable the material definition sheet cache '''
+    global smMaterialTableCache
+    smMaterialTableCache = {} if enable else None
+
+def smGetMaterialTable(key, parseFunc):
+    if smMaterialTableCache is None:
+        return parseFunc()
+    if key not in smMaterialTableCache:
+        smMaterialTableCache[key] = parseFunc()
+    return smMaterialTableCache[key]
+
+def smUnfoldRaceEnabled():
+    ''' Race mode runs both unfolders in worker processes and takes the first valid result '''
+    return (
+        NewUnfolderAvailable
+        and SheetMetalTools.params.GetBool("UnfoldRaceMode", False)
+        and SheetMetalParallel.smCanUseWorkers()
+    )
+
+class SMShapeHolder:
+    ''' Stands in for the base object inside worker processes. It has all the
+        attributes the unfolders read: Shape, Placement, Name, Label and, if the
+        base object has it, Refine '''
+    def __init__(self, shape, name, label, refine = None):
+        self.Shape = shape
+        self.Placement = shape.Placement
+        self.Name = name
+        self.Label = label
+        if refine is not None:
+            self.Refine = refine
+
+def smCheckV1Error(errCode):
+    ''' Raise the error code returned by the V1 unfolder as an UnfoldException '''
+    if errCode:
+        raise UnfoldException(
+            translate("SheetMetal", "V1 unfolder failed: {}").format(
+                SheetMetalUnfolder.unfold_error.get(errCode, errCode)
+            )
+        )
+
+def smUnfoldV1Job(brep, baseFace, kFactorTable, kFactorStandard, name, label, refine = None):
+    solid = SMShapeHolder(SheetMetalParallel.shapeFromBrep(brep), name, label, refine)
+    shape, foldComp, norm, _thename, err_cd, _fSel, _obN = SheetMetalUnfolder.getUnfold(
+        kFactorTable, solid, baseFace, kFactorStandard
+    )
+    smCheckV1Error(err_cd)
+    if shape is None or shape.isNull() or not shape.isValid():
+        raise UnfoldException("V1 unfolder did not return a valid shape")
+    return (
+        SheetMetalParallel.shapeToBrep(shape),
+        SheetMetalParallel.shapeToBrep(foldComp),
+        tuple(norm),
+    )
+
+def smUnfoldV2Job(brep, baseFace, bac, name, label, refine = None):
+    solid = SMShapeHolder(SheetMetalParallel.shapeFromBrep(brep), name, label, refine)
+    sel_face, unfolded_shape, bend_lines, root_normal = SheetMetalNewUnfolder.getUnfold(
+        bac, solid, baseFace
+    )
+    if unfolded_shape is None or unfolded_shape.isNull() or not unfolded_shape.isValid():
+        raise UnfoldException("V2 unfolder did not return a valid shape")
+    return (
+        SheetMetalParallel.shapeToBrep(sel_face),
+        SheetMetalParallel.shapeToBrep(unfolded_shape),
+        SheetMetalParallel.shapeToBrep(bend_lines),
+        tuple(root_normal),
+    )
+
 def smUnfoldExportSketches(obj, useDialog = True):
     if len(obj.UnfoldSketches) == 0:
         return
@@ -178,6 +255,35 @@ class SMUnfold:
             ),
             False,
         )
+        SheetMetalTools.smAddProperty(
+            obj,
+            "App::PropertyString",
+            "UnfoldEngine",
+            translate("SheetMetal", "Unfolder that produced the unfolded shape"),
+            "",
+            readOnly = True,
+            attribs = 8, # Output only - no recompute if changed
+        )
+        SheetMetalTools.smAddProperty(
+            obj,
+            "App::PropertyString",
+            "UnfoldTimings",
+            translate("SheetMetal", "Outcome and run time of the unfolders"),
+            "",
+            readOnly = True,
+            attribs = 8, # Output only - no recompute if changed
+        )
+        SheetMetalTools.smAddEnumProperty(
+            obj,
+            "SketchType",
+            translate(
+                "SheetMetal",
+                "Type of the generated unfold objects: sketches, or lightweight 2D shapes "
+                "without sketch solver",
+            ),
+            ["Sketch", "Shape"],
+            "Sketch",
+        )
         SheetMetalTools.smAddProperty(
             obj,
             "App::PropertyStringList",
@@ -216,18 +322,35 @@ class SMUnfold:
             if not isVisible:
                 obj.Proxy.visibleSketches = visibleSketches
 
+    def getBendAllowanceCalculator(self, obj):
+        if obj.MaterialSheet in ["_manual", "_none"]:
+            return BendAllowanceCalculator.from_single_value(obj.KFactor, obj.KFactorStandard)
+        sheet = FreeCAD.ActiveDocument.getObject(obj.MaterialSheet)
+        return smGetMaterialTable(
+            ("V2", sheet.Document.Name, sheet.Name),
+            lambda: BendAllowanceCalculator.from_spreadsheet(sheet),
+        )
+
+    def getKFactorTable(self, obj):
+        kFactorTable = {1: obj.KFactor}
+        if obj.MaterialSheet != "_manual" and obj.MaterialSheet != "_none":
+            lookupTable = smGetMaterialTable(
+                ("V1", FreeCAD.ActiveDocument.Name, obj.MaterialSheet),
+                lambda: SheetMetalKfactor.KFactorLookupTable(obj.MaterialSheet),
+            )
+            kFactorTable = lookupTable.k_factor_lookup
+        return kFactorTable
+
     def newUnfolder(self, obj, baseObject, baseFace):
         ''' Use new unfolder system '''
         FreeCAD.Console.PrintMessage("Using V2 unfolding system\n")
-        if obj.MaterialSheet in ["_manual", "_none"]:
-            bac = BendAllowanceCalculator.from_single_value(obj.KFactor, obj.KFactorStandard)
-        else:
-            sheet = FreeCAD.ActiveDocument.getObject(obj.MaterialSheet)
-            bac = BendAllowanceCalculator.from_spreadsheet(sheet)
+        bac = self.getBendAllowanceCalculator(obj)
         sel_face, unfolded_shape, bend_lines, root_normal = SheetMetalNewUnfolder.getUnfold(
             bac, baseObject, baseFace
         )
+        return self.newUnfolderSketches(obj, sel_face, unfolded_shape, bend_lines, root_normal)
 
+    def newUnfolderSketches(self, obj, sel_face, unfolded_shape, bend_lines, root_normal):
         sketches = []
         if obj.GenerateSketch and unfolded_shape is not None:
             sketches = SheetMetalNewUnfolder.getUnfoldSketches(
@@ -240,21 +363,21 @@ class SMUnfold:
                 obj.Proxy.SketchColor,
                 obj.Proxy.InternalColor,
                 obj.Proxy.BendLineColor,
+                as_shapes=obj.SketchType == "Shape",
             )
         return unfolded_shape, sketches
 
     def oldUnfolder(self, obj, baseObject, baseFace):
         ''' Use old unfolder system '''
         FreeCAD.Console.PrintMessage("Using V1 unfolding system\n")
-        kFactorTable = {1: obj.KFactor}
-        if obj.MaterialSheet != "_manual" and obj.MaterialSheet != "_none":
-            lookupTable = SheetMetalKfactor.KFactorLookupTable(obj.MaterialSheet)
-            kFactorTable = lookupTable.k_factor_lookup
-
-        shape, foldComp, norm, _thename, _err_cd, _fSel, _obN = SheetMetalUnfolder.getUnfold(
+        kFactorTable = self.getKFactorTable(obj)
+        shape, foldComp, norm, _thename, err_cd, _fSel, _obN = SheetMetalUnfolder.getUnfold(
             kFactorTable, baseObject, baseFace, obj.KFactorStandard
         )
+        smCheckV1Error(err_cd)
+        return self.oldUnfolderSketches(obj, shape, foldComp, norm)
 
+    def oldUnfolderSketches(self, obj, shape, foldComp, norm):
         sketches = []
         if obj.GenerateSketch and shape is not None:
             sketches = SheetMetalUnfolder.getUnfoldSketches(
@@ -266,9 +389,67 @@ class SMUnfold:
                 obj.Proxy.SketchColor,
                 bendSketchColor=obj.Proxy.InternalColor,
                 internalSketchColor=obj.Proxy.BendLineColor,
+                asShapes=obj.SketchType == "Shape",
             )
         return shape, sketches
 
+    def raceUnfolders(self, obj, baseObject, baseFace, preferred):
+        ''' Run both unfolder systems in worker processes, use the first valid result '''
+        FreeCAD.Console.PrintMessage("Racing V1 and V2 unfolding systems\n")
+        brep = SheetMetalParallel.shapeToBrep(baseObject.Shape)
+        refine = getattr(baseObject, "Refine", None)
+        jobs = {}
+        # the material definition sheet may suit only one of the unfolders
+        try:
+            jobs["V1"] = (
+                smUnfoldV1Job,
+                (brep, baseFace, self.getKFactorTable(obj), obj.KFactorStandard,
+                 baseObject.Name, baseObject.Label, refine),
+            )
+        except ValueError as e:
+            SMLogger.log(f"V1 unfolder left out of the race: {e}")
+        try:
+            jobs["V2"] = (
+                smUnfoldV2Job,
+                (brep, baseFace, self.getBendAllowanceCalculator(obj),
+                 baseObject.Name, baseObject.Label, refine),
+            )
+        except ValueError as e:
+            SMLogger.log(f"V2 unfolder left out of the race: {e}")
+        winner, result, timings = SheetMetalParallel.smRaceJobs(
+            jobs,
+            SheetMetalTools.params.GetFloat("UnfoldRaceTimeout", 120.0),
+            preferred,
+            SheetMetalTools.params.GetFloat("UnfoldRaceGrace", 2.0),
+        )
+        obj.UnfoldEngine = winner or ""
+        obj.UnfoldTimings = ", ".join(
+            f"{name}: {status} {seconds:.2f} s"
+            for name, (status, seconds) in sorted(timings.items())
+        )
+        if winner is None:
+            raise UnfoldException(
+                translate("SheetMetal", "No unfolder returned a valid shape: {}").format(
+                    obj.UnfoldTimings
+                )
+            )
+        if winner == "V1":
+            shape, foldComp, norm = result
+            return self.oldUnfolderSketches(
+                obj,
+                SheetMetalParallel.shapeFromBrep(shape),
+                SheetMetalParallel.shapeFromBrep(foldComp),
+                FreeCAD.Vector(*norm),
+            )
+        sel_face, unfolded_shape, bend_lines, root_normal = result
+        return self.newUnfolderSketches(
+            obj,
+            SheetMetalParallel.shapeFromBrep(sel_face).Faces[0],
+            SheetMetalParallel.shapeFromBrep(unfolded_shape),
+            SheetMetalParallel.shapeFromBrep(bend_lines),
+            FreeCAD.Vector(*root_normal),
+        )
+
     def execute(self, fp):
         '''"Print a short message when doing a recomputation, this method is mandatory"'''
         self.addVerifyProperties(fp)
@@ -276,9 +457,19 @@ class SMUnfold:
         if baseObj is None:
             baseObj = fp.baseObject[0]
         if not NewUnfolderAvailable or SheetMetalTools.use_old_unfolder():
-            shape, sketches = self.oldUnfolder(fp, baseObj, baseFace)
+            preferred = "V1"
         else:
-            shape, sketches = self.newUnfolder(fp, baseObj, baseFace)
+            preferred = "V2"
+        if smUnfoldRaceEnabled():
+            shape, sketches = self.raceUnfolders(fp, baseObj, baseFace, preferred)
+        else:
+            startTime = time.perf_counter()
+            if preferred == "V1":
+                shape, sketches = self.oldUnfolder(fp, baseObj, baseFace)
+            else:
+                shape, sketches = self.newUnfolder(fp, baseObj, baseFace)
+            fp.UnfoldEngine = preferred
+            fp.UnfoldTimings = f"{preferred}: ok {time.perf_counter() - startTime:.2f} s"
      
         fp.Shape = shape
         parent = SheetMetalTools.smGetParentBody(fp)
@@ -286,7 +477,12 @@ class SMUnfold:
         for sketch in sketches:
             if sketch is not None:
                 sketchList.append(sketch.Name)
-                if parent is not None and SheetMetalTools.smGetParentBody(sketch) is None:
+                # solver free shapes can't be put into a PartDesign body
+                if (
+                    parent is not None
+                    and SheetMetalTools.smIsSketchObject(sketch)
+                    and SheetMetalTools.smGetParentBody(sketch) is None
+                ):
                     parent.addObject(sketch)
 
         # remove non used sketches
@@ -625,33 +821,49 @@ if SheetMetalTools.isGuiLoaded():
                     "SheetMetal",
                     "Flatten folded sheet metal object with default options\n"
                     "1. Select flat face on sheetmetal shape.\n"
+                    "   Select one face on each of several shapes to unfold them at once,\n"
+                    "   identical shapes are unfolded only once.\n"
                     "2. Click this command to unfold the object with last used parameters.",
                 ),
             }
 
         def Activated(self):
-            sel = Gui.Selection.getSelectionEx()[0]
-            selobj = sel.Object
-            selparent = SheetMetalTools.smGetParentBody(selobj)
-            name = "Unfold" if selparent is None else f"{selparent.Label}_Unfold"
-            newObj, activeBody = SheetMetalTools.smCreateNewObject(selobj, name, False)
-            if newObj is None:
-                return
-            SMUnfold(newObj, selobj, sel.SubElementNames)
-            SMUnfoldViewProvider(newObj.ViewObject)
-            SheetMetalTools.smAddNewObject(selobj, newObj, activeBody)
-            selobj.Visibility = True
+            # identical parts are unfolded once, the others are listed in the report view
+            groups = SheetMetalTools.smGroupByFingerprint(
+                Gui.Selection.getSelectionEx(), lambda sel: Part.getShape(sel.Object)
+            )
+            for _fingerprint, selections in groups:
+                sel = selections[0]
+                selobj = sel.Object
+                selparent = SheetMetalTools.smGetParentBody(selobj)
+                name = "Unfold" if selparent is None else f"{selparent.Label}_Unfold"
+                newObj, activeBody = SheetMetalTools.smCreateNewObject(selobj, name, False)
+                if newObj is None:
+                    return
+                SMUnfold(newObj, selobj, sel.SubElementNames)
+                SMUnfoldViewProvider(newObj.ViewObject)
+                SheetMetalTools.smAddNewObject(selobj, newObj, activeBody)
+                selobj.Visibility = True
+                if len(selections) > 1:
+                    SMLogger.message(
+                        translate("Logger", "{} unfolds {} identical parts: {}").format(
+                            newObj.Label,
+                            len(selections),
+                            ", ".join(s.Object.Label for s in selections),
+                        )
+                    )
             return
 
         def IsActive(self):
-            if (
-                len(Gui.Selection.getSelection()) != 1
-                or len(Gui.Selection.getSelectionEx()[0].SubElementNames) != 1
-            ):
+            selections = Gui.Selection.getSelectionEx()
+            if len(selections) == 0:
                 return False
-            selFace = Gui.Selection.getSelectionEx()[0].SubObjects[0]
-
-            return isinstance(selFace.Surface, Part.Plane)
+            for sel in selections:
+                if len(sel.SubElementNames) != 1:
+                    return False
+                if not isinstance(sel.SubObjects[0].Surface, Part.Plane):
+                    return False
+            return True
 
 
     Gui.addCommand("SheetMetal_UnattendedUnfold", SMUnfoldUnattendedCommandClass())
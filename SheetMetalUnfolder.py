@@ -109,7 +109,7 @@ import time
 import Part
 import FreeCAD
 from FreeCAD import Base
-import Draft
+import Sketcher
 import SheetMetalTools
 
 # import traceback
@@ -126,6 +126,12 @@ from lookup import get_val_from_range
 import tempfile
 from math import sqrt
 
+# numpy is optional, bend vertexes are unbent point by point without it
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 from SheetMetalLogger import SMLogger, UnfoldException, BendException, TreeException
 
 
@@ -164,6 +170,7 @@ unfold_error = {
     24: ("Unfold: bend-face without child not implemented"),
     25: ("Unfold: "),
     26: ("Unfold: not handled curve type in unbendFace"),
+    27: ("Unfold: edges of a face do not form a connected wire"),
     -1: ("Unknown error"),
 }
 
@@ -290,6 +297,65 @@ def radial_vector(point, axis_pnt, axis):
     # Part.show(test_line)
     return perp.normalize()
 
+
+def unbend_points(points, cent, axis, nullVec, tanVec, transRad, compRadialVec=None):
+    """
+    Unbend a list of points of a bend around the axis through cent.
+    The angle of each point is measured from nullVec, the point is rotated
+    back by that angle and shifted by transRad * angle along tanVec.
+    With compRadialVec the points are also moved radially onto the sheet
+    plane given by compRadialVec (top or counter face).
+    All points are mapped in one pass if numpy is available.
+    """
+    if not points:
+        return []
+    if np is None:
+        result = []
+        for poi in points:
+            radVec = radial_vector(poi, cent, axis)
+            angle = math.atan2(nullVec.cross(radVec).dot(axis), nullVec.dot(radVec))
+            if angle < -math.pi / 8:
+                angle = angle + 2 * math.pi
+            vec = poi.sub(cent)
+            phi = -angle
+            rotVec = (
+                axis.cross(vec).cross(axis).multiply(math.cos(phi))
+                + axis.cross(vec) * math.sin(phi)
+                + axis * axis.dot(vec)
+            )
+            bPoint = cent + rotVec + tanVec * transRad * angle
+            if compRadialVec is not None:
+                norm = axis.cross(cent.sub(cent + rotVec))
+                bPoint = bPoint + compRadialVec.sub(axis.cross(norm))
+            result.append(bPoint)
+        return result
+
+    pts = np.array([(p.x, p.y, p.z) for p in points], dtype=float)
+    c = np.array((cent.x, cent.y, cent.z))
+    a = np.array((axis.x, axis.y, axis.z))
+    n0 = np.array((nullVec.x, nullVec.y, nullVec.z))
+    vecs = pts - c
+    # radial_vector() for all points
+    radVecs = np.cross(a, np.cross(a, -vecs))
+    lengths = np.linalg.norm(radVecs, axis=1)
+    radVecs /= np.where(lengths > 0.0, lengths, 1.0)[:, None]
+    angles = np.arctan2(np.cross(n0, radVecs) @ a, radVecs @ n0)
+    angles = np.where(angles < -math.pi / 8, angles + 2 * math.pi, angles)
+    # rotate by -angle around the axis, see SheetTree.rotateVec()
+    axVecs = np.cross(a, vecs)
+    rotVecs = (
+        np.cross(axVecs, a) * np.cos(-angles)[:, None]
+        + axVecs * np.sin(-angles)[:, None]
+        + np.outer(vecs @ a, a)
+    )
+    tan = np.array((tanVec.x, tanVec.y, tanVec.z))
+    mapped = c + rotVecs + np.outer(angles * transRad, tan)
+    if compRadialVec is not None:
+        comp = np.array((compRadialVec.x, compRadialVec.y, compRadialVec.z))
+        mapped += comp - np.cross(a, np.cross(a, -rotVecs))
+    return [FreeCAD.Vector(*row) for row in mapped.tolist()]
+
+
 def equal_edge(edg1, edg2, p=5):
     result = True
     if len(edg1.Vertexes) > 1:
@@ -354,6 +420,7 @@ class Simple_node(object):
         self.oppositePoint = None  # Point of a vertex on the opposite site, used to align points to the sheet plane
         self.vertexDict = {}  # Vertexes of a bend, original and unbend coordinates, flags p, c, t, o
         self.edgeDict = {}  # Unbend edges dictionary, key is a combination of indexes to vertexDict.
+        self.unbendCache = {}  # Unbend points of a bend, key is the mode and the rounded original point
         self._trans_length = None  # Length of translation for Bend nodes
         self.analysis_ok = (
             True  # Indicator if something went wrong with the analysis of the face
@@ -474,6 +541,7 @@ class SheetTree(object):
         self.failed_face_idx = None
         self.k_factor_lookup = k_factor_lookup
         self.wire_replacements = []  # list of wires to be replaced during unfold shape creation
+        self.face_buckets = None  # planar faces bucketed by normal and offset, see find_counter_face
 
         if not self.__Shape.isValid():
             warn_print("The shape is not valid!")
@@ -533,69 +601,20 @@ class SheetTree(object):
         debug_print("It is a: " + str(F_type))
         debug_print("Orientation: " + str(self.__Shape.Faces[f_idx].Orientation))
 
-        # Need a point on the surface to measure the thickness.
-        # Sheet edges could be sloping, so there is a danger to measure
-        # right at the edge.
-        # Try with Arithmetic mean of plane vertices
-        m_vec = Base.Vector(0.0, 0.0, 0.0)  # calculating a mean vector
-        for Vvec in self.__Shape.Faces[f_idx].Vertexes:
-            # m_vec = m_vec.add(Base.Vector(Vvec.X, Vvec.Y, Vvec.Z))
-            m_vec = m_vec.add(Vvec.Point)
-        mvec = m_vec.multiply(1.0 / len(self.__Shape.Faces[f_idx].Vertexes))
-        debug_print("mvec: " + str(mvec))
-
-        # if hasattr(self.__Shape.Faces[f_idx].Surface,'Position'):
-        # s_Posi = self.__Shape.Faces[f_idx].Surface.Position
-        # k = 0
-        # while k < len(self.__Shape.Faces[f_idx].Vertexes):
-        # FIXME: what if measurepoint is outside?
-
-        if self.__Shape.isInside(mvec, 0.00001, True):
-            measure_pos = mvec
-            gotValidMeasurePosition = True
-        else:
-            gotValidMeasurePosition = False
-            for pvert in self.__Shape.Faces[f_idx].OuterWire.Vertexes:
-                # pvert = self.__Shape.Faces[f_idx].Vertexes[k]
-                pvec = Base.Vector(pvert.X, pvert.Y, pvert.Z)
-                shiftvec = mvec.sub(pvec)
-                shiftvec = shiftvec.normalize() * 2.0 * estimated_thickness
-                measure_pos = pvec.add(shiftvec)
-                if self.__Shape.isInside(measure_pos, 0.00001, True):
-                    gotValidMeasurePosition = True
-                    break
-
-        # Description: Checks if a point is inside a solid with a certain tolerance.
-        # If the 3rd parameter is True a point on a face is considered as inside
-        # if not self.__Shape.isInside(measure_pos, 0.00001, True):
-        if not gotValidMeasurePosition:
-            warn_print("Starting measure_pos for thickness measurement is outside!")
+        # Measure the thickness with the shared thickness service, it is
+        # memoised for the following features and unfold runs of this shape.
+        thicknessInfo = SheetMetalTools.smGetThicknessInfo(
+            self.__Shape, self.__Shape.Faces[f_idx]
+        )
+        debug_print("measured Thickness: " + str(thicknessInfo))
+        if not thicknessInfo:
+            # no sample point of the face gave a thickness
+            warn_print("No valid position for thickness measurement on the face!")
             self.error_code = 2
             self.failed_face_idx = f_idx
+            return
+        self.__thickness = thicknessInfo.thickness
 
-        surface = get_surface(self.__Shape.Faces[f_idx])
-        s_Axis = surface.Axis
-        s_Posi = surface.Position
-        # print 'We have a position: ', s_Posi
-        s_Axismp = Base.Vector(s_Axis.x, s_Axis.y, s_Axis.z).multiply(
-            2.0 * estimated_thickness
-        )
-        # Part.show(Meassure_axis)
-        Meassure_axis = Part.makeLine(measure_pos, measure_pos.sub(s_Axismp))
-        ext_Vec = Base.Vector(-s_Axis.x, -s_Axis.y, -s_Axis.z)
-
-        lostShape = self.__Shape.copy()
-        lLine = Meassure_axis.common(lostShape)
-        lLine = Meassure_axis.common(self.__Shape)
-        debug_print("lLine number edges: " + str(len(lLine.Edges)))
-        measVert = Part.Vertex(measure_pos)
-        for mEdge in lLine.Edges:
-            if equal_vertex(mEdge.Vertexes[0], measVert) or equal_vertex(
-                mEdge.Vertexes[1], measVert
-            ):
-                self.__thickness = mEdge.Length
-
-        # self.__thickness = lLine.Length
         if (self.__thickness < estimated_thickness) or (
             self.__thickness > 1.9 * estimated_thickness
         ):
@@ -607,7 +626,6 @@ class SheetTree(object):
                 + " measured thickness: "
                 + str(self.__thickness)
             )
-            Part.show(lLine, "Measurement_Thickness_trial")
 
     def get_node_faces(self, theNode, wires_e_lists):
         """This function searches for all faces making up the node, except
@@ -1771,8 +1789,19 @@ class SheetTree(object):
         min_distance = 0.0
         normal = self.face_normal(face)
 
-        # iterate on all faces to try to find the opposite face
-        for i, other_face in enumerate(self.__Shape.Faces):
+        # planar faces are looked up in the normal/offset buckets, only the
+        # faces at +/- thickness are checked. Other faces check all faces.
+        if self.face_buckets is None:
+            self.face_buckets = SheetMetalTools.SMFaceBuckets(self.__Shape.Faces)
+        if face_idx in self.face_buckets.planeInfo:
+            candidates = self.face_buckets.oppositePlanes(
+                face_idx, self.__thickness, self.cFaceTol
+            )
+        else:
+            candidates = range(len(self.__Shape.Faces))
+
+        for i in candidates:
+            other_face = self.__Shape.Faces[i]
             if i != face_idx:
                 # the counter face normal must be parallel to the face normal, and pointing in the opposite direction
                 # thus the dot product of the normals must be -1
@@ -2106,6 +2135,7 @@ class SheetTree(object):
 
         normVec = radial_vector(bend_node.p_edge.Vertexes[0].Point, cent, axis)
 
+        compRadialVec = None
         if mode == "top":
             chord = cent.sub(bend_node.p_edge.Vertexes[0].Point)
             norm = axis.cross(chord)
@@ -2116,25 +2146,35 @@ class SheetTree(object):
             norm = axis.cross(chord)
             compRadialVec = axis.cross(norm)
 
-        def unbendPoint(poi):
-            radVec = radial_vector(poi, cent, axis)
-            angle = math.atan2(nullVec.cross(radVec).dot(axis), nullVec.dot(radVec))
-            # print 'point Face', str(fIdx+1), ' ', angle
-            if angle < -math.pi / 8:
-                angle = angle + 2 * math.pi
-            rotVec = self.rotateVec(poi.sub(cent), -angle, axis)
-            # print 'point if Face', str(fIdx+1), ' ', angle, ' ', transRad*angle
-            if (mode == "top") or (mode == "counter"):
-                chord = cent.sub(cent + rotVec)
-                norm = axis.cross(chord)
-                correctionVec = compRadialVec.sub(axis.cross(norm))
-                # correctionVec = axis.cross(norm).sub(compRadialVec)
-                # print 'origVec ', axis.cross(norm), ' compRadialVec ', compRadialVec
-                bPoint = cent + rotVec + correctionVec + tanVec * transRad * angle
-            else:
-                bPoint = cent + rotVec + tanVec * transRad * angle
+        # Unbend points are cached per bend node and mode, so the sample
+        # points of a curve and the vertexes shared by several side faces
+        # are only mapped once.
+        cacheMode = mode if mode in ("top", "counter") else "side"
+
+        def cacheKey(poi):
+            return (cacheMode, round(poi.x, 7), round(poi.y, 7), round(poi.z, 7))
+
+        def unbendPoints(pointList):
+            keys = [cacheKey(poi) for poi in pointList]
+            missing = {}
+            for key, poi in zip(keys, pointList):
+                if key not in bend_node.unbendCache:
+                    missing[key] = poi
+            if missing:
+                mapped = unbend_points(
+                    list(missing.values()),
+                    cent,
+                    axis,
+                    nullVec,
+                    tanVec,
+                    transRad,
+                    compRadialVec,
+                )
+                bend_node.unbendCache.update(zip(missing.keys(), mapped))
+            return [bend_node.unbendCache[key] for key in keys]
 
-            return bPoint
+        def unbendPoint(poi):
+            return unbendPoints([poi])[0]
 
         divisions = 12  # FIXME need a dependence on something useful.
 
@@ -2145,6 +2185,9 @@ class SheetTree(object):
         for aWire in fWireList:
             uEdge = None
             idxList, closedW = self.sortEdgesTolerant(aWire.Edges)
+            if not closedW and len(idxList) < len(aWire.Edges):
+                self.error_code = 27
+                self.failed_face_idx = fIdx
             # print('Wire', str(fIdx+1), ' has ', len(idxList), ' edges, closed: ', closedW)
 
             eList = []  # is the list of unbend edges
@@ -2214,7 +2257,11 @@ class SheetTree(object):
 
                 urollPts = []
 
-                if "<Ellipse object>" in eType:
+                if mode == "side" and edgeKey in bend_node.edgeDict:
+                    # unbent before as a top or counter edge, no need to
+                    # sample the curve again
+                    uEdge = bend_node.edgeDict[edgeKey]
+                elif "<Ellipse object>" in eType:
                     minPar, maxPar = fEdge.ParameterRange
                     debug_print(
                         "the Parameterrange: "
@@ -2248,10 +2295,14 @@ class SheetTree(object):
 
                     iMulti = (maxPar - minPar) / eDivisions
                     urollPts.append(uVert0)
-                    for i in range(1, eDivisions):
-                        posi = fEdge.valueAt(minPar + i * iMulti)
-                        bPosi = unbendPoint(posi)
-                        urollPts.append(bPosi)
+                    urollPts.extend(
+                        unbendPoints(
+                            [
+                                fEdge.valueAt(minPar + i * iMulti)
+                                for i in range(1, eDivisions)
+                            ]
+                        )
+                    )
                     urollPts.append(uVert1)
 
                     uCurve = Part.BSplineCurve()
@@ -2287,11 +2338,9 @@ class SheetTree(object):
                     # compare minimal 1/curvature with curve-lenght to decide on division
                     iMulti = (maxPar - minPar) / 24
                     maxCurva = 0.0
-                    testPts = []
-                    for i in range(24 + 1):
-                        posi = fEdge.valueAt(minPar + i * iMulti)
-                        bPosi = unbendPoint(posi)
-                        testPts.append(bPosi)
+                    testPts = unbendPoints(
+                        [fEdge.valueAt(minPar + i * iMulti) for i in range(24 + 1)]
+                    )
                     testCurve = Part.BSplineCurve()
                     testCurve.interpolate(testPts)
                     testEdge = testCurve.toShape()
@@ -2312,23 +2361,22 @@ class SheetTree(object):
                     else:
                         bDivisions = 12
 
+                    # the division points are a subset of the test points
+                    # above, they are taken from bend_node.unbendCache
                     iMulti = (maxPar - minPar) / bDivisions
+                    urollPts.append(uVert0)
+                    urollPts.extend(
+                        unbendPoints(
+                            [
+                                fEdge.valueAt(minPar + i * iMulti)
+                                for i in range(1, bDivisions)
+                            ]
+                        )
+                    )
                     if vertexCount > 1:
-                        urollPts.append(uVert0)
-                        for i in range(1, bDivisions):
-                            posi = fEdge.valueAt(minPar + i * iMulti)
-                            # curvature is 1/radius
-                            # print 'Face', str(fIdx+1), ' 1/Curvature: ', 1/fEdge.Curve.curvature(minPar + i*iMulti), ' ', fEdge.Length
-                            bPosi = unbendPoint(posi)
-                            urollPts.append(bPosi)
                         urollPts.append(uVert1)
                     else:
                         urollPts.append(uVert0)
-                        for i in range(1, bDivisions):
-                            posi = fEdge.valueAt(minPar + i * iMulti)
-                            bPosi = unbendPoint(posi)
-                            urollPts.append(bPosi)
-                        urollPts.append(uVert0)
                     # testPoly = Part.makePolygon(urollPts)
                     # Part.show(testPoly, 'testPoly'+ str(fIdx+1) + '_')
                     uCurve = Part.BSplineCurve()
@@ -2477,14 +2525,43 @@ class SheetTree(object):
         returns:
           a new sorted list of indexes to edges of the original wire
           flag if wire is closed or not (a wire of a cylinder mantle is not closed!)
+        The chain starts at the first edge. End points are hashed to a grid
+        of the same precision as equal_vertex, so each link is found in
+        constant time. If the chain breaks before all edges are used, only
+        the connected part is returned and the wire is reported as open.
         """
+
+        def gridKey(vert):
+            return (
+                round(vert.X * 1.0e5),
+                round(vert.Y * 1.0e5),
+                round(vert.Z * 1.0e5),
+            )
+
+        endGrid = {}
+        for eIdx, edge in enumerate(myEdgeList):
+            for vIdx, vert in enumerate(edge.Vertexes[:2]):
+                endGrid.setdefault(gridKey(vert), []).append((eIdx, vIdx))
+
+        def nextEdge(vert, used):
+            # equal_vertex rounds the difference, so look into the
+            # neighbour cells too and take the lowest matching edge index
+            kx, ky, kz = gridKey(vert)
+            found = None
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for dz in (-1, 0, 1):
+                        for eIdx, vIdx in endGrid.get((kx + dx, ky + dy, kz + dz), ()):
+                            if used[eIdx] or (found is not None and found[0] <= eIdx):
+                                continue
+                            if equal_vertex(vert, myEdgeList[eIdx].Vertexes[vIdx]):
+                                found = eIdx, vIdx
+            return found
+
+        used = [False] * len(myEdgeList)
         eIndex = 0
-        newEdgeList = []
-        idxList = list(range(len(myEdgeList)))
         newIdxList = [eIndex]
-        newEdgeList.append(myEdgeList[eIndex])
-        idxList.remove(eIndex)
-        gotConnection = False
+        used[eIndex] = True
         closedWire = False
 
         startVert = myEdgeList[eIndex].Vertexes[0]
@@ -2492,34 +2569,27 @@ class SheetTree(object):
             vert = myEdgeList[eIndex].Vertexes[1]
         else:
             vert = myEdgeList[eIndex].Vertexes[0]
-        # Part.show(myEdgeList[0], 'tolEdge'+str(1)+'_')
-        while not gotConnection:
-            for eIdx in idxList:
-                edge = myEdgeList[eIdx]
-                if equal_vertex(vert, edge.Vertexes[0]):
-                    idxList.remove(eIdx)
-                    eIndex = eIdx
-                    # print 'found eIdx: ', eIdx
-                    newIdxList.append(eIdx)
-                    if len(edge.Vertexes) > 1:
-                        vert = edge.Vertexes[1]
-                    break
-                if len(edge.Vertexes) > 1:
-                    if equal_vertex(vert, edge.Vertexes[1]):
-                        idxList.remove(eIdx)
-                        eIndex = eIdx
-                        # print 'found eIdx: ', eIdx
-                        newIdxList.append(eIdx)
-                        vert = edge.Vertexes[0]
-                        break
-            if len(idxList) == 0:
-                gotConnection = True
+        if len(myEdgeList) == 1:
+            closedWire = equal_vertex(vert, startVert)
+        while len(newIdxList) < len(myEdgeList):
+            found = nextEdge(vert, used)
+            if found is None:
+                break
+            eIndex, vIdx = found
+            used[eIndex] = True
+            newIdxList.append(eIndex)
+            edge = myEdgeList[eIndex]
+            if len(edge.Vertexes) > 1:
+                vert = edge.Vertexes[1 - vIdx]
             if equal_vertex(vert, startVert):
-                # print 'got last connection'
-                gotConnection = True
                 closedWire = True
-            # Part.show(myEdgeList[eIdx], 'tolEdge'+str(eIdx+1)+'_')
-        # print 'tolerant wire: ', len(myEdgeList)
+                break
+
+        if not closedWire and len(newIdxList) < len(myEdgeList):
+            warn_print(
+                "sortEdgesTolerant: wire is broken, %d of %d edges are not connected"
+                % (len(myEdgeList) - len(newIdxList), len(myEdgeList))
+            )
         return newIdxList, closedWire
 
     def makeFoldLines(self, bend_node, nullVec):
@@ -2592,20 +2662,6 @@ class SheetTree(object):
         This is called with the vertices of the top and the opposite face only.
         """
 
-        def unbendDictPoint(poi, compRadialVec):
-            radVec = radial_vector(poi, cent, axis)
-            angle = math.atan2(nullVec.cross(radVec).dot(axis), nullVec.dot(radVec))
-            # print 'point Face', str(fIdx+1), ' ', angle
-            if angle < -math.pi / 8:
-                angle = angle + 2 * math.pi
-            rotVec = self.rotateVec(poi.sub(cent), -angle, axis)
-            chord = cent.sub(cent + rotVec)
-            norm = axis.cross(chord)
-            correctionVec = compRadialVec.sub(axis.cross(norm))
-            # print 'origVec ', axis.cross(norm), ' compRadialVec ', compRadialVec
-            bPoint = cent + rotVec + correctionVec + tanVec * transRad * angle
-            return bPoint
-
         thick = self.__thickness
         transRad = bend_node.innerRadius + bend_node.k_Factor * thick
         tanVec = bend_node.tan_vec
@@ -2618,14 +2674,26 @@ class SheetTree(object):
         norm = axis.cross(chord)
         oppCompRadialVec = axis.cross(norm)
 
+        topIdx = []
+        oppIdx = []
         for i in bend_node.vertexDict:
             flagStr, origVec, unbendVec = bend_node.vertexDict[i]
             if (not ("p" in flagStr)) and (not ("c" in flagStr)):
                 if "t" in flagStr:
-                    unbendVec = unbendDictPoint(origVec, topCompRadialVec)
+                    topIdx.append(i)
                 else:
-                    unbendVec = unbendDictPoint(origVec, oppCompRadialVec)
-                # print 'unbendDictPoint for ', flagStr
+                    oppIdx.append(i)
+
+        for idxList, compRadialVec in (
+            (topIdx, topCompRadialVec),
+            (oppIdx, oppCompRadialVec),
+        ):
+            origPoints = [bend_node.vertexDict[i][1] for i in idxList]
+            unbendPoints = unbend_points(
+                origPoints, cent, axis, nullVec, tanVec, transRad, compRadialVec
+            )
+            for i, origVec, unbendVec in zip(idxList, origPoints, unbendPoints):
+                flagStr = bend_node.vertexDict[i][0]
                 bend_node.vertexDict[i] = flagStr, origVec, unbendVec
 
         # for i in bend_node.vertexDict:
@@ -2851,29 +2919,73 @@ def sew_Shape(obj):
         sl = Part.Solid(sh)
         return sl
 
-##
 
-def getUnfold(k_factor_lookup, solid, facename, kFactorStandard):
-    global KFACTORSTANDARD
-    KFACTORSTANDARD = kFactorStandard
+# error codes of the tree-object, that may be solved by healing the shape
+healable_errors = (1,)
 
-    resPart = None
-    normalVect = None
-    folds = None
-    theName = None
-    faceSel = ""
-    ob_Name = solid.Name
-    err_code = 0
 
-    debug_print(f"name: {facename}")
-    f_number = int(facename.lstrip("Face")) - 1
-    face = solid.Shape.Faces[f_number]
-    normalVect = face.normalAt(0, 0)
+def getHealableErrors():
+    """Error 4 (invalid shape) is only retried with healed shapes on request,
+    healing does not solve it in general and every retry costs up to the
+    UnfoldHealTimeBudget"""
+    if SheetMetalTools.params.GetBool("UnfoldHealInvalidShape", False):
+        return healable_errors + (4,)
+    return healable_errors
+
+
+def heal_Shape(shape):
+    """
+    Generator of healed copies of a shape, nothing is added to the document.
+    Each step builds on the previous one and yields the name of the step
+    and the healed shape: sewing to a solid, fixing of tolerances and
+    removal of splitter edges.
+    """
+    sh = shape.copy()
+    sh.sewShape()
+    try:
+        sh = Part.Solid(sh)
+    except Part.OCCError:
+        pass
+    if sh.Volume < 0.0:
+        sh.reverse()
+    yield "sew", sh
+
+    sh = sh.copy()
+    sh.fix(1e-7, 1e-7, 1e-3)
+    yield "fix tolerances", sh
+
+    sh = sh.removeSplitter()
+    yield "remove splitter", sh
+
+
+def findHealedFace(shape, face, tol=1e-5):
+    """
+    Return the index of the face of the healed shape, that contains the
+    given face of the original shape, or None.
+    """
+    point = face.CenterOfMass
+    if not face.isInside(point, tol, True):
+        point = face.Edges[0].valueAt(
+            (face.Edges[0].FirstParameter + face.Edges[0].LastParameter) / 2
+        )
+    normal = face.normalAt(*face.Surface.parameter(point))
+    for i, hFace in enumerate(shape.Faces):
+        if not hFace.isInside(point, tol, True):
+            continue
+        hNormal = hFace.normalAt(*hFace.Surface.parameter(point))
+        if abs(hNormal.dot(normal)) > 1.0 - tol:
+            return i
+    return None
 
+
+def unfoldShape(k_factor_lookup, shape, f_number, solid):
+    """Run the V1 unfold on a shape, returns the tree, the unfolded part and the fold lines."""
+    resPart = None
+    folds = None
     startzeit = time.process_time()
 
     TheTree = SheetTree(
-        solid.Shape, f_number, k_factor_lookup, solid
+        shape, f_number, k_factor_lookup, solid
     )  # initializes the tree-structure
     if TheTree.error_code is None:
         TheTree.Bend_analysis(
@@ -2933,39 +3045,89 @@ def getUnfold(k_factor_lookup, solid, facename, kFactorStandard):
                             + str(showTime - startzeit)
                         )
 
-    if TheTree.error_code is not None:
-        if TheTree.error_code == 1:
-            warn_print("Error at Face" + str(TheTree.failed_face_idx + 1))
-            warn_print("Trying to repeat the unfold process again with the Sewed copied Shape")
-            FreeCAD.ActiveDocument.openTransaction("sanitize")
-            sewedShape = sew_Shape(solid)
-            solid.Visibility = False
-            ob = Part.show(sewedShape,"Solid")
-            ob.Label = solid.Label + "_copy"
-            if SheetMetalTools.isGuiLoaded():
-                ob.ViewObject.ShapeColor = solid.ViewObject.ShapeColor
-                ob.ViewObject.LineColor = solid.ViewObject.LineColor
-                ob.ViewObject.PointColor = solid.ViewObject.PointColor
-                ob.ViewObject.DiffuseColor = solid.ViewObject.DiffuseColor
-                ob.ViewObject.Transparency = solid.ViewObject.Transparency
-            FreeCAD.ActiveDocument.commitTransaction()
-            ob = FreeCAD.ActiveDocument.ActiveObject
-            ob_Name = ob.Name
-            ob.Label = solid.Label + "_copy"
-            faceSel = facename
-            err_code = TheTree.error_code
-        else:
-            warn_print(
-                "Error "
-                + unfold_error[TheTree.error_code]
-                + " at Face"
-                + str(TheTree.failed_face_idx + 1)
+    return TheTree, resPart, folds
+
+
+def unfoldHealedShape(k_factor_lookup, solid, f_number):
+    """
+    Retry a failed unfold with healed copies of the shape of solid, until
+    the unfold succeeds or the time budget is used up.
+    Returns the tree, the unfolded part, the fold lines and the list of the
+    healing steps that were needed. The tree is None if no retry was done.
+    """
+    timeBudget = SheetMetalTools.params.GetFloat("UnfoldHealTimeBudget", 10.0)
+    startTime = time.perf_counter()
+    steps = []
+    result = None, None, None
+    face = solid.Shape.Faces[f_number]
+    for stepName, healedShape in heal_Shape(solid.Shape):
+        if time.perf_counter() - startTime > timeBudget:
+            warn_print("Healing of the shape stopped, time budget exceeded")
+            break
+        steps.append(stepName)
+        if not healedShape.isValid():
+            debug_print("Healed shape is not valid after: " + stepName)
+            continue
+        healedIdx = findHealedFace(healedShape, face)
+        if healedIdx is None:
+            debug_print("Selected face not found after: " + stepName)
+            continue
+        result = unfoldShape(k_factor_lookup, healedShape, healedIdx, solid)
+        if result[0].error_code is None:
+            break
+        # an unfold attempt can take much longer than a healing step
+        if time.perf_counter() - startTime > timeBudget:
+            warn_print("Healing of the shape stopped, time budget exceeded")
+            break
+    return result + (steps,)
+
+
+def getUnfold(k_factor_lookup, solid, facename, kFactorStandard):
+    global KFACTORSTANDARD
+    KFACTORSTANDARD = kFactorStandard
+
+    resPart = None
+    normalVect = None
+    folds = None
+    theName = None
+    faceSel = ""
+    ob_Name = solid.Name
+    err_code = 0
+
+    debug_print(f"name: {facename}")
+    f_number = int(facename.lstrip("Face")) - 1
+    face = solid.Shape.Faces[f_number]
+    normalVect = face.normalAt(0, 0)
+
+    TheTree, resPart, folds = unfoldShape(
+        k_factor_lookup, solid.Shape, f_number, solid
+    )
+
+    if TheTree.error_code in getHealableErrors():
+        warn_print("Error at Face" + str(TheTree.failed_face_idx + 1))
+        warn_print("Trying to repeat the unfold process again with a healed copy of the Shape")
+        healedTree, healedPart, healedFolds, steps = unfoldHealedShape(
+            k_factor_lookup, solid, f_number
+        )
+        if healedTree is not None and healedTree.error_code is None:
+            SMLogger.warning(
+                FreeCAD.Qt.translate(
+                    "Logger", "Shape of '{}' unfolded after healing: {}"
+                ).format(solid.Label, ", ".join(steps))
             )
+            TheTree, resPart, folds = healedTree, healedPart, healedFolds
+
+    if TheTree.error_code is not None:
+        err_code = TheTree.error_code
+        warn_print(
+            "Error "
+            + unfold_error[TheTree.error_code]
+            + " at Face"
+            + str(TheTree.failed_face_idx + 1)
+        )
     else:
         debug_print("Unfold successful")
 
-    endzeit = time.process_time()
-    # debug_print("Analytical time: " + str(endzeit - startzeit))
     return resPart, folds, normalVect, theName, err_code, faceSel, ob_Name
 
 
@@ -2982,34 +3144,163 @@ def SMGetGeoSegment(e):
     return None
 
 
-def SMmakeSketchfromEdges(edges, name):
+def SMGetDiscreteSegments(e):
+    """Sketch geometry of an edge, BSplines are converted to arcs, ellipses
+    and parabolas to polygons."""
     precision = 0.1  # precision in Bspline to BiArcs
     quasidef = 0.01  # quasi deflection for Ellipses and Parabola
-    usk = FreeCAD.activeDocument().addObject("Sketcher::SketchObject", name)
     geo = []
-    for e in edges:
-        if isinstance(e.Curve, Part.BSplineCurve):
-            arcs = e.Curve.toBiArcs(precision)
-            for i in arcs:
-                eb = Part.Edge(i)
-                seg = SMGetGeoSegment(eb)
-                if seg is not None:
-                    geo.append(seg)
-        elif isinstance(e.Curve, Part.Ellipse) or isinstance(e.Curve, Part.Parabola):
-            l = e.copy().discretize(QuasiDeflection=quasidef)
-            plines = Part.makePolygon(l)
-            for edg in plines.Edges:
-                seg = SMGetGeoSegment(edg)
-                if seg is not None:
-                    geo.append(seg)
-        else:
-            seg = SMGetGeoSegment(e)
+    if isinstance(e.Curve, Part.BSplineCurve):
+        arcs = e.Curve.toBiArcs(precision)
+        for i in arcs:
+            eb = Part.Edge(i)
+            seg = SMGetGeoSegment(eb)
+            if seg is not None:
+                geo.append(seg)
+    elif isinstance(e.Curve, Part.Ellipse) or isinstance(e.Curve, Part.Parabola):
+        l = e.copy().discretize(QuasiDeflection=quasidef)
+        plines = Part.makePolygon(l)
+        for edg in plines.Edges:
+            seg = SMGetGeoSegment(edg)
             if seg is not None:
                 geo.append(seg)
+    else:
+        seg = SMGetGeoSegment(e)
+        if seg is not None:
+            geo.append(seg)
+    return geo
+
+
+def SMmakeSketchfromEdges(edges, name):
+    usk = FreeCAD.activeDocument().addObject("Sketcher::SketchObject", name)
+    geo = []
+    for e in edges:
+        geo.extend(SMGetDiscreteSegments(e))
     usk.addGeometry(geo)
     return usk
 
 
+def SMGetSketchGeometry(e):
+    """Exact sketch geometry of an edge, or None if there is none."""
+    seg = SMGetGeoSegment(e)
+    if seg is not None:
+        return seg
+    if isinstance(e.Curve, Part.Ellipse):
+        if e.Closed:
+            return e.Curve.copy()
+        return Part.ArcOfEllipse(e.Curve, e.FirstParameter, e.LastParameter)
+    if isinstance(e.Curve, Part.BSplineCurve):
+        curve = e.Curve.copy()
+        if not e.Closed:
+            curve.segment(e.FirstParameter, e.LastParameter)
+        return curve
+    return None
+
+
+def SMSketchEndTangent(geo, pos):
+    """Tangent direction of a line or arc at its start (pos 1) or end (pos 2)."""
+    if isinstance(geo, Part.LineSegment):
+        return geo.EndPoint - geo.StartPoint
+    if isinstance(geo, Part.ArcOfCircle):
+        point = geo.StartPoint if pos == 1 else geo.EndPoint
+        return geo.Axis.cross(point - geo.Center)
+    return None
+
+
+def SMSketchConstraints(geoList, mode="full", tol=1e-5):
+    """
+    Constraints for a list of sketch geometries.
+    mode "none" gives no constraints, "coincident" only coincident end points,
+    "full" adds tangent line and arc joins and horizontal and vertical lines.
+    End points within tol of the first point of a group are made coincident,
+    the groups are looked up in a grid of cell size tol.
+    """
+    constraints = []
+    if mode == "none":
+        return constraints
+
+    # group end points that are closer than tol to the first point of a
+    # group. Grouping is not transitive: points of a chain, each within tol
+    # of the next one, do not end up in a single group wider than tol.
+    # The first points of the groups are put into a grid of cell size tol.
+    groups = []
+    grid = {}
+    for gIdx, geo in enumerate(geoList):
+        if not hasattr(geo, "StartPoint") or geo.isClosed():
+            continue
+        for pos, point in ((1, geo.StartPoint), (2, geo.EndPoint)):
+            kx, ky = round(point.x / tol), round(point.y / tol)
+            nearest, nearestDist = None, tol
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for group in grid.get((kx + dx, ky + dy), ()):
+                        dist = (group[0][2] - point).Length
+                        if dist <= nearestDist:
+                            nearest, nearestDist = group, dist
+            if nearest is None:
+                nearest = []
+                groups.append(nearest)
+                grid.setdefault((kx, ky), []).append(nearest)
+            nearest.append((gIdx, pos, point))
+
+    for group in groups:
+        for (g1, p1, _pt1), (g2, p2, _pt2) in zip(group, group[1:]):
+            if g1 == g2:
+                continue
+            kind = "Coincident"
+            if mode == "full":
+                t1 = SMSketchEndTangent(geoList[g1], p1)
+                t2 = SMSketchEndTangent(geoList[g2], p2)
+                if (
+                    t1 is not None
+                    and t2 is not None
+                    and not (
+                        isinstance(geoList[g1], Part.LineSegment)
+                        and isinstance(geoList[g2], Part.LineSegment)
+                    )
+                    and t1.Length > tol
+                    and t2.Length > tol
+                    and t1.cross(t2).Length <= 1e-7 * t1.Length * t2.Length
+                ):
+                    kind = "Tangent"
+            constraints.append(Sketcher.Constraint(kind, g1, p1, g2, p2))
+
+    if mode == "full":
+        for gIdx, geo in enumerate(geoList):
+            if isinstance(geo, Part.LineSegment):
+                vec = geo.EndPoint - geo.StartPoint
+                if abs(vec.y) <= tol and abs(vec.x) > tol:
+                    constraints.append(Sketcher.Constraint("Horizontal", gIdx))
+                elif abs(vec.x) <= tol and abs(vec.y) > tol:
+                    constraints.append(Sketcher.Constraint("Vertical", gIdx))
+    return constraints
+
+
+def sketchPlaneMatrix(norm, point):
+    """
+    Matrix that moves the plane through point with the normal norm into the
+    XY-plane. The X direction is chosen the way OCC's gp_Ax2 does it for a
+    main direction, like the TechDraw projection used before, so sketches
+    keep their orientation.
+    """
+    n = FreeCAD.Vector(norm).normalize()
+    a, b, c = abs(n.x), abs(n.y), abs(n.z)
+    if b <= a and b <= c:
+        xDir = FreeCAD.Vector(-n.z, 0.0, n.x) if a > c else FreeCAD.Vector(n.z, 0.0, -n.x)
+    elif a <= b and a <= c:
+        xDir = FreeCAD.Vector(0.0, -n.z, n.y) if b > c else FreeCAD.Vector(0.0, n.z, -n.y)
+    else:
+        xDir = FreeCAD.Vector(-n.y, n.x, 0.0) if a > b else FreeCAD.Vector(n.y, -n.x, 0.0)
+    xDir.normalize()
+    yDir = n.cross(xDir)
+    return FreeCAD.Matrix(
+        xDir.x, xDir.y, xDir.z, 0.0,
+        yDir.x, yDir.y, yDir.z, 0.0,
+        n.x, n.y, n.z, -n.dot(point),
+        0.0, 0.0, 0.0, 1.0,
+    )
+
+
 def getUnfoldSketches(
     shape,
     foldLines,
@@ -3019,27 +3310,50 @@ def getUnfoldSketches(
     sketchColor="#000080",
     bendSketchColor="#c00000",
     internalSketchColor="#ff5733",
+    asShapes=False,
 ):
+    """
+    Make the unfold sketches. With asShapes lightweight Part::Feature
+    objects with the planar edges are made instead of sketches.
+    """
     unfold_sketch = None
 
-    # locate the projection face
-    unfoldobj = shape
+    # locate the top face, it holds all edges of the flat pattern
+    topFace = None
     for face in shape.Faces:
         fnorm = face.normalAt(0, 0)
         isSameDir = abs(fnorm.dot(norm) - 1.0) < 0.00001
         if isSameDir:
-            unfoldobj = face
+            topFace = face
             break
-    edges = []
-    perimEdges = projectEx(unfoldobj, norm)[0]
-    edges.append(perimEdges)
-    if len(foldLines) > 0:
-        co = Part.makeCompound(foldLines)
-        foldEdges = projectEx(co, norm)[0]
-
-        if not splitSketches:
-            edges.append(foldEdges)
-    unfold_sketch = generateSketch(edges, "Unfold_Sketch", sketchColor, existingSketches)
+
+    if topFace is not None:
+        # the top face is planar, so its wires are moved into the sketch
+        # plane directly instead of running a hidden line projection
+        faceMatrix = sketchPlaneMatrix(norm, topFace.Vertexes[0].Point)
+        owEdgs = topFace.OuterWire.transformed(faceMatrix).Edges
+        outerHash = topFace.OuterWire.hashCode()
+        intEdgs = []
+        for wire in topFace.Wires:
+            if wire.hashCode() != outerHash:
+                intEdgs.extend(wire.transformed(faceMatrix).Edges)
+        perimEdges = Part.makeCompound(owEdgs + intEdgs)
+        foldEdges = [
+            e.transformed(sketchPlaneMatrix(norm, e.Vertexes[0].Point))
+            for e in foldLines
+        ]
+    else:
+        perimEdges = projectEx(shape, norm)[0]
+        foldEdges = []
+        if len(foldLines) > 0:
+            foldEdges = projectEx(Part.makeCompound(foldLines), norm)[0].Edges
+
+    edges = [perimEdges]
+    if not splitSketches:
+        edges.extend(foldEdges)
+    unfold_sketch = generateSketch(
+        edges, "Unfold_Sketch", sketchColor, existingSketches, asShape=asShapes
+    )
     sketches = [unfold_sketch]
     if not splitSketches:
         return sketches
@@ -3047,84 +3361,107 @@ def getUnfoldSketches(
     unfold_sketch_outline = None
     unfold_sketch_bend = None
     unfold_sketch_internal = None
-    tidy = False
-    newface = Part.makeFace(unfold_sketch.Shape, "Part::FaceMakerBullseye")
 
-    try:
-        owEdgs = newface.OuterWire.Edges
-        faceEdgs = newface.Edges
-    except:
-        _exc_type, _exc_obj, exc_tb = sys.exc_info()
-        SMLogger.error(
-            FreeCAD.Qt.translate(
-                "Logger",
-                "Exception at line {}"
-                ": Outline Sketch failed, re-trying after tidying up",
-            ).format(str(exc_tb.tb_lineno))
-        )
-        tidy = True
-        owEdgs = unfold_sketch.Shape.Edges
-        faceEdgs = unfold_sketch.Shape.Edges
+    if topFace is None:
+        tidy = False
+        newface = Part.makeFace(unfold_sketch.Shape, "Part::FaceMakerBullseye")
+        try:
+            owEdgs = newface.OuterWire.Edges
+            faceEdgs = newface.Edges
+        except:
+            _exc_type, _exc_obj, exc_tb = sys.exc_info()
+            SMLogger.error(
+                FreeCAD.Qt.translate(
+                    "Logger",
+                    "Exception at line {}"
+                    ": Outline Sketch failed, re-trying after tidying up",
+                ).format(str(exc_tb.tb_lineno))
+            )
+            tidy = True
+            owEdgs = unfold_sketch.Shape.Edges
+            faceEdgs = unfold_sketch.Shape.Edges
+        if tidy:
+            SMLogger.error(
+                FreeCAD.Qt.translate(
+                    "Logger", "tidying up Unfold_Sketch_Outline"
+                )
+            )
+        outerHashes = {e.hashCode() for e in owEdgs}
+        intEdgs = [e for e in faceEdgs if e.hashCode() not in outerHashes]
 
     unfold_sketch_outline = generateSketch(
-        owEdgs, "Unfold_Sketch_Outline", sketchColor, existingSketches
+        owEdgs, "Unfold_Sketch_Outline", sketchColor, existingSketches, asShape=asShapes
     )
     sketches.append(unfold_sketch_outline)
 
-    if tidy:
-        SMLogger.error(
-            FreeCAD.Qt.translate(
-                "Logger", "tidying up Unfold_Sketch_Outline"
-            )
-        )
-    intEdgs = []
-    idx = []
-    for i, e in enumerate(faceEdgs):
-        for oe in owEdgs:
-            if oe.hashCode() == e.hashCode():
-                idx.append(i)
-    for i, e in enumerate(faceEdgs):
-        if i not in idx:
-            intEdgs.append(e)
     if len(intEdgs) > 0:
         unfold_sketch_internal = generateSketch(
-            intEdgs, "Unfold_Sketch_Internal", internalSketchColor, existingSketches
+            intEdgs,
+            "Unfold_Sketch_Internal",
+            internalSketchColor,
+            existingSketches,
+            asShape=asShapes,
         )
         sketches.append(unfold_sketch_internal)
 
-    if len(foldLines) > 0 and splitSketches:
+    if len(foldEdges) > 0:
         unfold_sketch_bend = generateSketch(
-            foldEdges, "Unfold_Sketch_Bends", bendSketchColor, existingSketches
+            foldEdges,
+            "Unfold_Sketch_Bends",
+            bendSketchColor,
+            existingSketches,
+            asShape=asShapes,
         )
         sketches.append(unfold_sketch_bend)
 
     return sketches
 
 
-def generateSketch(edges, name, color, existingSketches = None):
+def generateSketch(
+    edges, name, color, existingSketches = None, constraintMode = None, asShape = False
+):
+    """
+    Make a sketch from planar edges in the XY-plane.
+    constraintMode is one of "none", "coincident" or "full", by default it
+    is taken from the UnfoldSketchConstraints preference.
+    With asShape a solver free Part::Feature is made instead.
+    """
     p = Part.makeCompound(edges)
+    if asShape:
+        return SheetMetalTools.smMakeShapeSketch(p.Edges, name, color, existingSketches)
     doc = FreeCAD.ActiveDocument
+    if constraintMode is None:
+        constraintMode = SheetMetalTools.params.GetString("UnfoldSketchConstraints", "full")
     # See if there is an existing sketch with the same name and use it insted of creating
-    if existingSketches is None:
-        existingSketchName = ""
+    sk = SheetMetalTools.smGetReusableObject(
+        doc, existingSketches, name, "Sketcher::SketchObject"
+    )
+    if sk is not None:
+        sk.deleteAllGeometry()
     else:
-        existingSketchName =  next((item for item in existingSketches if item.startswith(name)), "")
-    existingSketch = doc.getObject(existingSketchName)
-    if existingSketch is not None:
-        existingSketch.deleteAllGeometry()
+        sk = doc.addObject("Sketcher::SketchObject", name)
+        sk.Label = name
 
-    try:
-        sk = Draft.makeSketch(
-            p.Edges, autoconstraints=True, addTo=existingSketch, delete=False, name=name
+    # edges without exact sketch geometry are discretized, one by one
+    geo = []
+    discretized = 0
+    for e in p.Edges:
+        try:
+            seg = SMGetSketchGeometry(e)
+        except Part.OCCError:
+            seg = None
+        if seg is not None:
+            geo.append(seg)
+        else:
+            geo.extend(SMGetDiscreteSegments(e))
+            discretized += 1
+    if discretized > 0:
+        SMLogger.warning(
+            FreeCAD.Qt.translate("Logger", "discretizing {} edges of Sketch").format(discretized)
         )
-        if existingSketch is None:
-            sk.Label = name
-    except:
-        doc = FreeCAD.ActiveDocument
-        skb = doc.ActiveObject
-        doc.removeObject(skb.Name)
-        SMLogger.warning(FreeCAD.Qt.translate("Logger", "discretizing Sketch"))
-        sk = SMmakeSketchfromEdges(p.Edges, name)
+    sk.addGeometry(geo)
+    # the sketcher may reorient arcs, so use its geometry for the constraints
+    sk.addConstraint(SMSketchConstraints(sk.Geometry, constraintMode))
 
     if FreeCAD.GuiUp:
         rgb_color = tuple(int(color[i : i + 2], 16) for i in (1, 3, 5))
@@ -25,3 +25,13 @@ import TestApp
 
 from SMTests.testFolder import TestFolder
 from SMTests.testKfactor import TestKFactor
+from SMTests.testThickness import TestThickness
+from SMTests.testFaceTools import TestFaceTools
+from SMTests.testBaseShapeCache import TestBaseShapeCache
+from SMTests.testDesignTable import TestDesignTable
+from SMTests.testSheetMetrics import TestSheetMetrics
+from SMTests.testEdgeCleanup import TestEdgeCleanup
+from SMTests.testFlatExport import TestFlatExport
+from SMTests.testParallel import TestParallel
+from SMTests.testSketchConstraints import TestSketchConstraints
+from SMTests.testMiter import TestMiter